@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+
+import settings
+from modules.amounts import plan_even, plan_range
+
+"""
+Plan per-recipient amounts for a large even split and range distribution.
+
+Compares the amount planner with the previous float-based split, which drew
+with random.uniform, rescaled and fixed rounding one unit per loop iteration.
+At wei scale that loop can run for billions of iterations, so here it is
+capped and the leftover error is reported instead.
+
+    python -m benchmarks.bench_amounts --recipients 100000
+"""
+
+
+def float_split(total_amount, N, variance=settings.VARIANCE, max_fixes=10**6):
+    average_amount = total_amount / N
+    lower_boundary = average_amount * (1 - variance)
+    upper_boundary = average_amount * (1 + variance)
+    random_values = [random.uniform(lower_boundary, upper_boundary) for _ in range(N)]
+    scale_factor = total_amount / sum(random_values)
+    amounts = [int(value * scale_factor) for value in random_values]
+    difference = total_amount - sum(amounts)
+    for i in range(min(abs(difference), max_fixes)):
+        amounts[i % N] += 1 if difference > 0 else -1
+    return amounts
+
+
+def report(name: str, amounts: list[int], total: int, elapsed: float):
+    average = total // len(amounts)
+    worst = max(abs(amount - average) for amount in amounts) / average
+    print(
+        f"{name:<14} {elapsed * 1000:8.1f} ms  "
+        f"sum error {sum(amounts) - total:>+6}  max deviation {worst:.4%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    count = args.recipients
+    total = 123_456_789 * 10**18 + 987_654_321  # wei-scale, beyond float precision
+
+    start = time.perf_counter()
+    amounts = float_split(total, count)
+    report("float split", amounts, total, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    amounts = plan_even(total, count, rng=random.Random(1))
+    report("plan_even", amounts, total, time.perf_counter() - start)
+    assert amounts == plan_even(total, count, rng=random.Random(1))
+
+    start = time.perf_counter()
+    plan_range(count, 10**16, 2 * 10**16, rng=random.Random(1))
+    elapsed = time.perf_counter() - start
+    print(f"{'plan_range':<14} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
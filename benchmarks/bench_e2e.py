@@ -0,0 +1,144 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from tabulate import tabulate
+
+import settings
+from benchmarks.evm_sim import EVMSimulator
+from main import process_wallets
+from models.network import Network
+from modules import disperse, engine, pipeline, scanner, signer  # noqa: F401
+from modules.accounts import derive_addresses
+from modules.logger import logger
+from modules.provider import close_all
+
+"""
+End-to-end throughput of `process_wallets` against the local EVM simulator.
+
+Runs collect, dispense and one-to-one over generated wallets and reports wall
+time, mined tx/s and RPC calls per transfer:
+
+    python -m benchmarks.bench_e2e --wallets 10,1000 --block-time 0.1
+    python -m benchmarks.bench_e2e --wallets 10000 --engine async --faults underpriced=0.01
+"""
+
+ACTIONS = ("collect", "dispense", "one-to-one")
+FUNDING = 10**16  # 0.01 ETH per sender
+AMOUNT = [0.0001, 0.0002]
+
+
+def write_inputs(action: str, count: int) -> tuple[list[str], list[str]]:
+    senders = 1 if action == "dispense" else count
+    recipients = 1 if action == "collect" else count
+
+    keys = [f"{i + 1:064x}" for i in range(senders)]
+    addresses = [f"0x{0xB0B0_0000 + i:040x}" for i in range(recipients)]
+
+    with open("keys.txt", "w") as file:
+        file.write("\n".join(keys) + "\n")
+    with open("recipients.txt", "w") as file:
+        file.write("\n".join(addresses) + "\n")
+    return keys, addresses
+
+
+def run(action: str, count: int, args) -> list:
+    # Runs happen in a scratch dir; modules reading data/ are imported above
+    root = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, EVMSimulator(
+        block_time=args.block_time,
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        faults=args.faults,
+    ) as sim:
+        os.chdir(workdir)
+        try:
+            keys, _ = write_inputs(action, count)
+            funding = FUNDING * count if action == "dispense" else FUNDING
+            for address in derive_addresses(keys):
+                sim.fund(address, funding)
+
+            chain = Network(
+                name=f"sim-{action}-{count}",  # fresh oracles, watchers and nonces
+                rpc_url=sim.url,
+                explorer="",
+                eip_1559=True,
+                native_token="ETH",
+            )
+            params = {
+                "action": action,
+                "token": "ETH",
+                "amount": "max" if action == "collect" else AMOUNT,
+                "chain": chain,
+            }
+
+            sim.reset()
+            start = time.perf_counter()
+            process_wallets(params)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(root)
+            close_all()
+
+    rejected = ", ".join(f"{k}={v}" for k, v in sorted(sim.rejected.items()))
+    return [
+        action,
+        count,
+        f"{elapsed:.2f}s",
+        f"{sim.mined / elapsed:.1f}",
+        f"{sim.requests / max(1, sim.mined):.1f}",
+        f"{sim.mined}/{count}",
+        rejected or "-",
+    ]
+
+
+def parse_faults(value: str) -> dict[str, float]:
+    faults = {}
+    for item in filter(None, value.split(",")):
+        name, rate = item.split("=")
+        faults[name] = float(rate)
+    return faults
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", default="10,1000", help="comma-separated sizes")
+    parser.add_argument("--actions", default=",".join(ACTIONS))
+    parser.add_argument("--engine", default=settings.ENGINE)
+    parser.add_argument("--pipeline", action="store_true", help="pipelined dispense")
+    parser.add_argument("--block-time", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="HTTP 429s")
+    parser.add_argument(
+        "--faults",
+        type=parse_faults,
+        default={},
+        help="e.g. underpriced=0.01,nonce_too_low=0.01,already_known=0.01",
+    )
+    parser.add_argument("--rate-limit", type=float, default=0, help="RPC_RATE_LIMIT")
+    parser.add_argument("--verbose", action="store_true", help="log every transfer")
+    args = parser.parse_args()
+
+    settings.ENGINE = args.engine
+    settings.PIPELINE = args.pipeline
+    settings.SPACE_WALLETS = False
+    settings.RPC_RATE_LIMIT = args.rate_limit
+    settings.FEE_CACHE_TTL = args.block_time
+    settings.RECEIPT_POLL_INTERVAL = max(0.01, args.block_time / 4)
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "WARNING")
+
+    rows = [
+        run(action, int(count), args)
+        for action in args.actions.split(",")
+        for count in args.wallets.split(",")
+    ]
+    headers = ["Action", "Wallets", "Wall", "tx/s", "RPC/tx", "Mined", "Rejected"]
+    print(tabulate(rows, headers=headers, tablefmt="simple"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from tabulate import tabulate
+
+from models.network import Network
+from modules import accounts
+from modules.accounts import cache_addresses
+from modules.async_wallet import AsyncWallet
+from modules.batch import batched
+from modules.state import get_wallet_table
+from modules.wallet import Wallet
+
+"""
+Per-wallet setup cost and memory of the wallet handles, measured with tracemalloc.
+
+Each wallet goes through what the engines do per pair without any RPC: cache
+its address as a chunk's derivation would, build the handle, seed its nonce
+and balance from a pre-flight result, allocate a nonce and record the outcome.
+"Kept" is what stays allocated once the handles are gone (the wallet table
+rows and the address cache), and should stay flat as the run grows:
+
+    python -m benchmarks.bench_memory --wallets 1000,10000,100000
+"""
+
+
+CHUNK_SIZE = 10_000  # Keys whose addresses are cached at once, as in a scan
+
+
+def make_keys(count: int, first: int) -> list[tuple[str, str]]:
+    # Fake addresses stand in for the EC derivation, which is not what's measured
+    return [
+        (f"{i:064x}", f"0x{0xA11CE_0000 + i:040x}") for i in range(first, first + count)
+    ]
+
+
+def wallets(keys: list[tuple[str, str]]):
+    for chunk in batched(keys, CHUNK_SIZE):
+        cache_addresses(*zip(*chunk))
+        yield from (key for key, _ in chunk)
+
+
+def network(name: str) -> Network:
+    # Fresh tables per run; nothing is sent, so the RPC is never dialled
+    return Network(
+        name=name,
+        rpc_url="http://127.0.0.1:1",
+        explorer="",
+        eip_1559=True,
+        native_token="ETH",
+    )
+
+
+def run_sync(keys: list[tuple[str, str]], chain: Network):
+    total = len(keys)
+    for index, key in enumerate(wallets(keys), start=1):
+        wallet = Wallet(key, f"[{index}/{total}]", chain, index)
+        wallet.use_prefetched({"nonce": 0, "balance": 10**18})
+        wallet.get_balance()
+        wallet.nonces.allocate()
+        wallet.record("confirmed")
+
+
+def run_async(keys: list[tuple[str, str]], chain: Network):
+    total = len(keys)
+    for index, key in enumerate(wallets(keys), start=1):
+        wallet = AsyncWallet(key, f"[{index}/{total}]", chain, None, index)
+        wallet.record("confirmed")
+
+
+def measure(engine: str, count: int, first: int) -> list:
+    run = run_sync if engine == "sync" else run_async
+    # Timed without tracemalloc, which slows allocations down several times
+    timed = network(f"mem-{engine}-{count}-timed")
+    get_wallet_table(timed).clients  # build the shared clients outside the loop
+    keys = make_keys(count, first)
+    start = time.perf_counter()
+    run(keys, timed)
+    elapsed = time.perf_counter() - start
+
+    # Fresh keys and an empty cache, so it fills up again under tracemalloc
+    traced = network(f"mem-{engine}-{count}")
+    get_wallet_table(traced).clients
+    keys = make_keys(count, first + count)
+    accounts._addresses.clear()
+    gc.collect()
+    tracemalloc.start()
+    run(keys, traced)
+    gc.collect()
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert get_wallet_table(traced).count("confirmed") == count
+    return [
+        engine,
+        count,
+        f"{elapsed / count * 10**6:.1f}us",
+        f"{kept / count:.0f}B",
+        f"{kept / 2**20:.1f}MiB",
+        f"{peak / 2**20:.1f}MiB",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", default="1000,10000,100000")
+    parser.add_argument("--engines", default="sync,async")
+    args = parser.parse_args()
+
+    rows, first = [], 1
+    for engine in args.engines.split(","):
+        for count in map(int, args.wallets.split(",")):
+            rows.append(measure(engine, count, first))
+            first += 2 * count
+    headers = ["Engine", "Wallets", "Setup/wallet", "Kept/wallet", "Kept", "Peak"]
+    print(tabulate(rows, headers=headers, tablefmt="simple"))
+
+
+if __name__ == "__main__":
+    main()
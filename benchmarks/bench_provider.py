@@ -0,0 +1,64 @@
+import argparse
+import time
+
+from eth_account import Account
+from web3 import HTTPProvider, Web3
+from web3.middleware import geth_poa_middleware
+
+from benchmarks.mock_rpc import MockRPC
+from models.network import Network
+from modules import provider
+
+"""
+Compare one HTTPProvider per wallet against the shared per-chain provider.
+
+    python -m benchmarks.bench_provider --wallets 500 --latency 0.002
+"""
+
+
+def per_wallet(url: str, addresses: list[str]):
+    for address in addresses:
+        w3 = Web3(HTTPProvider(url))
+        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        w3.eth.get_balance(address)
+
+
+def shared(chain: Network, addresses: list[str]):
+    for address in addresses:
+        provider.get_web3(chain).eth.get_balance(address)
+
+
+def run(name: str, rpc: MockRPC, fn, *args):
+    rpc.reset()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<12} {elapsed:8.3f}s  {rpc.requests / elapsed:9.1f} req/s  "
+        f"{rpc.connections} connections"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    addresses = [Account.create().address for _ in range(args.wallets)]
+
+    with MockRPC(latency=args.latency) as rpc:
+        chain = Network(
+            name="mock",
+            rpc_url=rpc.url,
+            explorer="",
+            eip_1559=True,
+            native_token="ETH",
+        )
+        run("per-wallet", rpc, per_wallet, rpc.url, addresses)
+        run("shared", rpc, shared, chain, addresses)
+        provider.close_all()
+
+
+if __name__ == "__main__":
+    main()
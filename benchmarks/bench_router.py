@@ -0,0 +1,60 @@
+import argparse
+import time
+from contextlib import ExitStack
+
+from eth_account import Account
+
+import settings
+from benchmarks.mock_rpc import MockRPC
+from models.network import Network
+from modules import provider
+
+"""
+Route reads over several mock endpoints with injected latency and faults.
+
+    python -m benchmarks.bench_router --requests 500
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    settings.RATE_LIMIT_BACKOFF = 1
+    settings.CIRCUIT_BREAKER_COOLDOWN = 2
+
+    profiles = {
+        "slow": dict(latency=0.05),
+        "fast": dict(latency=0.005),
+        "flaky": dict(latency=0.001, error_rate=0.3),
+        "throttled": dict(latency=0.001, throttle_rate=0.5),
+    }
+    address = Account.create().address
+
+    with ExitStack() as stack:
+        servers = {
+            name: stack.enter_context(MockRPC(**p)) for name, p in profiles.items()
+        }
+        urls = [server.url for server in servers.values()]
+        chain = Network("mock", urls[0], "", True, "ETH", rpc_urls=urls[1:])
+        w3 = provider.get_web3(chain)
+
+        failed = 0
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            try:
+                w3.eth.get_balance(address)
+            except Exception:
+                failed += 1
+        elapsed = time.perf_counter() - start
+
+        print(f"{args.requests} reads in {elapsed:.2f}s, {failed} failed")
+        for name, server in servers.items():
+            print(f"{name:<10} {server.requests:>6} requests")
+
+        provider.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from eth_account import Account
+
+from modules.signer import sign_all
+
+"""
+Signatures per second: inline signing (as in Wallet.send_tx) vs the process pool.
+
+    python -m benchmarks.bench_signing --txs 2000
+"""
+
+
+def build_jobs(count: int) -> list[tuple[str, dict]]:
+    recipient = Account.create().address
+    jobs = []
+    for _ in range(count):
+        tx = {
+            "chainId": 1,
+            "nonce": 0,
+            "to": recipient,
+            "value": 10**15,
+            "gas": 21000,
+            "maxFeePerGas": 30 * 10**9,
+            "maxPriorityFeePerGas": 10**9,
+        }
+        jobs.append((Account.create().key.hex(), tx))
+    return jobs
+
+
+def inline(jobs):
+    for key, tx in jobs:
+        account = Account.from_key(key)
+        account.sign_transaction(tx)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--txs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    jobs = build_jobs(args.txs)
+
+    for name, fn in [("inline", inline), ("pool", lambda j: sign_all(j, args.workers))]:
+        start = time.perf_counter()
+        fn(jobs)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {elapsed:7.2f}s  {args.txs / elapsed:9.1f} sig/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import subprocess
+import sys
+
+"""
+Import-time report for `main`, parsed from `python -X importtime`.
+
+Fails (exit 1) when startup exceeds --budget or pulls in a module that should
+only load after the prompts, so regressions show up in CI or before a commit.
+
+    python -m benchmarks.bench_startup --budget 500
+"""
+
+# Nothing here may be needed to show the first prompt
+DEFERRED = ["web3", "eth_account", "aiohttp", "requests", "tqdm", "eth_utils"]
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """
+    Return (module, self us, cumulative us) for every module `module` imports.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget", type=float, default=None, help="ms")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # Keep the fastest run, the others mostly measure a cold disk cache
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    times = min(runs, key=lambda run: sum(t[1] for t in run))
+    total_ms = sum(self_us for _, self_us, _ in times) / 1000
+
+    print(f"{'module':<40} {'self ms':>9} {'cumul ms':>9}")
+    slowest = sorted(times, key=lambda t: -t[2])[: args.top]
+    for name, self_us, cumulative_us in slowest:
+        print(f"{name:<40} {self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}")
+    print(f"\n{len(times)} modules, {total_ms:.1f} ms total")
+
+    failed = False
+    loaded = {name for name, _, _ in times}
+    for name in DEFERRED:
+        if name in loaded:
+            print(f"FAIL: `{name}` is imported at startup")
+            failed = True
+
+    if args.budget is not None and total_ms > args.budget:
+        print(f"FAIL: startup {total_ms:.1f} ms exceeds budget {args.budget} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+import random
+import threading
+
+import rlp
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_account._utils.legacy_transactions import Transaction
+from eth_account._utils.typed_transactions import TypedTransaction
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from benchmarks.mock_rpc import CHAIN_ID, GAS_PRICE, MockRPC, RPCError
+from data.const import DISPERSE_ADDRESS, MULTICALL3_ADDRESS
+
+"""
+Local EVM JSON-RPC stand-in for end-to-end benchmarks.
+
+Extends MockRPC with native balances, nonces, a mempool and a miner that
+seals a block every `block_time` seconds (or on every tx when it is 0).
+The base fee follows the EIP-1559 update rule against `congestion`, the share
+of each block filled by simulated outside traffic, and `faults` injects the
+send errors `Wallet.send_tx` handles: underpriced, nonce_too_low,
+already_known and rate_limited.
+
+Besides Multicall3 balance reads it runs two contract stubs: an ERC20 at
+`TOKEN_ADDRESS` (balanceOf, decimals, symbol, allowance, transfer, approve)
+and Disperse at `DISPERSE_ADDRESS` (disperseEther, disperseToken). A call
+that would revert on chain is mined with status 0.
+"""
+
+BLOCK_GAS_LIMIT = 30_000_000
+PRIORITY_FEE = 10**8
+TRANSFER_GAS = 21_000
+AGGREGATE3 = bytes.fromhex("82ad56cb")
+GET_ETH_BALANCE = bytes.fromhex("4d2301cc")
+
+TOKEN_ADDRESS = "0x" + "70" * 20
+TOKEN_DECIMALS = 18
+TOKEN_SYMBOL = "SIM"
+BALANCE_OF = keccak(text="balanceOf(address)")[:4]
+DECIMALS = keccak(text="decimals()")[:4]
+SYMBOL = keccak(text="symbol()")[:4]
+ALLOWANCE = keccak(text="allowance(address,address)")[:4]
+TRANSFER = keccak(text="transfer(address,uint256)")[:4]
+APPROVE = keccak(text="approve(address,uint256)")[:4]
+DISPERSE_ETHER = keccak(text="disperseEther(address[],uint256[])")[:4]
+DISPERSE_TOKEN = keccak(text="disperseToken(address,address[],uint256[])")[:4]
+CONTRACTS = {MULTICALL3_ADDRESS.lower(), DISPERSE_ADDRESS.lower(), TOKEN_ADDRESS}
+
+FAULTS = {
+    "underpriced": RPCError("replacement transaction underpriced"),
+    "nonce_too_low": RPCError("nonce too low"),
+    "already_known": RPCError("already known"),
+    "rate_limited": RPCError("rate limit exceeded", code=-32005),
+}
+
+
+def decode_raw_tx(raw: bytes) -> dict:
+    if raw[0] <= 0x7F:
+        tx = TypedTransaction.from_bytes(HexBytes(raw)).as_dict()
+    else:
+        tx = rlp.decode(raw, Transaction).as_dict()
+
+    tx["from"] = Account.recover_transaction(raw).lower()
+    tx["to"] = "0x" + bytes(tx["to"]).hex() if tx["to"] else None
+    tx["hash"] = "0x" + keccak(raw).hex()
+    tx["maxFeePerGas"] = tx.get("maxFeePerGas", tx.get("gasPrice"))
+    tx["maxPriorityFeePerGas"] = tx.get("maxPriorityFeePerGas", tx["maxFeePerGas"])
+    return tx
+
+
+class EVMSimulator(MockRPC):
+    def __init__(
+        self,
+        block_time: float = 0.1,
+        congestion: float = 0.5,
+        faults: dict[str, float] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.block_time = block_time
+        self.congestion = congestion
+        self.faults = faults or {}
+
+        self.balances: dict[str, int] = {}
+        self.token_balances: dict[str, int] = {}
+        self.allowances: dict[tuple[str, str], int] = {}  # (owner, spender)
+        self.nonces: dict[str, int] = {}
+        self.pending: dict[str, dict[int, dict]] = {}  # sender -> nonce -> tx
+        self.txs: dict[str, dict] = {}
+        self.receipts: dict[str, dict] = {}
+        self.blocks = [self.new_block(0, GAS_PRICE, 0, [])]
+
+        self.submitted = 0
+        self.mined = 0
+        self.rejected: dict[str, int] = {}
+
+        self._chain_lock = threading.RLock()
+        self._stop = threading.Event()
+        self.miner = threading.Thread(target=self._mine_forever, daemon=True)
+
+    def __enter__(self):
+        super().__enter__()
+        if self.block_time:
+            self.miner.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        super().__exit__(*exc)
+
+    def fund(self, address: str, value: int):
+        with self._chain_lock:
+            self.balances[address.lower()] = value
+
+    def fund_token(self, address: str, value: int):
+        with self._chain_lock:
+            self.token_balances[address.lower()] = value
+
+    @property
+    def head(self) -> dict:
+        return self.blocks[-1]
+
+    def next_base_fee(self) -> int:
+        block = self.head
+        target = BLOCK_GAS_LIMIT // 2
+        delta = block["baseFee"] * (block["gasUsed"] - target) // target // 8
+        return max(1, block["baseFee"] + delta)
+
+    @staticmethod
+    def new_block(number: int, base_fee: int, gas_used: int, txs: list) -> dict:
+        return {
+            "number": number,
+            "hash": "0x" + keccak(number.to_bytes(32, "big")).hex(),
+            "baseFee": base_fee,
+            "gasUsed": gas_used,
+            "transactions": txs,
+        }
+
+    def _mine_forever(self):
+        while not self._stop.wait(self.block_time):
+            self.mine()
+
+    def mine(self):
+        """
+        Seal a block with every executable pending tx that pays the base fee.
+        """
+        with self._chain_lock:
+            number = self.head["number"] + 1
+            base_fee = self.next_base_fee()
+            gas_used = int(BLOCK_GAS_LIMIT * self.congestion)
+            included = []
+
+            for sender, queue in self.pending.items():
+                nonce = self.nonces.get(sender, 0)
+                while nonce in queue:
+                    tx = queue[nonce]
+                    if tx["maxFeePerGas"] < base_fee:
+                        break
+                    if gas_used + tx["gas"] > BLOCK_GAS_LIMIT:
+                        break
+                    del queue[nonce]
+                    gas_used += self.execute(tx, base_fee, number, len(included))
+                    included.append(tx["hash"])
+                    nonce += 1
+
+            self.pending = {
+                sender: queue for sender, queue in self.pending.items() if queue
+            }
+            self.blocks.append(
+                self.new_block(
+                    number, base_fee, min(gas_used, BLOCK_GAS_LIMIT), included
+                )
+            )
+            self.mined += len(included)
+
+    @staticmethod
+    def gas_of(data: bytes) -> int:
+        """
+        Gas a call uses: a flat cost, plus 30k per Disperse recipient.
+        """
+        if not data:
+            return TRANSFER_GAS
+        if data[:4] == DISPERSE_ETHER:
+            recipients, _ = decode(["address[]", "uint256[]"], data[4:])
+        elif data[:4] == DISPERSE_TOKEN:
+            _, recipients, _ = decode(["address", "address[]", "uint256[]"], data[4:])
+        else:
+            return 60_000
+        return 50_000 + 30_000 * len(recipients)
+
+    def credit(self, balances: dict, address: str, value: int):
+        balances[address.lower()] = balances.get(address.lower(), 0) + value
+
+    def apply(self, tx: dict) -> bool:
+        """
+        Move the tx's value and run its contract call; False means it reverts.
+        """
+        sender, to, value = tx["from"], tx["to"], tx["value"]
+        data = bytes(tx["data"])
+        selector, args = data[:4], data[4:]
+
+        if to == DISPERSE_ADDRESS.lower() and selector == DISPERSE_ETHER:
+            recipients, values = decode(["address[]", "uint256[]"], args)
+            if len(recipients) != len(values) or sum(values) != value:
+                return False
+            self.balances[sender] -= value
+            for recipient, amount in zip(recipients, values):
+                self.credit(self.balances, recipient, amount)
+            return True
+
+        if to == DISPERSE_ADDRESS.lower() and selector == DISPERSE_TOKEN:
+            token, recipients, values = decode(
+                ["address", "address[]", "uint256[]"], args
+            )
+            total, spender = sum(values), (sender, to)
+            if (
+                value
+                or token.lower() != TOKEN_ADDRESS
+                or self.allowances.get(spender, 0) < total
+                or self.token_balances.get(sender, 0) < total
+            ):
+                return False
+            self.allowances[spender] -= total
+            self.token_balances[sender] -= total
+            for recipient, amount in zip(recipients, values):
+                self.credit(self.token_balances, recipient, amount)
+            return True
+
+        if to == TOKEN_ADDRESS and selector in (TRANSFER, APPROVE):
+            other, amount = decode(["address", "uint256"], args)
+            if value:
+                return False
+            if selector == APPROVE:
+                self.allowances[(sender, other.lower())] = amount
+                return True
+            if self.token_balances.get(sender, 0) < amount:
+                return False
+            self.token_balances[sender] -= amount
+            self.credit(self.token_balances, other, amount)
+            return True
+
+        # A plain transfer, or a call to a contract the simulator doesn't run
+        self.balances[sender] -= value
+        if to:
+            self.credit(self.balances, to, value)
+        return True
+
+    def execute(self, tx: dict, base_fee: int, number: int, index: int) -> int:
+        sender = tx["from"]
+        gas = min(tx["gas"], self.gas_of(bytes(tx["data"])))
+        price = min(tx["maxFeePerGas"], base_fee + tx["maxPriorityFeePerGas"])
+        cost = gas * price
+
+        status = self.balances.get(sender, 0) >= tx["value"] + cost
+        self.balances[sender] = max(0, self.balances.get(sender, 0) - cost)
+        if status:
+            status = self.apply(tx)
+        self.nonces[sender] = tx["nonce"] + 1
+
+        tx["blockNumber"] = number
+        self.receipts[tx["hash"]] = {
+            "transactionHash": tx["hash"],
+            "transactionIndex": hex(index),
+            "blockHash": "0x" + keccak(number.to_bytes(32, "big")).hex(),
+            "blockNumber": hex(number),
+            "from": sender,
+            "to": tx["to"],
+            "cumulativeGasUsed": hex(gas),
+            "gasUsed": hex(gas),
+            "effectiveGasPrice": hex(price),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "status": hex(int(status)),
+            "type": hex(tx.get("type", 0)),
+        }
+        return gas
+
+    def send_raw_transaction(self, raw: str) -> str:
+        tx = decode_raw_tx(bytes.fromhex(raw.removeprefix("0x")))
+        sender, nonce = tx["from"], tx["nonce"]
+
+        with self._chain_lock:
+            self.submitted += 1
+            for fault, rate in self.faults.items():
+                if random.random() < rate:
+                    if fault == "already_known":
+                        # The tx did reach the pool, e.g. via another endpoint
+                        self.add_pending(tx)
+                    return self.reject(fault)
+
+            if tx["hash"] in self.txs:
+                return self.reject("already_known")
+            if nonce < self.nonces.get(sender, 0):
+                return self.reject("nonce_too_low")
+            if tx["maxFeePerGas"] < self.next_base_fee():
+                raise self.rejection(
+                    "underpriced", "max fee per gas less than block base fee"
+                )
+            if tx["gas"] < TRANSFER_GAS:
+                raise self.rejection("intrinsic_gas", "intrinsic gas too low")
+            if (
+                self.balances.get(sender, 0)
+                < tx["value"] + tx["gas"] * tx["maxFeePerGas"]
+            ):
+                raise self.rejection(
+                    "insufficient_funds", "insufficient funds for gas * price + value"
+                )
+
+            queued = self.pending.get(sender, {}).get(nonce)
+            if queued and not (
+                tx["maxFeePerGas"] >= queued["maxFeePerGas"] * 11 // 10
+                and tx["maxPriorityFeePerGas"]
+                >= queued["maxPriorityFeePerGas"] * 11 // 10
+            ):
+                return self.reject("underpriced")
+
+            self.add_pending(tx)
+
+        if not self.block_time:
+            self.mine()
+        return tx["hash"]
+
+    def add_pending(self, tx: dict):
+        self.pending.setdefault(tx["from"], {})[tx["nonce"]] = tx
+        self.txs[tx["hash"]] = tx
+
+    def rejection(self, reason: str, message: str) -> RPCError:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return RPCError(message)
+
+    def reject(self, fault: str):
+        self.rejected[fault] = self.rejected.get(fault, 0) + 1
+        raise FAULTS[fault]
+
+    def pending_nonce(self, address: str) -> int:
+        nonce = self.nonces.get(address, 0)
+        while nonce in self.pending.get(address, {}):
+            nonce += 1
+        return nonce
+
+    def block_json(self, block: dict) -> dict:
+        return {
+            "number": hex(block["number"]),
+            "hash": block["hash"],
+            "parentHash": "0x" + "00" * 32,
+            "baseFeePerGas": hex(block["baseFee"]),
+            "gasLimit": hex(BLOCK_GAS_LIMIT),
+            "gasUsed": hex(block["gasUsed"]),
+            "timestamp": hex(block["number"]),
+            "transactions": block["transactions"],
+            "extraData": "0x",
+        }
+
+    def tx_json(self, tx: dict) -> dict:
+        number = tx.get("blockNumber")
+        return {
+            "hash": tx["hash"],
+            "from": tx["from"],
+            "to": tx["to"],
+            "nonce": hex(tx["nonce"]),
+            "value": hex(tx["value"]),
+            "gas": hex(tx["gas"]),
+            "maxFeePerGas": hex(tx["maxFeePerGas"]),
+            "maxPriorityFeePerGas": hex(tx["maxPriorityFeePerGas"]),
+            "input": "0x" + bytes(tx["data"]).hex(),
+            "blockNumber": hex(number) if number is not None else None,
+        }
+
+    def fee_history(self, count: str, newest: str, percentiles: list) -> dict:
+        newest = (
+            self.head["number"] if newest in ("latest", "pending") else int(newest, 16)
+        )
+        oldest = max(0, newest - int(count, 16) + 1)
+        blocks = self.blocks[oldest : newest + 1]
+        return {
+            "oldestBlock": hex(oldest),
+            "baseFeePerGas": [hex(b["baseFee"]) for b in blocks]
+            + [hex(self.next_base_fee())],
+            "gasUsedRatio": [b["gasUsed"] / BLOCK_GAS_LIMIT for b in blocks],
+            "reward": [[hex(PRIORITY_FEE)] * len(percentiles) for _ in blocks],
+        }
+
+    def read_token(self, data: bytes) -> bytes | None:
+        """
+        Answer an ERC20 view call, or None if the stub has no such function.
+        """
+        selector, args = data[:4], data[4:]
+        if selector == BALANCE_OF:
+            (owner,) = decode(["address"], args)
+            return encode(["uint256"], [self.token_balances.get(owner.lower(), 0)])
+        if selector == ALLOWANCE:
+            owner, spender = decode(["address", "address"], args)
+            key = (owner.lower(), spender.lower())
+            return encode(["uint256"], [self.allowances.get(key, 0)])
+        if selector == DECIMALS:
+            return encode(["uint8"], [TOKEN_DECIMALS])
+        if selector == SYMBOL:
+            return encode(["string"], [TOKEN_SYMBOL])
+        return None
+
+    def call(self, request: dict) -> str:
+        """
+        Serve ERC20 reads, directly or batched through Multicall3 `aggregate3`,
+        and `aggregate3` reads of getEthBalance.
+        """
+        to = (request.get("to") or "").lower()
+        data = bytes.fromhex(request.get("data", request.get("input", "0x"))[2:])
+        if to == TOKEN_ADDRESS and (result := self.read_token(data)) is not None:
+            return "0x" + result.hex()
+        if to != MULTICALL3_ADDRESS.lower() or data[:4] != AGGREGATE3:
+            raise RPCError("execution reverted")
+
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+        results = []
+        for target, _, call_data in calls:
+            if call_data[:4] == GET_ETH_BALANCE:
+                address = "0x" + call_data[16:36].hex()
+                balance = self.balances.get(address, 0)
+                results.append((True, balance.to_bytes(32, "big")))
+            elif target.lower() == TOKEN_ADDRESS and self.read_token(call_data):
+                results.append((True, self.read_token(call_data)))
+            else:
+                results.append((False, b""))
+        return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+
+    def handle_call(self, method: str, params: list):
+        with self._chain_lock:
+            if method == "eth_chainId":
+                return hex(CHAIN_ID)
+            if method == "eth_blockNumber":
+                return hex(self.head["number"])
+            if method == "eth_gasPrice":
+                return hex(self.next_base_fee() + PRIORITY_FEE)
+            if method == "eth_maxPriorityFeePerGas":
+                return hex(PRIORITY_FEE)
+            if method == "eth_feeHistory":
+                return self.fee_history(*params)
+            if method == "eth_getBalance":
+                return hex(self.balances.get(params[0].lower(), 0))
+            if method == "eth_getTransactionCount":
+                address = params[0].lower()
+                if len(params) > 1 and params[1] == "pending":
+                    return hex(self.pending_nonce(address))
+                return hex(self.nonces.get(address, 0))
+            if method == "eth_getCode":
+                return "0x01" if params[0].lower() in CONTRACTS else "0x"
+            if method == "eth_estimateGas":
+                tx = params[0]
+                value = int(tx.get("value", "0x0"), 16)
+                if value > self.balances.get(tx.get("from", "").lower(), 0):
+                    raise RPCError("insufficient funds for transfer")
+                data = tx.get("data", tx.get("input", "0x"))
+                return hex(self.gas_of(bytes.fromhex(data[2:])))
+            if method == "eth_call":
+                return self.call(params[0])
+            if method == "eth_getBlockByNumber":
+                tag = params[0]
+                if tag in ("latest", "pending", "safe", "finalized"):
+                    return self.block_json(self.head)
+                number = int(tag, 16)
+                if number < len(self.blocks):
+                    return self.block_json(self.blocks[number])
+                return None
+            if method == "eth_getTransactionReceipt":
+                return self.receipts.get(params[0].lower())
+            if method == "eth_getTransactionByHash":
+                tx = self.txs.get(params[0].lower())
+                return tx and self.tx_json(tx)
+
+        if method == "eth_sendRawTransaction":
+            return self.send_raw_transaction(params[0])
+        raise ValueError(f"method {method} not supported")
@@ -0,0 +1,155 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Minimal local JSON-RPC server for offline benchmarks.
+
+Answers the read-only calls a Wallet makes with static values and keeps
+counters of requests and TCP connections, so provider and batching changes
+can be measured without a live node.
+"""
+
+CHAIN_ID = 1337
+GAS_PRICE = 10**9
+
+
+class RPCError(ValueError):
+    """
+    JSON-RPC error returned to the client, e.g. a rejected tx (-32000).
+    """
+
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
+
+
+class MockRPC:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate  # share of requests answered with HTTP 500
+        self.throttle_rate = throttle_rate  # share answered with HTTP 429
+        self.requests = 0
+        self.faulted = 0  # requests answered with a 429 or 500
+        self.connections = 0
+        self.methods: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.faulted = 0
+            self.connections = 0
+            self.methods.clear()
+
+    def handle_call(self, method: str, params: list):
+        if method == "eth_chainId":
+            return hex(CHAIN_ID)
+        if method == "eth_blockNumber":
+            return "0x1"
+        if method in ("eth_gasPrice", "eth_maxPriorityFeePerGas"):
+            return hex(GAS_PRICE)
+        if method in ("eth_getBalance", "eth_getTransactionCount"):
+            return "0x0"
+        if method == "eth_estimateGas":
+            return hex(21000)
+        if method == "eth_getBlockByNumber":
+            return {
+                "number": "0x1",
+                "hash": "0x" + "00" * 32,
+                "parentHash": "0x" + "00" * 32,
+                "baseFeePerGas": hex(GAS_PRICE),
+                "gasLimit": hex(30_000_000),
+                "gasUsed": "0x0",
+                "timestamp": hex(int(time.time())),
+                "transactions": [],
+                "extraData": "0x",
+            }
+        raise ValueError(f"method {method} not supported")
+
+    def _dispatch(self, payload: dict) -> dict:
+        method = payload.get("method")
+        with self._lock:
+            self.requests += 1
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+        response = {"jsonrpc": "2.0", "id": payload.get("id")}
+        try:
+            response["result"] = self.handle_call(method, payload.get("params", []))
+        except ValueError as err:
+            code = getattr(err, "code", -32601)
+            response["error"] = {"code": code, "message": str(err)}
+        return response
+
+    def _handler(self):
+        rpc = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with rpc._lock:
+                    rpc.connections += 1
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+
+                if rpc.latency:
+                    time.sleep(rpc.latency)
+
+                fault = random.random()
+                if fault < rpc.throttle_rate + rpc.error_rate:
+                    with rpc._lock:
+                        rpc.faulted += 1
+                if fault < rpc.throttle_rate:
+                    return self.reply(429, b"Too Many Requests")
+                if fault < rpc.throttle_rate + rpc.error_rate:
+                    return self.reply(500, b"Internal Server Error")
+
+                if isinstance(payload, list):
+                    body = [rpc._dispatch(item) for item in payload]
+                else:
+                    body = rpc._dispatch(payload)
+
+                self.reply(200, json.dumps(body).encode())
+
+            def reply(self, status: int, data: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -1,10 +1,11 @@
-from models.network import Network
+import os
 
-with open("keys.txt") as file:
-    KEYS = [row.strip() for row in file]
+from models.network import Network
 
-with open("recipients.txt") as file:
-    RECIPIENTS = [row.strip() for row in file]
+ABI_DIR = os.path.join(os.path.dirname(__file__), "abi")  # found from any cwd
+KEYS_FILE = "keys.txt"
+MNEMONICS_FILE = "mnemonics.txt"
+RECIPIENTS_FILE = "recipients.txt"
 
 ethereum = Network(
     name="ethereum",
@@ -12,6 +13,10 @@ ethereum = Network(
     explorer="https://etherscan.io",
     eip_1559=True,
     native_token="ETH",
+    rpc_urls=[
+        "https://ethereum-rpc.publicnode.com",
+        "https://eth.llamarpc.com",
+    ],
 )
 
 sepolia = Network(
@@ -20,6 +25,9 @@ sepolia = Network(
     explorer="https://sepolia.etherscan.io/",
     eip_1559=True,
     native_token="ETH",
+    rpc_urls=[
+        "https://ethereum-sepolia-rpc.publicnode.com",
+    ],
 )
 
 linea = Network(
@@ -28,6 +36,9 @@ linea = Network(
     explorer="https://lineascan.build",
     eip_1559=True,
     native_token="ETH",
+    rpc_urls=[
+        "https://linea-rpc.publicnode.com",
+    ],
 )
 
 arbitrum = Network(
@@ -36,6 +47,10 @@ arbitrum = Network(
     explorer="https://arbiscan.io",
     eip_1559=True,
     native_token="ETH",
+    rpc_urls=[
+        "https://arb1.arbitrum.io/rpc",
+        "https://arbitrum-one-rpc.publicnode.com",
+    ],
 )
 
 optimism = Network(
@@ -44,6 +59,11 @@ optimism = Network(
     explorer="https://optimistic.etherscan.io",
     eip_1559=True,
     native_token="ETH",
+    op_stack=True,
+    rpc_urls=[
+        "https://mainnet.optimism.io",
+        "https://optimism-rpc.publicnode.com",
+    ],
 )
 
 base = Network(
@@ -52,6 +72,10 @@ base = Network(
     explorer="https://basescan.org",
     eip_1559=True,
     native_token="ETH",
+    op_stack=True,
+    rpc_urls=[
+        "https://base-rpc.publicnode.com",
+    ],
 )
 
 bsc = Network(
@@ -60,6 +84,10 @@ bsc = Network(
     explorer="https://bscscan.com",
     eip_1559=False,
     native_token="BNB",
+    rpc_urls=[
+        "https://bsc-dataseed.bnbchain.org",
+        "https://bsc-rpc.publicnode.com",
+    ],
 )
 
 opbnb = Network(
@@ -68,6 +96,10 @@ opbnb = Network(
     explorer="https://opbnbscan.com",
     eip_1559=False,
     native_token="BNB",
+    op_stack=True,
+    rpc_urls=[
+        "https://opbnb-rpc.publicnode.com",
+    ],
 )
 
 CHAIN_MAPPING = {
@@ -80,3 +112,9 @@ CHAIN_MAPPING = {
     "bsc": bsc,
     "opbnb": opbnb,
 }
+
+# Multicall3 is deployed at the same address on every supported chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Disperse (disperse.app) is deployed at this address on most EVM chains
+DISPERSE_ADDRESS = "0xD152f549545093347A162Dce210e7293f1452150"
@@ -1,62 +1,218 @@
+import argparse
+from itertools import islice
+
 import settings
-from data.const import KEYS, RECIPIENTS
 from models.transfer import *
+from modules import cache
+from modules.amounts import gas_reserve, plan_range, to_units
 from modules.logger import logger
+from modules.metrics import metrics
+from modules.multichain import run_chains, selected_chains
+from modules.plan import load_plan, shard_range
 from modules.questionary import get_user_input
-from modules.utils import divide_amounts_evenly, sleep
-from modules.wallet import Wallet
+from modules.sources import (
+    InputError,
+    count_pairs,
+    first,
+    iter_keys,
+    iter_pairs,
+    keys_file,
+)
+from modules.utils import divide_amounts_evenly, pace, stopping
+
+"""
+Entry point. Only the prompt's dependencies are imported at startup; web3,
+eth_account and the engines are imported once the transfer is confirmed
+(see benchmarks/bench_startup.py).
+"""
 
 
 def process_wallets(params: dict):
+    from modules.journal import open_journal
+    from modules.scanner import filter_funded
+
     transfer = Transfer(**params)  # config object holding transfer params
 
-    # PART 1: build a list of (sender, recipient) pairs
-    if transfer.action == "collect":
-        # Multiple senders -> one recipient
-        pairs = [(key, RECIPIENTS[0]) for key in KEYS]
-        total = len(KEYS)
-    elif transfer.action == "dispense":
-        # One sender -> multiple recipients
-        pairs = [(KEYS[0], recipient) for recipient in RECIPIENTS]
-        total = len(RECIPIENTS)
-        # Equal number of senders & recipients
-    elif transfer.action == "one-to-one":
-        pairs = [(key, recipient) for key, recipient in zip(KEYS, RECIPIENTS)]
-        total = len(KEYS)
-
-    # PART 2: build a list of values for even amounts
-    chunked_amounts = []
-    if transfer.action == "dispense" and transfer.amount == "even":
-        dispensor = Wallet(KEYS[0], "[0/1]", transfer.chain)
-
-        balance = (
-            dispensor.get_balance()
-            if transfer.token == "ETH"
-            else dispensor.get_balance(settings.TOKEN_ADDRESS)
-        )
+    # PART 1: stream (sender, recipient) pairs straight from the input files
+    pairs = iter_pairs(transfer.action)
+    total = count_pairs(transfer.action)
+
+    # Keep only this worker's slice of the pairs, numbered as in the full run
+    start = 0
+    if transfer.shard:
+        start, stop = shard_range(total, transfer.shard)
+        pairs = islice(pairs, start, stop)
+        logger.info(f"Shard {transfer.shard[0]}: pairs {start + 1}-{stop} of {total}")
 
-        chunked_amounts = divide_amounts_evenly(balance, total + 1)
+    # PART 2: plan every amount up front, in exact integer units
+    planned_amounts = plan_amounts(transfer, total)
 
     # PART 3: execute the main loop
-    for index, (sender, recipient) in enumerate(pairs, start=1):
-        counter = f"[{index}/{total}]"
-        wallet = Wallet(sender, counter, transfer.chain)
+    jobs = iter_jobs(transfer, pairs, planned_amounts, start)
+
+    # Skip empty wallets with Multicall3 scans instead of one RPC per key; the
+    # funded jobs keep their numbering, so labels still count the full run
+    if transfer.action == "collect" and settings.SCAN_BALANCES:
+        jobs = filter_funded(transfer, jobs)
+
+    journal = open_journal(transfer) if settings.JOURNAL else None
+
+    try:
+        if transfer.action == "disperse":
+            from modules.disperse import disperse
+
+            disperse(transfer, jobs, total, journal)
+        elif transfer.action == "dispense" and settings.PIPELINE:
+            from modules.pipeline import dispense_pipelined
+
+            dispense_pipelined(transfer, jobs, total, journal)
+        elif settings.ENGINE == "async":
+            from modules.engine import process_concurrently
+
+            process_concurrently(transfer, jobs, total, journal)
+        elif settings.ENGINE == "presign":
+            from modules.signer import presign_and_broadcast
+
+            presign_and_broadcast(transfer, jobs, total, journal)
+        else:
+            process_sequentially(transfer, jobs, total, journal)
+    finally:
+        # Runs on Ctrl+C too, so everything recorded so far hits the disk
+        if journal:
+            journal.close()
+
+    # Archive only a finished run; otherwise the next run resumes from it
+    if journal and journal.complete() and not stopping.is_set():
+        journal.finish()
+    elif journal:
+        logger.warning(f"Some pairs are unfinished, {journal.path} kept for resume")
+
+
+def plan_amounts(transfer: Transfer, total: int) -> list[int]:
+    """
+    Draw even splits and [min, max] ranges for the whole run in one pass.
+
+    An even split cuts the balance into one share more than there are pairs
+    and leaves the spare share with the sender. For native transfers the gas
+    the run will pay is taken off the balance first.
+    """
+    from modules.disperse import GAS_PER_RECIPIENT
+    from modules.wallet import Wallet
+
+    is_range = isinstance(transfer.amount, list)
+    if transfer.amount != "even" and not is_range:
+        return []
+
+    wallet = Wallet(first(iter_keys(), keys_file()), "[0/1]", transfer.chain)
+    is_token = transfer.token == "ERC20"
+
+    if is_range:
+        decimals = (
+            wallet.get_token_metadata(settings.TOKEN_ADDRESS)["decimals"]
+            if is_token
+            else 18
+        )
+        low, high = (to_units(value, decimals) for value in transfer.amount)
+        return plan_range(total, low, high)
+
+    if is_token:
+        balance, reserve = wallet.get_balance(settings.TOKEN_ADDRESS), 0
+    else:
+        # Keep back what the transfers themselves will cost in gas
+        gas_per_tx = (
+            GAS_PER_RECIPIENT["native"] if transfer.action == "disperse" else 21_000
+        )
+        balance = wallet.get_balance()
+        reserve = gas_reserve(transfer.chain, total, gas_per_tx)
+
+    return divide_amounts_evenly(balance, total + 1, reserve=reserve)[:total]
+
+
+def iter_jobs(transfer: Transfer, pairs, planned_amounts: list, start: int = 0):
+    for index, (sender, recipient) in enumerate(pairs, start=start + 1):
+        if stopping.is_set():
+            return
 
         #  Determine the actual amount for each iteration
-        if transfer.action == "dispense" and transfer.amount == "even":
-            actual_amount = chunked_amounts[index - 1]
+        if recipient in transfer.overrides:
+            actual_amount = transfer.overrides[recipient]
+        elif planned_amounts:
+            actual_amount = planned_amounts[index - 1]
         else:
             actual_amount = transfer.amount
 
+        yield index, sender, recipient, actual_amount
+
+
+def process_sequentially(transfer: Transfer, jobs, total: int, journal=None):
+    from modules.journal import attach
+    from modules.preflight import iter_prefetched
+    from modules.provider import get_web3
+    from modules.wallet import Wallet
+
+    w3 = get_web3(transfer.chain)
+    for job, prefetched in iter_prefetched(w3, transfer, jobs):
+        index, sender, recipient, actual_amount = job
+        counter = f"[{index}/{total}]"
+        wallet = Wallet(sender, counter, transfer.chain, index)
+        wallet.use_prefetched(prefetched)
+
+        if journal:
+            actual_amount = attach(journal, wallet, recipient, actual_amount)
+            if actual_amount is None:
+                continue
+
         tx_status = wallet.transfer(transfer.token, actual_amount, recipient)
+        wallet.record("confirmed" if tx_status else "failed")
 
         if tx_status and index < total:
-            sleep(*settings.SLEEP_BETWEEN_ACTIONS)
+            pace()
 
 
 def main():
-    transfer_params = get_user_input()
-    process_wallets(transfer_params)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["scan"],
+        help="scan: report the balances of every key and write the funded ones",
+    )
+    parser.add_argument("--plan", help="run headless from a JSON/JSONL plan file")
+    parser.add_argument("--shard", help="i/n: run only the i-th of n slices of a plan")
+    args = parser.parse_args()
+
+    if args.shard and not args.plan:
+        parser.error("--shard requires --plan")
+
+    if args.command == "scan":
+        from modules.scanner import scan
+
+        if args.plan:
+            load_plan(args.plan)  # scan the plan's chains and token
+        logger.info(f"Balance scan\n{scan(selected_chains())}")
+        return
+
+    if args.plan:
+        transfer_params = load_plan(args.plan, args.shard)
+        logger.info(
+            f"Plan {args.plan}: {transfer_params['action']} "
+            f"{transfer_params['token']} on {', '.join(settings.CHAINS)}"
+        )
+    else:
+        transfer_params = get_user_input()
+
+    chains = selected_chains()
+    try:
+        if len(chains) > 1:
+            logger.info(run_chains(process_wallets, transfer_params, chains))
+        else:
+            process_wallets(transfer_params)
+    finally:
+        # Interrupted runs are the ones worth profiling, so always report
+        logger.info(cache.summary())
+        if settings.METRICS:
+            path = metrics.write()
+            logger.info(f"Metrics written to {path}\n{metrics.summary()}")
 
 
 if __name__ == "__main__":
@@ -66,3 +222,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.warning("Cancelled by the user")
         exit(0)
+    except InputError as err:
+        logger.error(err)
+        exit(1)
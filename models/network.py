@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -8,3 +8,9 @@ class Network:
     explorer: str
     eip_1559: bool
     native_token: str
+    op_stack: bool = False  # charges an L1 data fee on top of L2 gas
+    rpc_urls: list[str] = field(default_factory=list)  # fallback endpoints
+
+    @property
+    def endpoints(self) -> list[str]:
+        return list(dict.fromkeys([self.rpc_url, *self.rpc_urls]))
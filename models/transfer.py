@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from models.network import Network
 
@@ -9,3 +9,5 @@ class Transfer:
     token: str
     amount: str | list
     chain: Network
+    overrides: dict = field(default_factory=dict)  # recipient -> amount
+    shard: tuple[int, int] = None  # (index, count), see modules/plan.py
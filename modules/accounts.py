@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+Private key -> address derivation, cached per process.
+
+Deriving an address costs an elliptic-curve multiplication, and the same key
+is looked up by the balance scan, the pre-flight batch and its Wallet. Large
+key sets can be derived up front across all cores with `derive_addresses`.
+
+The cache only needs to span the few chunks of keys in flight at once, so it
+keeps the `ADDRESS_CACHE_SIZE` most recently used keys and memory stays flat
+however many wallets a run goes through. An evicted key is derived again.
+"""
+
+ADDRESS_CACHE_SIZE = 50_000  # Keys whose address is kept, a few chunks' worth
+
+_addresses: OrderedDict[str, str] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _derive(private_key: str) -> str:
+    from eth_account import Account
+
+    return Account.from_key(private_key).address
+
+
+def _cached(private_key: str) -> str | None:
+    with _lock:
+        address = _addresses.get(private_key)
+        if address is not None:
+            _addresses.move_to_end(private_key)
+        return address
+
+
+def cache_addresses(keys: list[str], addresses: list[str]):
+    """
+    Remember addresses already known for these keys, e.g. from the HD index.
+    """
+    with _lock:
+        for key, address in zip(keys, addresses):
+            _addresses[key] = address
+            _addresses.move_to_end(key)
+        while len(_addresses) > ADDRESS_CACHE_SIZE:
+            _addresses.popitem(last=False)
+
+
+def address_of(private_key: str) -> str:
+    address = _cached(private_key)
+    if address is None:
+        address = _derive(private_key)
+        cache_addresses([private_key], [address])
+    return address
+
+
+def derive_addresses(keys: list[str], workers: int = None) -> list[str]:
+    """
+    Derive addresses for many keys in parallel and cache them.
+    """
+    known = {key: _cached(key) for key in dict.fromkeys(keys)}
+    missing = [key for key, address in known.items() if address is None]
+
+    if len(missing) >= 1000:
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(missing) // (workers * 4))
+            derived = list(executor.map(_derive, missing, chunksize=chunksize))
+    else:
+        derived = [_derive(key) for key in missing]
+
+    known.update(zip(missing, derived))
+    cache_addresses(missing, derived)
+    return [known[key] for key in keys]
@@ -0,0 +1,100 @@
+import random
+from decimal import Decimal
+
+import settings
+from modules.sources import InputError
+
+"""
+Exact-integer amount planning.
+
+Every per-recipient amount is drawn up front in integer units (wei), so
+splits sum exactly to their target with no float rounding. Runs can be made
+reproducible with `AMOUNT_SEED`, which also lets every shard of a plan draw
+the same amounts.
+"""
+
+PPM = 1_000_000
+
+_rng: random.Random = None
+
+
+def to_units(value: float | str, decimals: int) -> int:
+    """
+    Convert a human-readable amount to integer units without float rounding.
+    """
+    return int(Decimal(str(value)).scaleb(decimals))
+
+
+def new_rng() -> random.Random:
+    return random.Random(settings.AMOUNT_SEED)
+
+
+def draw(amount: int | list[float], decimals: int) -> int:
+    """
+    Return an exact amount, drawing one from a [min, max] range if needed.
+    """
+    global _rng
+    if isinstance(amount, int):
+        return amount
+    if _rng is None:
+        _rng = new_rng()
+    return _rng.randint(*(to_units(value, decimals) for value in amount))
+
+
+def plan_even(
+    total: int,
+    count: int,
+    variance: float = None,
+    reserve: int = 0,
+    rng: random.Random = None,
+) -> list[int]:
+    """
+    Split `total - reserve` into `count` amounts within +-variance of the mean.
+
+    Offsets are drawn in +d/-d pairs that cancel exactly, then the integer
+    remainder is spread one unit at a time, so the sum is always exact.
+    """
+    if count <= 0:
+        return []
+
+    budget = total - reserve
+    if budget < count:
+        raise InputError(
+            f"Balance too low: cannot split {budget} units into {count} non-zero amounts"
+        )
+
+    variance = settings.VARIANCE if variance is None else variance
+    rng = rng or new_rng()
+
+    average, remainder = divmod(budget, count)
+    spread = average * round(variance * PPM) // PPM
+
+    offsets = [rng.randint(0, spread) for _ in range(count // 2)]
+    amounts = [average + offset for offset in offsets]
+    amounts += [average - offset for offset in offsets]
+    if count % 2:
+        amounts.append(average)
+    rng.shuffle(amounts)
+
+    for index in rng.sample(range(count), remainder):
+        amounts[index] += 1
+
+    return amounts
+
+
+def plan_range(count: int, low: int, high: int, rng: random.Random = None) -> list[int]:
+    """
+    Draw `count` integer amounts uniformly from [low, high].
+    """
+    rng = rng or new_rng()
+    return [rng.randint(low, high) for _ in range(count)]
+
+
+def gas_reserve(chain, txs: int, gas_per_tx: int = 21_000) -> int:
+    """
+    Native cost of `txs` transactions at the current max fee.
+    """
+    from modules.gas import get_gas_oracle
+
+    fees = get_gas_oracle(chain).fees()
+    return txs * gas_per_tx * fees.get("maxFeePerGas", fees.get("gasPrice"))
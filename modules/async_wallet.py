@@ -0,0 +1,370 @@
+import asyncio
+import time
+
+from eth_account import Account
+from web3 import AsyncWeb3
+from web3.contract import AsyncContract
+
+import settings
+from models.network import Network
+from modules import cache
+from modules.accounts import address_of
+from modules.amounts import draw
+from modules.cache import chain_key, token_key
+from modules.fees import TRANSFER_GAS, get_fee_estimator
+from modules.gas import get_gas_oracle
+from modules.journal import JournalEntry
+from modules.logger import logger
+from modules.metrics import metrics
+from modules.nonce import NonceManager
+from modules.ratelimit import backoff_delay
+from modules.receipts import get_receipt_watcher
+from modules.scheduler import get_scheduler
+from modules.state import get_wallet_table
+from modules.utils import truncate
+from modules.wallet import classify_error, get_erc20_abi
+
+"""
+asyncio counterpart of `Wallet`, used by the concurrent engine.
+
+Mirrors the sync transfer flow call for call so both engines pick the same
+amounts, gas settings and retry behaviour.
+"""
+
+
+class AsyncWallet:
+    __slots__ = (
+        "private_key",
+        "address",
+        "counter",
+        "chain",
+        "table",
+        "row",
+        "w3",
+        "nonces",
+        "prefetched",
+        "journal",
+        "sweep_balance",
+    )
+
+    def __init__(
+        self,
+        private_key: str,
+        counter: str,
+        chain: Network,
+        w3: AsyncWeb3,
+        key_ref: int = -1,
+    ):
+        # No LocalAccount per wallet: the address comes from the shared cache
+        self.private_key = private_key
+        self.address = address_of(private_key)
+        self.counter = counter
+
+        self.chain = chain
+        self.table = get_wallet_table(chain)
+        self.row = self.table.row(self.address, key_ref)
+        self.w3 = w3
+        # Shares the sync engine's counters; its own RPC calls use the sync clients
+        self.nonces = NonceManager(self.table.clients.w3, self.address, self.table)
+        self.prefetched: dict = {}  # only "replace_nonce", set by journal.attach
+        self.journal: JournalEntry = None
+        self.sweep_balance: int = None
+
+    def __str__(self):
+        return f"AsyncWallet(address={self.address})"
+
+    @property
+    def label(self) -> str:
+        return f"{self.counter} {self.address} |"
+
+    def record(self, state: str, **fields):
+        self.table.set_status(self.row, state)
+        if self.journal:
+            self.journal.record(state, **fields)
+
+    def get_contract(self, address: str, abi: list[dict] = None) -> AsyncContract:
+        contract_address = self.w3.to_checksum_address(address)
+        if not abi:
+            abi = get_erc20_abi()
+
+        return self.w3.eth.contract(address=contract_address, abi=abi)
+
+    async def get_balance(self, token_addr: str = None) -> int:
+        if token_addr is None:
+            balance = await self.w3.eth.get_balance(self.address)
+            self.table.balances[self.row] = balance
+            return balance
+        else:
+            token = self.get_contract(token_addr)
+            return await token.functions.balanceOf(self.address).call()
+
+    async def get_token(self, token_addr: str):
+        token = self.get_contract(token_addr)
+        key = token_key(self.chain.name, token.address)
+
+        metadata = cache.metadata.get(key)
+        if metadata:
+            balance = await token.functions.balanceOf(self.address).call()
+            return balance, metadata["decimals"], metadata["symbol"]
+
+        balance, decimals, symbol = await asyncio.gather(
+            token.functions.balanceOf(self.address).call(),
+            token.functions.decimals().call(),
+            token.functions.symbol().call(),
+        )
+        cache.metadata.set(key, {"decimals": decimals, "symbol": symbol})
+        return balance, decimals, symbol
+
+    async def get_chain_id(self) -> int:
+        key = chain_key(self.chain.name)
+
+        chain_id = cache.metadata.get(key)
+        if chain_id is None:
+            chain_id = await self.w3.eth.chain_id
+            cache.metadata.set(key, chain_id)
+        return chain_id
+
+    async def get_nonce(self) -> int:
+        if "replace_nonce" in self.prefetched:
+            # A pair resumed from the journal replaces its unconfirmed tx
+            return self.prefetched.pop("replace_nonce")
+        if self.nonces.next_nonce is None:
+            # Sync the counter here so allocate() never blocks the event loop
+            pending = await self.w3.eth.get_transaction_count(self.address, "pending")
+            self.nonces.seed(pending)
+        return self.nonces.allocate()
+
+    async def get_tx_data(self, value: int = 0, **kwargs):
+        # Oracle fees keep build_transaction from looking up its own; the
+        # nonce is taken in send_tx, so a transfer dropped while building
+        # never holds one
+        chain_id, fees = await asyncio.gather(
+            self.get_chain_id(),
+            asyncio.to_thread(get_gas_oracle(self.chain).fees),
+        )
+        return {
+            "chainId": chain_id,
+            "from": self.address,
+            "value": value,
+            **fees,
+            **kwargs,
+        }
+
+    async def get_gas(self, tx: dict, gwei_multiplier: float = 1.2) -> dict:
+        with metrics.phase("gas"):
+            # The oracle is shared with the sync engine and polls once per block
+            oracle = get_gas_oracle(self.chain)
+            tx.update(await asyncio.to_thread(oracle.fees, gwei_multiplier))
+
+            if not tx.get("gas"):
+                tx["gas"] = await self.w3.eth.estimate_gas(tx)
+
+        return tx
+
+    async def send_tx(
+        self,
+        tx: dict,
+        tx_label: str = "",
+        gwei_multiplier: float = 1.2,
+        gwei_increment: float = 0.5,
+        retry_count: int = 0,
+        max_retry: int = 5,
+        delay: float = 3,
+    ):
+        # A pair resumed from the journal replaces its unconfirmed tx, which
+        # already went out with that nonce
+        broadcast = "nonce" not in tx and "replace_nonce" in self.prefetched
+        if "nonce" not in tx:
+            tx["nonce"] = await self.get_nonce()
+
+        while retry_count < max_retry:
+            try:
+                scheduler = get_scheduler(self.chain)
+                if scheduler.enabled:
+                    await asyncio.to_thread(scheduler.hold)
+                tx = await self.get_gas(tx, gwei_multiplier)
+                if self.sweep_balance is not None:
+                    cost = await asyncio.to_thread(
+                        get_fee_estimator(self.chain).cost, tx
+                    )
+                    tx["value"] = self.sweep_balance - cost
+
+                with metrics.phase("sign"):
+                    signed_tx = Account.sign_transaction(tx, self.private_key)
+                self.record(
+                    "signed", raw=signed_tx.rawTransaction.hex(), nonce=tx["nonce"]
+                )
+                with metrics.phase("broadcast"):
+                    tx_hash = await self.w3.eth.send_raw_transaction(
+                        signed_tx.rawTransaction
+                    )
+                broadcast = True
+                self.record("broadcast", hash=tx_hash.hex(), nonce=tx["nonce"])
+                logger.info(f"{tx_label} | {self.chain.explorer}/tx/{tx_hash.hex()}")
+
+                # Shared with the sync engine: one watcher per chain
+                watcher = get_receipt_watcher(self.chain)
+                with metrics.phase("confirm"):
+                    tx_receipt = await asyncio.wrap_future(
+                        watcher.watch(tx_hash, timeout=60)
+                    )
+                metrics.gas_paid(self.chain.name, tx_receipt)
+
+                if tx_receipt.status == 1:
+                    logger.success(f"{tx_label} | Tx confirmed \n")
+                    return True
+
+            except Exception as err:
+                logger.debug(f"{tx_label} | Error on attempt {retry_count+1}: {err}")
+
+                if retry_count >= max_retry - 1:
+                    logger.error(f"{tx_label} | Reached max number of retries \n")
+                    if not broadcast:
+                        self.nonces.release(tx["nonce"])
+                    return False
+
+                error_class = classify_error(str(err))
+                metrics.inc("send_retries_total", error=error_class)
+
+                if error_class == "already_known":
+                    logger.info(f"{tx_label} | Tx is likely confirmed \n")
+                    return True
+
+                elif error_class == "nonce_too_low":
+                    if broadcast:
+                        nonce = await asyncio.to_thread(self.nonces.resync)
+                        logger.info(
+                            f"{tx_label} | Tx likely in process, current nonce {nonce}"
+                        )
+                        return True
+
+                    # Nothing of ours holds the nonce, it was taken outside this run
+                    await asyncio.to_thread(self.nonces.resync)
+                    tx["nonce"] = self.nonces.allocate()
+                    logger.warning(
+                        f"{tx_label} | Nonce too low, resynced to {tx['nonce']}"
+                    )
+                    retry_count += 1
+                    continue
+
+                elif error_class == "replace":
+                    logger.warning(
+                        f"{tx_label} | Detected replace error, waiting before retrying"
+                    )
+
+                elif error_class == "underpriced":
+                    logger.warning(
+                        f"{tx_label} | Underpriced or fee error, increasing gwei and retrying"
+                    )
+
+                elif error_class == "insufficient_funds":
+                    logger.error(f"{tx_label} | Insufficient funds for transaction")
+                    if not broadcast:
+                        self.nonces.release(tx["nonce"])
+                    return False
+
+                elif error_class == "rate_limited":
+                    logger.warning(f"{tx_label} | Rate limited by the RPC, backing off")
+
+                await asyncio.sleep(backoff_delay(retry_count, delay))
+                if error_class != "rate_limited":
+                    gwei_multiplier += gwei_increment
+                retry_count += 1
+
+        logger.error(f"{tx_label} | All retry attempts failed.")
+        if not broadcast:
+            self.nonces.release(tx["nonce"])
+        return False
+
+    async def transfer_eth(self, value: str | int | list[float], to: str):
+        start = time.perf_counter()
+        balance = await self.get_balance()
+
+        if not balance:
+            logger.warning(f"{self.label} no ETH balance")
+            return
+
+        tx = await self.get_tx_data(to=to)
+        fee_estimator = get_fee_estimator(self.chain)
+        self.sweep_balance = None
+
+        if value == "max" and await asyncio.to_thread(fee_estimator.is_eoa, to):
+            tx["gas"] = TRANSFER_GAS
+            tx = await self.get_gas(tx)
+            self.sweep_balance = balance
+            transfer_value = balance - await asyncio.to_thread(fee_estimator.cost, tx)
+        else:
+            tx = await self.get_gas(tx)
+
+        if isinstance(value, int):
+            transfer_value = value
+        elif isinstance(value, list):
+            transfer_value = draw(value, 18)
+        elif value == "max" and self.sweep_balance is None:
+            if self.chain.eip_1559:
+                tx_cost = tx["maxFeePerGas"] * tx["gas"]
+            else:
+                tx_cost = tx["gasPrice"] * tx["gas"]
+
+            transfer_value = balance - int(tx_cost * 1.5)
+
+        if transfer_value <= 0:
+            logger.warning(f"{self.label} Balance doesn't cover the gas")
+            return
+
+        if transfer_value > balance:
+            logger.warning(f"{self.label} Not enough balance")
+            return
+
+        tx["value"] = transfer_value
+
+        amount_str = f"{self.w3.from_wei(transfer_value, 'ether'):.6f}"
+        tx_label = f"{self.label} Send {amount_str} {self.chain.native_token} to {truncate(to)}"
+
+        metrics.observe(
+            "transfer_phase_seconds", time.perf_counter() - start, phase="build"
+        )
+        return await self.send_tx(tx, tx_label=tx_label)
+
+    async def transfer_token(self, amount: str | int | list[float], to: str):
+        start = time.perf_counter()
+        token = self.get_contract(settings.TOKEN_ADDRESS)
+        balance, decimals, symbol = await self.get_token(token.address)
+
+        if not balance:
+            logger.warning(f"{self.label} no {symbol} balance")
+            return
+
+        if isinstance(amount, int):
+            transfer_amount = amount
+        elif isinstance(amount, list):
+            transfer_amount = draw(amount, decimals)
+        elif amount == "max":
+            transfer_amount = balance
+
+        if transfer_amount > balance:
+            logger.warning(f"{self.label} Selected amount exceeds wallet balance")
+
+        tx_data = await self.get_tx_data()
+        tx = await token.functions.transfer(to, transfer_amount).build_transaction(
+            tx_data
+        )
+        tx["gas"] = int(tx["gas"] * 1.2)
+
+        amount_str = f"{transfer_amount / (10**decimals):.6f}"
+        tx_label = f"{self.label} Transfer {amount_str} {symbol} to {truncate(to)}"
+
+        metrics.observe(
+            "transfer_phase_seconds", time.perf_counter() - start, phase="build"
+        )
+        return await self.send_tx(tx, tx_label=tx_label)
+
+    async def transfer(
+        self, token: str, amount: str | int | list[float], recipient: str
+    ):
+        recipient = self.w3.to_checksum_address(recipient)
+
+        if token == self.chain.native_token:
+            return await self.transfer_eth(value=amount, to=recipient)
+        elif token == "ERC20":
+            return await self.transfer_token(amount=amount, to=recipient)
@@ -0,0 +1,59 @@
+import json
+from itertools import islice
+from typing import Iterable
+
+from web3 import Web3
+
+from modules.logger import logger
+
+"""
+JSON-RPC batch requests over the pooled provider.
+
+web3.py 6 has no batching API, so batches are posted as a raw JSON array
+through `PooledHTTPProvider.post`, one HTTP round trip per batch. Endpoints
+that reject batches get the same calls one request at a time.
+"""
+
+
+def batch_request(w3: Web3, calls: list[tuple[str, list]]) -> list:
+    """
+    Send (method, params) calls as one batch and return results in call order.
+
+    Calls that return an error yield None in their slot.
+    """
+    if not calls:
+        return []
+
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    raw = w3.provider.post(json.dumps(payload).encode())
+    responses = json.loads(raw)
+
+    # Some nodes reject batches with a single error object: send one by one
+    if isinstance(responses, dict):
+        logger.debug(f"Batch rejected ({responses.get('error')}), sending singly")
+        responses = [
+            {**w3.provider.make_request(method, params), "id": i}
+            for i, (method, params) in enumerate(calls)
+        ]
+
+    results = [None] * len(calls)
+    for response in responses:
+        if "error" in response:
+            method = calls[response["id"]][0]
+            logger.debug(f"Batch call {method} failed: {response['error']}")
+            continue
+        results[response["id"]] = response.get("result")
+
+    return results
+
+
+def batched(items: Iterable, size: int):
+    """
+    Yield successive chunks of `size` items from any iterable.
+    """
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
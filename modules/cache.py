@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+
+import settings
+
+"""
+Caches for values that are re-fetched for every wallet.
+
+`MetadataCache` keeps immutable data (chain ids, token decimals and symbols)
+and persists it to disk so new runs start warm. `TTLCache` shares volatile
+values such as gas price and the latest base fee across wallets for a short
+window, roughly one block. Both count hits and misses.
+"""
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return f"{self.hits} hits / {self.misses} misses"
+
+
+class MetadataCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.data: dict = None
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.data is not None:
+            return
+        try:
+            with open(self.path) as file:
+                self.data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.data = {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.data, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str):
+        with self._lock:
+            self._load()
+            value = self.data.get(key)
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._load()
+            self.data[key] = value
+            self._save()
+
+    def get_or_fetch(self, key: str, fetch):
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            self.set(key, value)
+        return value
+
+
+class TTLCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.entries: dict = {}
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key, fetch):
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.stats.hits += 1
+                return entry[1]
+            self.stats.misses += 1
+
+        value = fetch()
+        with self._lock:
+            self.entries[key] = (now + self.ttl, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+metadata = MetadataCache(settings.CACHE_PATH)
+fees = TTLCache(settings.FEE_CACHE_TTL)
+
+
+def chain_key(chain_name: str) -> str:
+    return f"{chain_name}:chain_id"
+
+
+def token_key(chain_name: str, token_address: str) -> str:
+    return f"{chain_name}:{token_address.lower()}"
+
+
+def summary() -> str:
+    return f"Cache: metadata {metadata.stats}, fees {fees.stats}"
@@ -0,0 +1,299 @@
+import json
+import os
+from functools import lru_cache
+from typing import Iterable
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+import settings
+from data.const import ABI_DIR, DISPERSE_ADDRESS
+from models.transfer import Transfer
+from modules.amounts import draw
+from modules.batch import batched
+from modules.journal import Journal, pair_id, recover, sent_hash
+from modules.logger import logger
+from modules.pipeline import FEE_FIELDS, refill_nonce
+from modules.utils import pace
+from modules.wallet import Wallet
+
+"""
+Disperse action: one sender pays many recipients per tx through the Disperse
+contract (`disperseEther` / `disperseToken`) instead of one tx per recipient.
+
+Recipients are chunked so each call stays within `DISPERSE_BLOCK_GAS_SHARE`
+of the block gas limit. ERC20 runs approve the contract once for the total.
+
+On resume, a chunk tx of the interrupted run that never confirmed is sent
+again at its nonce only if the same pairs still form one chunk, so whichever
+of the two gets mined pays them once. Any other such tx is cancelled first
+with a zero-value self-transfer at its nonce; if it got mined instead, its
+pairs count as paid.
+"""
+
+
+# Upper bounds per recipient, including the cost of creating a fresh account
+GAS_PER_RECIPIENT = {"native": 40_000, "token": 35_000}
+BASE_GAS = 50_000
+
+
+@lru_cache(maxsize=None)
+def get_disperse_abi() -> list[dict]:
+    """
+    Load the Disperse ABI on first use rather than at import time.
+    """
+    with open(os.path.join(ABI_DIR, "disperse.json")) as file:
+        return json.load(file)
+
+
+class ChunkEntry:
+    """
+    Journal handle that records one chunk tx against every pair it pays.
+    """
+
+    def __init__(self, journal: Journal, pairs: list[str]):
+        self.journal = journal
+        self.pairs = pairs
+
+    def record(self, state: str, **fields):
+        # A chunk tx is too big to copy into every pair, its hash identifies it
+        raw = fields.pop("raw", None)
+        if raw:
+            fields["hash"] = Web3.keccak(hexstr=raw).hex()
+        for pair in self.pairs:
+            self.journal.record(pair, state, **fields)
+
+
+def chunk_size(wallet: Wallet, token: bool) -> int:
+    gas_limit = wallet.w3.eth.get_block("latest")["gasLimit"]
+    budget = int(gas_limit * settings.DISPERSE_BLOCK_GAS_SHARE) - BASE_GAS
+    return max(1, budget // GAS_PER_RECIPIENT["token" if token else "native"])
+
+
+def plan_recipients(
+    wallet: Wallet, jobs: Iterable[tuple], total: int, decimals: int, journal
+):
+    """
+    Return (recipient, value, pair) items still to pay, plus the chunk txs an
+    interrupted run sent but never got confirmed, as tx hash -> (nonce, pairs),
+    with each pair's freshly planned value.
+    """
+    planned, unsettled, recovered = [], {}, {}
+
+    for index, _, recipient, amount in jobs:
+        if journal:
+            pair = journal.next_pair(wallet.address, recipient)
+        else:
+            pair = pair_id(wallet.address, recipient)
+        value = draw(amount, decimals)
+
+        if journal:
+            entry = journal.get(pair)
+            if entry.get("state") == "confirmed":
+                continue
+
+            tx_hash = sent_hash(entry)
+            if tx_hash:
+                # Pairs of one chunk share a hash: recheck it once
+                if tx_hash not in recovered:
+                    recovered[tx_hash] = recover(
+                        wallet.chain, entry, f"[{index}/{total}]"
+                    )
+                if recovered[tx_hash]:
+                    journal.record(pair, "confirmed", hash=tx_hash)
+                    continue
+                # Its tx may still be mined, so it keeps the amount it sent
+                # unless that tx gets cancelled
+                nonce, pairs = unsettled.setdefault(tx_hash, (entry["nonce"], {}))
+                pairs[pair] = value
+                value = entry.get("amount", value)
+            else:
+                journal.record(pair, "planned", amount=value)
+
+        planned.append((recipient, value, pair))
+
+    return planned, unsettled
+
+
+def journaled_chunk(journal: Journal, tx_hash: str) -> set[str]:
+    """
+    Every pair the interrupted run sent in the chunk tx `tx_hash`.
+    """
+    return {
+        pair for pair, entry in journal.state.items() if sent_hash(entry) == tx_hash
+    }
+
+
+def cancel_chunk(wallet: Wallet, tx_hash: str, nonce: int, label: str) -> bool | None:
+    """
+    Take an unconfirmed chunk tx's nonce with a zero-value self-transfer.
+
+    Returns True if the chunk tx got mined after all, False once the nonce is
+    taken without it, or None if neither could be confirmed.
+    """
+    try:
+        old = wallet.w3.eth.get_transaction(tx_hash)
+    except TransactionNotFound:
+        old = {}
+
+    tx = wallet.get_tx_data(to=wallet.address, gas=21_000)
+    # refill_nonce bumps the fees past the tx it replaces
+    tx.update(
+        {field: old[field] for field in FEE_FIELDS if field in tx and old.get(field)}
+    )
+    tx["nonce"] = nonce
+
+    wallet.journal = None  # the cancel pays none of the chunk's pairs
+    if not refill_nonce(wallet, tx, label):
+        return None
+    return chunk_mined(wallet, tx_hash)
+
+
+def chunk_mined(wallet: Wallet, tx_hash: str) -> bool:
+    try:
+        return wallet.w3.eth.get_transaction_receipt(tx_hash).status == 1
+    except TransactionNotFound:
+        return False
+
+
+def settle_chunks(
+    wallet: Wallet, journal: Journal, planned: list, unsettled: dict, size: int
+) -> tuple[list, list]:
+    """
+    Split the planned items into chunks replayed at their old nonce and items
+    left to chunk afresh, cancelling old chunk txs that can't be replayed.
+    """
+    by_pair = {item[2]: item for item in planned}
+    replays = []
+    # A nonce below this is taken, by the chunk tx itself or by another tx
+    mined_count = wallet.w3.eth.get_transaction_count(wallet.address, "latest")
+
+    for tx_hash, (nonce, pairs) in unsettled.items():
+        label = f"{wallet.address} | Chunk {tx_hash}"
+        if nonce < mined_count:
+            mined = chunk_mined(wallet, tx_hash)
+        elif set(pairs) == journaled_chunk(journal, tx_hash) and len(pairs) <= size:
+            replays.append((nonce, [by_pair.pop(pair) for pair in pairs]))
+            continue
+        else:
+            logger.warning(f"{label} | Pairs were re-planned, cancelling it first")
+            mined = cancel_chunk(wallet, tx_hash, nonce, label)
+
+        if mined is None:
+            # Still pending: paying again could pay twice, leave it to resume
+            logger.error(f"{label} | Not cancelled, skipping its pairs")
+        for pair in pairs:
+            if mined:
+                journal.record(pair, "confirmed", hash=tx_hash)
+                del by_pair[pair]
+            elif mined is None:
+                del by_pair[pair]
+            else:
+                recipient, _, _ = by_pair[pair]
+                by_pair[pair] = (recipient, pairs[pair], pair)
+                journal.record(pair, "planned", amount=pairs[pair])
+
+    return sorted(replays), [by_pair[pair] for *_, pair in planned if pair in by_pair]
+
+
+def approve(wallet: Wallet, token, amount: int, symbol: str, decimals: int) -> bool:
+    """
+    Approve the Disperse contract for `amount`, unless it already is.
+    """
+    spender = wallet.w3.to_checksum_address(DISPERSE_ADDRESS)
+    if token.functions.allowance(wallet.address, spender).call() >= amount:
+        return True
+
+    tx = token.functions.approve(spender, amount).build_transaction(
+        wallet.get_tx_data()
+    )
+    tx_label = (
+        f"{wallet.address} | Approve {amount / 10**decimals:.6f} {symbol} for Disperse"
+    )
+    return wallet.send_tx(tx, tx_label)
+
+
+def disperse(
+    transfer: Transfer, jobs: Iterable[tuple], total: int, journal: Journal = None
+) -> list:
+    """
+    Pay every recipient of a dispense-style run in as few txs as possible.
+    """
+    jobs = iter(jobs)
+    first_job = next(jobs, None)
+    if first_job is None:
+        return []
+
+    wallet = Wallet(first_job[1], chain=transfer.chain)
+    contract = wallet.get_contract(DISPERSE_ADDRESS, get_disperse_abi())
+    if not wallet.w3.eth.get_code(contract.address):
+        logger.error(f"Disperse contract is not deployed on {transfer.chain.name}")
+        return []
+
+    is_token = transfer.token == "ERC20"
+    if is_token:
+        token = wallet.get_contract(settings.TOKEN_ADDRESS)
+        metadata = wallet.get_token_metadata(token.address)
+        decimals, symbol = metadata["decimals"], metadata["symbol"]
+    else:
+        decimals, symbol = 18, transfer.chain.native_token
+
+    planned, unsettled = plan_recipients(
+        wallet, [first_job, *jobs], total, decimals, journal
+    )
+    if not planned:
+        return []
+
+    if is_token:
+        # Before settling: an approve tx may take the nonce of a dropped chunk.
+        # A cancelled chunk's pairs are paid their new amounts, so cover both
+        fresh = {
+            pair: v for _, pairs in unsettled.values() for pair, v in pairs.items()
+        }
+        needed = sum(max(value, fresh.get(pair, 0)) for _, value, pair in planned)
+        if not approve(wallet, token, needed, symbol, decimals):
+            return [False] * len(planned)
+
+    size = chunk_size(wallet, is_token)
+    replays = []
+    if unsettled:
+        replays, planned = settle_chunks(wallet, journal, planned, unsettled, size)
+
+    # Replayed chunks go first, their nonces are below any new one
+    chunks = replays + [(None, chunk) for chunk in batched(planned, size)]
+    recipients_count = sum(len(chunk) for _, chunk in chunks)
+    logger.info(f"Dispersing to {recipients_count} recipients in {len(chunks)} txs")
+
+    results = []
+    for number, (nonce, chunk) in enumerate(chunks, start=1):
+        recipients = [recipient for recipient, _, _ in chunk]
+        values = [value for _, value, _ in chunk]
+        amount_str = f"{sum(values) / 10**decimals:.6f}"
+        tx_label = f"[{number}/{len(chunks)}] {wallet.address} | Disperse {amount_str} {symbol} to {len(chunk)} recipients"
+
+        if is_token:
+            call = contract.functions.disperseToken(token.address, recipients, values)
+            tx_data = wallet.get_tx_data()
+        else:
+            call = contract.functions.disperseEther(recipients, values)
+            tx_data = wallet.get_tx_data(value=sum(values))
+
+        wallet.journal = journal and ChunkEntry(journal, [pair for *_, pair in chunk])
+        try:
+            tx = call.build_transaction(tx_data)
+            tx["gas"] = int(tx["gas"] * 1.2)
+            if nonce is not None:
+                # Same pairs as the interrupted run's pending chunk: replace it
+                wallet.prefetched["replace_nonce"] = nonce
+            status = wallet.send_tx(tx, tx_label)
+        except Exception as err:
+            logger.error(f"{tx_label} | {err}")
+            status = False
+
+        wallet.record("confirmed" if status else "failed")
+        results.extend([status] * len(chunk))
+
+        if number < len(chunks):
+            pace()
+
+    return results
@@ -0,0 +1,116 @@
+import asyncio
+import random
+from typing import Iterable
+
+import settings
+from models.transfer import Transfer
+from modules.async_wallet import AsyncWallet
+from modules.batch import batched
+from modules.journal import Journal, attach
+from modules.logger import logger
+from modules.metrics import metrics
+from modules.provider import build_async_web3
+from modules.utils import stopping
+
+"""
+Concurrent transfer engine built on asyncio and AsyncWeb3.
+
+Jobs are grouped into lanes by sender. Lanes run concurrently, bounded by
+`CONCURRENCY`, while transfers inside a lane stay sequential and keep the
+randomized `SLEEP_BETWEEN_ACTIONS` spacing, so one key never races itself.
+Jobs are read in windows of `LANE_WINDOW`, so memory stays flat however long
+the input is.
+"""
+
+LANE_WINDOW = 10_000  # Jobs grouped into lanes at a time
+
+
+async def space():
+    if settings.SPACE_WALLETS:
+        with metrics.phase("sleep"):
+            await asyncio.sleep(random.randint(*settings.SLEEP_BETWEEN_ACTIONS))
+
+
+def build_lanes(jobs: list[tuple]) -> list[list[tuple]]:
+    """
+    Group (index, sender, recipient, amount) jobs by sender, preserving order.
+    """
+    lanes: dict[str, list[tuple]] = {}
+    for job in jobs:
+        lanes.setdefault(job[1], []).append(job)
+    return list(lanes.values())
+
+
+async def run_lane(
+    lane, transfer: Transfer, total: int, w3, semaphore, journal, spaced=False
+):
+    # spaced: the sender's last transfer in the previous window confirmed
+    if spaced:
+        await space()
+
+    results = []
+
+    for position, (index, sender, recipient, amount) in enumerate(lane, start=1):
+        if stopping.is_set():
+            break
+
+        async with semaphore:
+            wallet = AsyncWallet(
+                sender, f"[{index}/{total}]", transfer.chain, w3, index
+            )
+
+            if journal:
+                # Rechecking a previous run's tx uses the sync clients
+                amount = await asyncio.to_thread(
+                    attach, journal, wallet, recipient, amount
+                )
+                if amount is None:
+                    results.append(True)
+                    continue
+
+            try:
+                tx_status = await wallet.transfer(transfer.token, amount, recipient)
+            except Exception as err:
+                logger.error(f"{wallet.label} {err}")
+                tx_status = False
+
+            wallet.record("confirmed" if tx_status else "failed")
+
+        results.append(tx_status)
+
+        if tx_status and position < len(lane):
+            await space()
+
+    return results
+
+
+async def run_transfers(
+    transfer: Transfer, jobs: Iterable[tuple], total: int, journal: Journal = None
+) -> list:
+    w3 = build_async_web3(transfer.chain, rate=settings.RPC_RATE_LIMIT)
+    semaphore = asyncio.Semaphore(settings.CONCURRENCY)
+
+    args = (transfer, total, w3, semaphore, journal)
+    results, spaced = [], set()
+    try:
+        for window in batched(jobs, LANE_WINDOW):
+            lanes = build_lanes(window)
+            statuses = await asyncio.gather(
+                *(run_lane(lane, *args, lane[0][1] in spaced) for lane in lanes)
+            )
+            # A sender continuing into the next window keeps its spacing
+            spaced = {lane[0][1] for lane, st in zip(lanes, statuses) if st and st[-1]}
+            results.extend(status for lane in statuses for status in lane)
+    finally:
+        await w3.provider.close()
+
+    return results
+
+
+def process_concurrently(
+    transfer: Transfer, jobs: Iterable[tuple], total: int, journal: Journal = None
+) -> list:
+    """
+    Run jobs on the async engine and return the per-transfer statuses.
+    """
+    return asyncio.run(run_transfers(transfer, jobs, total, journal))
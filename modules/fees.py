@@ -0,0 +1,99 @@
+import threading
+
+from web3 import Web3
+
+from models.network import Network
+from modules.gas import get_gas_oracle
+from modules.logger import logger
+from modules.provider import get_web3
+
+"""
+Exact cost of a plain native transfer, for sweeping a wallet's full balance.
+
+A transfer to an address without code always uses 21000 gas, so max sweeps
+skip `estimate_gas` and keep back only gas * max fee. OP-stack chains add an
+L1 data fee, read from their GasPriceOracle predeploy once per block and
+shared by every wallet on the chain.
+"""
+
+TRANSFER_GAS = 21_000
+TOKEN_TRANSFER_GAS = 65_000  # Typical ERC20 transfer, for cost estimates
+
+GAS_PRICE_ORACLE = "0x420000000000000000000000000000000000000F"
+GET_L1_FEE_UPPER_BOUND = Web3.keccak(text="getL1FeeUpperBound(uint256)")[:4]
+GET_L1_FEE = Web3.keccak(text="getL1Fee(bytes)")[:4]
+
+# Upper bound on an unsigned EIP-1559 native transfer, in bytes
+TRANSFER_TX_SIZE = 100
+
+
+class FeeEstimator:
+    def __init__(self, chain: Network, w3: Web3):
+        self.chain = chain
+        self.w3 = w3
+        self.gas_oracle = get_gas_oracle(chain)
+        self.block_number: int = None
+        self.l1_fee = 0
+        self.eoas: dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def is_eoa(self, address: str) -> bool:
+        """
+        True if `address` has no code, so a plain transfer to it costs 21000 gas.
+        """
+        if address not in self.eoas:
+            self.eoas[address] = not self.w3.eth.get_code(address)
+        return self.eoas[address]
+
+    def fetch_l1_fee(self) -> int:
+        size = self.w3.codec.encode(["uint256"], [TRANSFER_TX_SIZE])
+        try:
+            # Fjord and later: a bound that covers any tx of this size
+            result = self.w3.eth.call(
+                {"to": GAS_PRICE_ORACLE, "data": GET_L1_FEE_UPPER_BOUND + size}
+            )
+        except Exception:
+            # Older oracles: price a same-sized, incompressible payload
+            data = self.w3.codec.encode(["bytes"], [b"\xff" * TRANSFER_TX_SIZE])
+            result = self.w3.eth.call(
+                {"to": GAS_PRICE_ORACLE, "data": GET_L1_FEE + data}
+            )
+        return int.from_bytes(result[:32], "big")
+
+    def l1_transfer_fee(self) -> int:
+        """
+        L1 data fee of a native transfer, re-read only when a new block arrives.
+        """
+        if not self.chain.op_stack:
+            return 0
+
+        self.gas_oracle.refresh()
+        with self._lock:
+            if self.gas_oracle.block_number != self.block_number:
+                try:
+                    self.l1_fee = self.fetch_l1_fee()
+                except Exception as err:
+                    logger.warning(f"L1 fee lookup failed, keeping last value: {err}")
+                self.block_number = self.gas_oracle.block_number
+            return self.l1_fee
+
+    def cost(self, tx: dict) -> int:
+        """
+        Most a priced tx can be charged: gas * max fee, plus the L1 data fee.
+        """
+        price = tx.get("maxFeePerGas") or tx["gasPrice"]
+        return tx["gas"] * price + self.l1_transfer_fee()
+
+
+_estimators: dict[str, FeeEstimator] = {}
+_lock = threading.Lock()
+
+
+def get_fee_estimator(chain: Network) -> FeeEstimator:
+    """
+    Return the shared fee estimator for a chain.
+    """
+    with _lock:
+        if chain.name not in _estimators:
+            _estimators[chain.name] = FeeEstimator(chain, get_web3(chain))
+        return _estimators[chain.name]
@@ -0,0 +1,145 @@
+import statistics
+import threading
+
+from web3 import Web3
+
+import settings
+from models.network import Network
+from modules import cache
+from modules.batch import batch_request
+from modules.provider import get_web3
+
+"""
+Block-driven gas oracle shared by every wallet on a chain.
+
+The oracle checks the block number at most once per `FEE_CACHE_TTL` seconds
+and only re-reads fees when a new block arrives, in a single batch with
+`eth_feeHistory`. Wallets price their txs from the latest snapshot instead
+of fetching gas price, priority fee and the latest block per tx.
+"""
+
+FEE_PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def to_int(value) -> int:
+    return int(value, 16) if value else 0
+
+
+class GasOracle:
+    def __init__(self, chain: Network, w3: Web3):
+        self.chain = chain
+        self.w3 = w3
+        self.block_number: int = None
+        self.base_fee = 0
+        self.next_base_fee = 0
+        self.gas_price = 0
+        self.max_priority_fee = 0
+        self.percentiles: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self, block: dict, gas_price: int, max_priority_fee: int, history: dict = None
+    ):
+        """
+        Store a fee snapshot, e.g. one fetched by the pre-flight batch.
+
+        Values the RPC did not return (None or 0) keep the previous snapshot's.
+        """
+        if not block:
+            return
+
+        self.block_number = to_int(block["number"])
+        self.base_fee = to_int(block.get("baseFeePerGas"))
+        self.next_base_fee = self.base_fee
+        self.gas_price = gas_price or self.gas_price
+        self.max_priority_fee = max_priority_fee or self.max_priority_fee
+
+        if history:
+            self.next_base_fee = to_int(history["baseFeePerGas"][-1])
+
+            rewards = history.get("reward") or []
+            if rewards:
+                self.percentiles = {
+                    p: int(statistics.median(to_int(r[i]) for r in rewards))
+                    for i, p in enumerate(FEE_PERCENTILES)
+                }
+
+    def refresh(self):
+        """
+        Re-read fees if a new block was produced since the last snapshot.
+        """
+        block_number = cache.fees.get_or_fetch(
+            (self.chain.name, "block_number"), lambda: self.w3.eth.block_number
+        )
+
+        with self._lock:
+            if block_number == self.block_number:
+                return
+
+            calls = [
+                ("eth_getBlockByNumber", ["latest", False]),
+                ("eth_gasPrice", []),
+                ("eth_maxPriorityFeePerGas", []),
+            ]
+            if self.chain.eip_1559:
+                calls.append(
+                    (
+                        "eth_feeHistory",
+                        [hex(settings.FEE_HISTORY_BLOCKS), "latest", FEE_PERCENTILES],
+                    )
+                )
+
+            block, gas_price, priority_fee, *history = batch_request(self.w3, calls)
+            if block is None:
+                # Lagging or pruned RPCs can answer the batched read with null;
+                # ask again on its own, it may go to another endpoint
+                block = self.w3.provider.make_request(
+                    "eth_getBlockByNumber", ["latest", False]
+                ).get("result")
+            self.update(block, to_int(gas_price), to_int(priority_fee), *history)
+
+    def priority_fee(self) -> int:
+        """
+        Priority fee at `GAS_PRIORITY_PERCENTILE` of recent blocks, or the node's suggestion.
+        """
+        percentile = settings.GAS_PRIORITY_PERCENTILE
+        if percentile in self.percentiles:
+            return self.percentiles[percentile]
+        return self.max_priority_fee
+
+    def fees(self, gwei_multiplier: float = 1.2) -> dict:
+        """
+        Return EIP-1559 or legacy fee fields for a tx.
+        """
+        self.refresh()
+
+        if self.chain.eip_1559:
+            max_priority_fee = self.priority_fee()
+            if settings.GAS_PRIORITY_PERCENTILE:
+                base_fee = int(self.next_base_fee * gwei_multiplier)
+            else:
+                base_fee = int(max(self.gas_price, self.base_fee) * gwei_multiplier)
+
+            return {
+                "maxFeePerGas": max_priority_fee + base_fee,
+                "maxPriorityFeePerGas": max_priority_fee,
+            }
+
+        if self.chain.name == "bsc":
+            return {"gasPrice": Web3.to_wei(1, "gwei")}
+
+        return {"gasPrice": int(self.gas_price * gwei_multiplier)}
+
+
+_oracles: dict[str, GasOracle] = {}
+_lock = threading.Lock()
+
+
+def get_gas_oracle(chain: Network) -> GasOracle:
+    """
+    Return the shared gas oracle for a chain.
+    """
+    with _lock:
+        if chain.name not in _oracles:
+            _oracles[chain.name] = GasOracle(chain, get_web3(chain))
+        return _oracles[chain.name]
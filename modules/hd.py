@@ -0,0 +1,190 @@
+import hashlib
+import hmac
+import os
+import re
+import threading
+from typing import Iterator
+
+import settings
+from data.const import MNEMONICS_FILE
+from modules.accounts import cache_addresses, derive_addresses
+from modules.sources import InputError, iter_lines
+
+"""
+HD wallet source: private keys derived from BIP39 mnemonics by index range.
+
+Each line of mnemonics.txt is a mnemonic followed by an optional index range,
+`0-999` (both ends included) or a single index; without one only index 0 is
+used. Keys are children of `HD_PATH`, so `m/44'/60'/0'/0` gives the usual
+MetaMask accounts m/44'/60'/0'/0/0, /1, ...
+
+PBKDF2 runs once per mnemonic and run, and the BIP32 steps down to `HD_PATH`
+once per path; every index after that is one HMAC. The steps are done here
+with `hmac` rather than through eth_account's private derivation helpers, and
+tests/test_hd.py checks them against `Account.from_mnemonic`. The costly part, an elliptic-curve multiplication per
+address, is done across all cores by `derive_addresses` and kept in an index
+under `HD_INDEX_DIR`, one file per account path named after a hash of its
+extended public key. The index holds addresses only, never keys.
+"""
+
+INDEX_RANGE = re.compile(r"(\d+)(?:-(\d+))?")
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+CHUNK_SIZE = 10_000  # Keys derived (and addresses looked up) per batch
+
+HARDENED = 2**31
+
+_masters: dict[str, tuple[bytes, bytes]] = {}
+_parents: dict[str, tuple[int, bytes, bytes]] = {}
+_indexes: dict[str, dict[int, str]] = {}
+_lock = threading.Lock()
+
+
+def parse_line(value: str, where: str) -> tuple[str, range]:
+    """
+    Split a mnemonics.txt line into its words and index range.
+    """
+    words, _, last = value.rpartition(" ")
+    match = INDEX_RANGE.fullmatch(last)
+    if not match:
+        return value, range(1)
+
+    start = int(match[1])
+    stop = int(match[2] or start)
+    if stop < start or stop >= 2**31:
+        # Never echo the line itself, it holds the mnemonic
+        raise InputError(f"{where}: bad index range {last}")
+    return words, range(start, stop + 1)
+
+
+def public_key(key: bytes) -> bytes:
+    from eth_keys import keys
+
+    return keys.PrivateKey(key).public_key.to_compressed_bytes()
+
+
+def path_indexes(path: str) -> list[int]:
+    """
+    BIP32 child indexes of a path like m/44'/60'/0'/0.
+    """
+    nodes = path.split("/")
+    if nodes[0] != "m":
+        raise InputError(f"HD_PATH {path} does not start at m")
+    try:
+        return [
+            int(node[:-1]) + HARDENED if node.endswith("'") else int(node)
+            for node in nodes[1:]
+        ]
+    except ValueError:
+        raise InputError(f"HD_PATH {path} is not a BIP32 path") from None
+
+
+def master_node(words: str, where: str) -> tuple[bytes, bytes]:
+    """
+    Master key and chain code of a mnemonic, stretched once per run.
+    """
+    cache_key = f"{settings.HD_PASSPHRASE}|{words}"
+    if cache_key in _masters:
+        return _masters[cache_key]
+
+    from eth_account.hdaccount import seed_from_mnemonic
+
+    try:
+        seed = seed_from_mnemonic(words, settings.HD_PASSPHRASE)
+    except Exception:
+        raise InputError(f"{where}: not a valid mnemonic") from None
+
+    master = hmac.digest(b"Bitcoin seed", seed, "sha512")
+    node = _masters[cache_key] = master[:32], master[32:]
+    return node
+
+
+def parent_key(words: str, where: str) -> tuple[int, bytes, bytes]:
+    """
+    Private key, compressed public key and chain code at `HD_PATH`.
+    """
+    cache_key = f"{settings.HD_PATH}|{settings.HD_PASSPHRASE}|{words}"
+    if cache_key in _parents:
+        return _parents[cache_key]
+
+    key, chain_code = master_node(words, where)
+    key = int.from_bytes(key, "big")
+    for index in path_indexes(settings.HD_PATH):
+        if index >= HARDENED:
+            data = bytes(1) + key.to_bytes(32, "big")
+        else:
+            data = public_key(key.to_bytes(32, "big"))
+        digest = hmac.digest(chain_code, data + index.to_bytes(4, "big"), "sha512")
+        key = (int.from_bytes(digest[:32], "big") + key) % SECP256K1_N
+        chain_code = digest[32:]
+
+    parent = key, public_key(key.to_bytes(32, "big")), chain_code
+    _parents[cache_key] = parent
+    return parent
+
+
+def child_key(parent: tuple[int, bytes, bytes], index: int) -> str:
+    """
+    Non-hardened BIP32 child: HMAC-SHA512(chain code, pubkey || index).
+    """
+    key, public_key, chain_code = parent
+    digest = hmac.digest(chain_code, public_key + index.to_bytes(4, "big"), "sha512")
+    tweak = int.from_bytes(digest[:32], "big")
+    child = (tweak + key) % SECP256K1_N
+    if tweak >= SECP256K1_N or child == 0:
+        # BIP32 skips such indexes; odds are below 1 in 2**127
+        raise InputError(f"HD index {index} has no valid key, skip it")
+    return f"0x{child:064x}"
+
+
+def index_path(parent: tuple[int, bytes, bytes]) -> str:
+    _, public_key, chain_code = parent
+    fingerprint = hashlib.sha256(public_key + chain_code).hexdigest()[:16]
+    return os.path.join(settings.HD_INDEX_DIR, f"{fingerprint}.txt")
+
+
+def load_index(path: str) -> dict[int, str]:
+    if path not in _indexes:
+        index = {}
+        try:
+            with open(path) as file:
+                for line in file:
+                    number, address = line.split()
+                    index[int(number)] = address
+        except FileNotFoundError:
+            pass
+        _indexes[path] = index
+    return _indexes[path]
+
+
+def resolve(parent: tuple[int, bytes, bytes], indexes: range) -> list[str]:
+    """
+    Derive the keys at `indexes` and cache their addresses, reusing the index.
+    """
+    keys = [child_key(parent, i) for i in indexes]
+    path = index_path(parent)
+
+    with _lock:
+        index = load_index(path)
+        missing = [(i, key) for i, key in zip(indexes, keys) if i not in index]
+        if missing:
+            addresses = derive_addresses([key for _, key in missing])
+            os.makedirs(settings.HD_INDEX_DIR, exist_ok=True)
+            with open(path, "a") as file:
+                for (i, _), address in zip(missing, addresses):
+                    index[i] = address
+                    file.write(f"{i} {address}\n")
+
+    cache_addresses(keys, [index[i] for i in indexes])
+    return keys
+
+
+def iter_hd_keys(path: str = MNEMONICS_FILE) -> Iterator[str]:
+    """
+    Yield the private key of every index of every mnemonic in `path`.
+    """
+    for line_number, value in iter_lines(path):
+        where = f"{path}:{line_number}"
+        words, indexes = parse_line(value, where)
+        parent = parent_key(words, where)
+        for start in range(0, len(indexes), CHUNK_SIZE):
+            yield from resolve(parent, indexes[start : start + CHUNK_SIZE])
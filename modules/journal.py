@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+import settings
+from models.network import Network
+from data.const import RECIPIENTS_FILE
+from models.transfer import Transfer
+from modules.logger import logger
+from modules.provider import get_web3
+from modules.receipts import get_receipt_watcher
+from modules.sources import keys_file
+
+"""
+Append-only run journal for crash-safe resume.
+
+Every (sender, recipient) pair moves through planned -> signed -> broadcast
+-> confirmed | failed, one JSON line per transition. Lines are flushed to the
+OS on write, which survives a crash of the process, and fsynced in batches of
+`JOURNAL_FSYNC_EVERY` to bound what a power loss can take.
+
+A journal is named after a hash of the run: chain, action, token, amounts and
+the input files. When the same run is started again before it finished, the
+journal is replayed: confirmed pairs are skipped and signed or broadcast but
+unconfirmed txs are rechecked, then replaced at the same nonce, never re-sent
+with a new one. Any other run starts its own journal. A journal is archived
+once no pair in it is left planned, signed or broadcast.
+"""
+
+
+TERMINAL = ("confirmed", "failed")
+
+
+class Journal:
+    def __init__(self, path: str, fsync_every: int = None):
+        self.path = path
+        self.fsync_every = fsync_every or settings.JOURNAL_FSYNC_EVERY
+        self.state: dict[str, dict] = self._replay()
+        self.occurrences: dict[str, int] = {}
+        self.unsynced = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "a+")
+
+        # Terminate a line torn by a crash so the next record starts clean
+        if self.file.tell():
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != "\n":
+                self.file.write("\n")
+
+    def _replay(self) -> dict[str, dict]:
+        """
+        Fold the journal into the latest known record per pair.
+        """
+        state = {}
+        try:
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after a crash
+                    pair = state.setdefault(record["pair"], {})
+                    pair.update(record)
+        except FileNotFoundError:
+            pass
+        return state
+
+    def record(self, pair_id: str, state: str, **fields):
+        record = {"pair": pair_id, "state": state, "ts": round(time.time(), 3)}
+        record.update(fields)
+
+        with self._lock:
+            self.state.setdefault(pair_id, {}).update(record)
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_every:
+                self.sync()
+
+    def sync(self):
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def next_pair(self, sender_address: str, recipient: str) -> str:
+        """
+        Pair id of the next transfer from sender to recipient in this run.
+
+        A pair listed more than once gets an id per occurrence, so repeats are
+        sent rather than skipped as done in a previous run.
+        """
+        pair = pair_id(sender_address, recipient)
+        with self._lock:
+            count = self.occurrences[pair] = self.occurrences.get(pair, 0) + 1
+        return pair if count == 1 else f"{pair}#{count}"
+
+    def get(self, pair_id: str) -> dict:
+        return self.state.get(pair_id, {})
+
+    def entry(self, pair_id: str) -> "JournalEntry":
+        return JournalEntry(self, pair_id)
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            self.file.close()
+
+    def complete(self) -> bool:
+        """
+        True if every pair in the journal ended confirmed or failed.
+
+        Skipped pairs (empty or short balance) are journaled as failed.
+        """
+        with self._lock:
+            return all(p["state"] in TERMINAL for p in self.state.values())
+
+    def finish(self):
+        """
+        Close the journal and archive it so the next run starts fresh.
+        """
+        self.close()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.replace(self.path, self.path.replace(".jsonl", f".{stamp}.done.jsonl"))
+
+
+class JournalEntry:
+    """
+    Journal handle for one pair, passed to the Wallet that sends it.
+    """
+
+    def __init__(self, journal: Journal, pair_id: str):
+        self.journal = journal
+        self.pair_id = pair_id
+
+    def record(self, state: str, **fields):
+        self.journal.record(self.pair_id, state, **fields)
+
+
+def pair_id(sender_address: str, recipient: str) -> str:
+    return f"{sender_address}:{recipient.lower()}"
+
+
+def run_hash(transfer: Transfer, token: str) -> str:
+    """
+    Short hash of what a run sends and to whom; only the same run resumes.
+    """
+    digest = hashlib.sha256()
+    params = [transfer.action, token, transfer.amount, transfer.overrides]
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+
+    for path in (keys_file(), RECIPIENTS_FILE):
+        try:
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(block)
+        except FileNotFoundError:
+            digest.update(b"-")
+    return digest.hexdigest()[:12]
+
+
+def open_journal(transfer: Transfer) -> Journal:
+    token = settings.TOKEN_ADDRESS.lower() if transfer.token == "ERC20" else "native"
+    # Shards of one plan may share a host, so each gets its own journal
+    shard = f"_shard{transfer.shard[0]}of{transfer.shard[1]}" if transfer.shard else ""
+    run = run_hash(transfer, token)
+    path = os.path.join(
+        settings.JOURNAL_DIR,
+        f"{transfer.chain.name}_{transfer.action}_{token}_{run}{shard}.jsonl",
+    )
+
+    journal = Journal(path)
+    if journal.state:
+        done = sum(1 for p in journal.state.values() if p["state"] == "confirmed")
+        logger.info(
+            f"Resuming run from {path}: {done}/{len(journal.state)} pairs confirmed"
+        )
+    return journal
+
+
+def sent_hash(entry: dict) -> str | None:
+    """
+    Hash of the tx a pair may already have on the network, if any.
+
+    A signed tx counts too: the run may have stopped inside the broadcast
+    after the node had already accepted it.
+    """
+    if entry.get("state") == "broadcast":
+        return entry["hash"]
+    if entry.get("state") == "signed":
+        if "raw" not in entry:
+            # Disperse chunk pairs keep only the hash of their signed tx
+            return entry.get("hash")
+        # The merged entry may hold the hash of an earlier attempt
+        return Web3.keccak(hexstr=entry["raw"]).hex()
+    return None
+
+
+def recover(chain: Network, entry: dict, label: str) -> bool:
+    """
+    Recheck a pair that was signed or broadcast before the previous run stopped.
+
+    Returns True once its tx is confirmed, False if it has to be sent again.
+    """
+    w3 = get_web3(chain)
+    tx_hash = sent_hash(entry)
+
+    try:
+        return w3.eth.get_transaction_receipt(tx_hash).status == 1
+    except TransactionNotFound:
+        pass
+
+    # Push the signed tx again in case the node dropped it, then wait for it
+    if entry.get("raw"):
+        try:
+            w3.eth.send_raw_transaction(entry["raw"])
+        except Exception as err:
+            logger.debug(f"{label} | Rebroadcast {tx_hash}: {err}")
+
+    try:
+        return get_receipt_watcher(chain).wait(tx_hash, timeout=60).status == 1
+    except Exception as err:
+        logger.warning(f"{label} | {tx_hash} not confirmed, sending again: {err}")
+        return False
+
+
+def resume_pair(journal: Journal, pair: str, chain: Network, label: str) -> bool:
+    """
+    Return True if a pair already completed in a previous run.
+    """
+    entry = journal.get(pair)
+
+    if entry.get("state") == "confirmed":
+        logger.info(f"{label} Already confirmed in previous run, skipping")
+        return True
+
+    if sent_hash(entry) and recover(chain, entry, label):
+        logger.success(f"{label} Tx from previous run confirmed")
+        journal.record(pair, "confirmed", hash=sent_hash(entry))
+        return True
+
+    return False
+
+
+def attach(journal: Journal, wallet, recipient: str, amount):
+    """
+    Attach the pair's journal entry to the wallet that sends it.
+
+    Returns the amount to send, or None if the pair already completed. A tx
+    that was signed or broadcast but never confirmed is replaced by reusing
+    its nonce and its amount; otherwise the freshly planned amount is sent.
+    """
+    pair = journal.next_pair(wallet.address, recipient)
+    if resume_pair(journal, pair, wallet.chain, wallet.label):
+        return None
+
+    entry = journal.get(pair)
+    if sent_hash(entry):
+        wallet.prefetched["replace_nonce"] = entry["nonce"]
+        amount = entry.get("amount", amount)
+
+    wallet.journal = journal.entry(pair)
+    wallet.record("planned", amount=amount)
+    return amount
@@ -3,11 +3,12 @@ from sys import stderr
 from loguru import logger
 
 logger.remove()
+logger.configure(extra={"chain": ""})  # set per thread by multi-chain runs
 logger.add(
     stderr,
-    format="<white>{time:HH:mm:ss}</white> | <level>{message}</level>",
+    format="<white>{time:HH:mm:ss}</white> | {extra[chain]}<level>{message}</level>",
 )
 logger.add(
     f"log/debug.log",
-    format="<white>{time:HH:mm:ss}</white> | <level>{message}</level>",
+    format="<white>{time:HH:mm:ss}</white> | {extra[chain]}<level>{message}</level>",
 )
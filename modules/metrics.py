@@ -0,0 +1,202 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import settings
+
+"""
+In-process metrics for RPC calls and transfer phases.
+
+Histograms (RPC latency per method, time spent per transfer phase) and
+counters (retries per error class, gas paid) are kept in memory with fixed
+buckets, written at the end of a run to `METRICS_DIR` as JSONL or Prometheus
+text and summarized in a table, so a slow run can be pinned on RPC latency,
+confirmation time or sleeps.
+"""
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by interpolating inside its bucket.
+        """
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self.histograms: dict[tuple, Histogram] = {}
+        self.counters: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            key = self.key(name, labels)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            key = self.key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def value(self, name: str, **labels) -> float:
+        """
+        Current value of a counter, 0 if it was never incremented.
+        """
+        with self._lock:
+            return self.counters.get(self.key(name, labels), 0)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def phase(self, phase: str):
+        """
+        Time one transfer phase: build, gas, gas_hold, sign, broadcast, confirm
+        or sleep. Build includes the gas lookup it makes.
+        """
+        return self.timer("transfer_phase_seconds", phase=phase)
+
+    def gas_paid(self, chain: str, receipt):
+        """
+        Count the native fee of a mined tx, including the L1 data fee on rollups.
+        """
+        fee = receipt["gasUsed"] * receipt.get("effectiveGasPrice", 0)
+        l1_fee = receipt.get("l1Fee") or 0
+        fee += int(l1_fee, 16) if isinstance(l1_fee, str) else l1_fee
+
+        status = "success" if receipt["status"] == 1 else "reverted"
+        self.inc("transactions_total", chain=chain, status=status)
+        self.inc("gas_paid_native", fee / 10**18, chain=chain)
+
+    def to_jsonl(self) -> str:
+        lines = []
+        with self._lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                buckets = dict(zip(map(str, BUCKETS), hist.counts))
+                buckets["+Inf"] = hist.counts[-1]
+                lines.append(
+                    {
+                        "metric": name,
+                        "type": "histogram",
+                        "labels": dict(labels),
+                        "count": hist.count,
+                        "sum": round(hist.sum, 6),
+                        "buckets": buckets,
+                    }
+                )
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(
+                    {
+                        "metric": name,
+                        "type": "counter",
+                        "labels": dict(labels),
+                        "value": value,
+                    }
+                )
+        return "".join(json.dumps(line) + "\n" for line in lines)
+
+    def to_prometheus(self) -> str:
+        def series(name, labels, **extra):
+            pairs = [*labels, *extra.items()]
+            if not pairs:
+                return name
+            return name + "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines, typed = [], set()
+        with self._lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip([*map(str, BUCKETS), "+Inf"], hist.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{series(name + '_bucket', labels, le=bound)} {cumulative}"
+                    )
+                lines.append(f"{series(name + '_sum', labels)} {hist.sum:.6f}")
+                lines.append(f"{series(name + '_count', labels)} {hist.count}")
+
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{series(name, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str = None, fmt: str = None) -> str:
+        """
+        Write a snapshot to a timestamped file and return its path.
+        """
+        directory = directory or settings.METRICS_DIR
+        fmt = fmt or settings.METRICS_FORMAT
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        # The pid keeps shards started in the same second apart
+        path = os.path.join(directory, f"run-{stamp}-{os.getpid()}.{fmt}")
+
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            file.write(self.to_prometheus() if fmt == "prom" else self.to_jsonl())
+        return path
+
+    def summary(self) -> str:
+        from tabulate import tabulate
+
+        rows = []
+        with self._lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                rows.append(
+                    [
+                        name,
+                        ", ".join(f"{k}={v}" for k, v in labels),
+                        hist.count,
+                        f"{hist.sum:.2f}s",
+                        f"{hist.sum / hist.count * 1000:.1f}ms",
+                        f"{hist.quantile(0.95) * 1000:.1f}ms",
+                    ]
+                )
+            for (name, labels), value in sorted(self.counters.items()):
+                rows.append(
+                    [name, ", ".join(f"{k}={v}" for k, v in labels), value, "", "", ""]
+                )
+
+        headers = ["Metric", "Labels", "Count", "Total", "Mean", "p95"]
+        return tabulate(rows, headers=headers, tablefmt="simple")
+
+
+metrics = Metrics()
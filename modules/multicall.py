@@ -0,0 +1,125 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from web3 import Web3
+
+import settings
+from data.const import ABI_DIR, MULTICALL3_ADDRESS
+
+"""
+Multicall3-backed readers for balances and ERC20 metadata.
+
+Thousands of balanceOf / getEthBalance reads are packed into a handful of
+`aggregate3` eth_calls, chunked so each call's calldata stays under
+`MULTICALL_MAX_CALLDATA` bytes. With `workers` > 1 the chunks are sent
+concurrently.
+"""
+
+BALANCE_OF = bytes.fromhex("70a08231")
+GET_ETH_BALANCE = bytes.fromhex("4d2301cc")
+DECIMALS = bytes.fromhex("313ce567")
+SYMBOL = bytes.fromhex("95d89b41")
+
+
+@lru_cache(maxsize=None)
+def get_multicall3_abi() -> list[dict]:
+    """
+    Load the Multicall3 ABI on first use rather than at import time.
+    """
+    with open(os.path.join(ABI_DIR, "multicall3.json")) as file:
+        return json.load(file)
+
+
+def encode_address_call(selector: bytes, address: str) -> bytes:
+    return selector + bytes(12) + bytes.fromhex(address[2:])
+
+
+def encoded_size(call_data: bytes) -> int:
+    """
+    ABI-encoded size of one Call3 struct: head, offsets and padded calldata.
+    """
+    return 160 + -(-len(call_data) // 32) * 32
+
+
+def decode_uint(data: bytes | None) -> int | None:
+    return int.from_bytes(data[:32], "big") if data else None
+
+
+class Multicall:
+    def __init__(self, w3: Web3, max_calldata: int = None, workers: int = 1):
+        self.w3 = w3
+        self.max_calldata = max_calldata or settings.MULTICALL_MAX_CALLDATA
+        self.workers = workers
+        self.contract = w3.eth.contract(
+            address=MULTICALL3_ADDRESS, abi=get_multicall3_abi()
+        )
+
+    def chunks(self, calls: list[tuple[str, bytes]]):
+        """
+        Split calls into groups whose encoded calldata fits one eth_call.
+        """
+        chunk, size = [], 0
+        for target, call_data in calls:
+            call_size = encoded_size(call_data)
+            if chunk and size + call_size > self.max_calldata:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append((target, True, call_data))
+            size += call_size
+        if chunk:
+            yield chunk
+
+    def aggregate(self, calls: list[tuple[str, bytes]]) -> list[bytes | None]:
+        """
+        Execute (target, calldata) calls, returning raw results or None on failure.
+        """
+
+        def execute(chunk):
+            return self.contract.functions.aggregate3(chunk).call()
+
+        chunks = self.chunks(calls)
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                replies = list(executor.map(execute, chunks))
+        else:
+            replies = map(execute, chunks)
+
+        return [
+            data if success else None for reply in replies for success, data in reply
+        ]
+
+    def get_native_balances(self, addresses: list[str]) -> dict[str, int]:
+        calls = [
+            (MULTICALL3_ADDRESS, encode_address_call(GET_ETH_BALANCE, address))
+            for address in addresses
+        ]
+        balances = self.aggregate(calls)
+        return {a: decode_uint(b) or 0 for a, b in zip(addresses, balances)}
+
+    def get_token_balances(self, token: str, addresses: list[str]) -> dict[str, int]:
+        token = self.w3.to_checksum_address(token)
+        calls = [
+            (token, encode_address_call(BALANCE_OF, address)) for address in addresses
+        ]
+        balances = self.aggregate(calls)
+        return {a: decode_uint(b) or 0 for a, b in zip(addresses, balances)}
+
+    def get_token_info(self, token: str, address: str = None) -> dict:
+        """
+        Return token decimals, symbol and, if `address` is given, its balance.
+        """
+        token = self.w3.to_checksum_address(token)
+        calls = [(token, DECIMALS), (token, SYMBOL)]
+        if address:
+            calls.append((token, encode_address_call(BALANCE_OF, address)))
+
+        decimals, symbol, *balance = self.aggregate(calls)
+        info = {
+            "decimals": decode_uint(decimals),
+            "symbol": self.w3.codec.decode(["string"], symbol)[0],
+        }
+        if address:
+            info["balance"] = decode_uint(balance[0]) or 0
+        return info
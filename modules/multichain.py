@@ -0,0 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from tabulate import tabulate
+
+import settings
+from data.const import CHAIN_MAPPING
+from models.network import Network
+from modules.logger import logger
+from modules.metrics import metrics
+from modules.sources import InputError
+from modules.utils import stopping
+
+"""
+Multi-chain runs: the same transfer on every chain in `CHAINS` at once.
+
+Each chain runs in its own thread. Providers, gas oracles, nonce managers,
+receipt watchers and journals are already kept per chain, and every chain
+paces its own wallets, so total wall time tracks the slowest chain rather
+than the sum of all of them. Log lines are prefixed with their chain.
+
+Ctrl+C sets `stopping`: each chain finishes the transfer in hand, records it
+in its journal and takes no new job.
+"""
+
+
+def selected_chains() -> list[Network]:
+    """
+    Networks picked in settings: every name in `CHAINS`, or just `CHAIN`.
+    """
+    names = settings.CHAINS or [settings.CHAIN]
+    unknown = [name for name in names if name not in CHAIN_MAPPING]
+    if unknown:
+        raise InputError(
+            f"Unknown chain {', '.join(unknown)}, expected {', '.join(CHAIN_MAPPING)}"
+        )
+    return [CHAIN_MAPPING[name] for name in dict.fromkeys(names)]
+
+
+def run_chain(process: Callable, params: dict, chain: Network) -> list:
+    """
+    Run one chain's transfer and return its row of the summary table.
+    """
+    params = {**params, "chain": chain, "token": chain.native_token}
+
+    start = time.perf_counter()
+    with logger.contextualize(chain=f"{chain.name} | "):
+        try:
+            process(params)
+            result = "done"
+        except Exception as err:
+            logger.error(f"Run failed: {err}")
+            result = f"failed: {err}"
+        elapsed = time.perf_counter() - start
+        logger.info(f"Finished in {elapsed:.1f}s")
+
+    confirmed, reverted, gas_paid = (
+        metrics.value("transactions_total", chain=chain.name, status="success"),
+        metrics.value("transactions_total", chain=chain.name, status="reverted"),
+        metrics.value("gas_paid_native", chain=chain.name),
+    )
+    return [
+        chain.name,
+        f"{elapsed:.1f}s",
+        int(confirmed),
+        int(reverted),
+        f"{gas_paid:.6f} {chain.native_token}",
+        result,
+    ]
+
+
+def run_chains(process: Callable, params: dict, chains: list[Network]) -> str:
+    """
+    Run `process(params)` on every chain in parallel and return a summary table.
+    """
+    if params["token"] == "ERC20":
+        # settings.TOKEN_ADDRESS is one address, token contracts differ per chain
+        raise InputError("Multi-chain runs can only send the native token")
+
+    logger.info(f"Running on {len(chains)} chains: {', '.join(c.name for c in chains)}")
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(chains))
+    try:
+        rows = list(executor.map(lambda c: run_chain(process, params, c), chains))
+    except KeyboardInterrupt:
+        # Ctrl+C only reaches this thread; tell the chains to stop between jobs
+        stopping.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    headers = ["Chain", "Wall", "Confirmed", "Reverted", "Gas paid", "Result"]
+    table = tabulate(rows, headers=headers, tablefmt="simple")
+    return f"All chains finished in {elapsed:.1f}s\n{table}"
@@ -0,0 +1,88 @@
+import heapq
+
+from web3 import Web3
+
+from modules.state import WalletTable
+
+"""
+Local nonce allocation for a single sender.
+
+Nonces are handed out sequentially from memory so several transactions can
+be broadcast back-to-back without waiting for receipts. Nonces that were
+allocated but never broadcast are released and handed out again first, so
+the sequence stays gap-free. The counters live in the chain's wallet table,
+a manager is only a handle to its row.
+"""
+
+
+class NonceManager:
+    __slots__ = ("w3", "address", "table", "row")
+
+    def __init__(self, w3: Web3, address: str, table: WalletTable):
+        self.w3 = w3
+        self.address = address
+        self.table = table
+        self.row = table.row(address)
+
+    @property
+    def next_nonce(self) -> int | None:
+        nonce = self.table.nonces[self.row]
+        return None if nonce < 0 else nonce
+
+    def _pending_count(self) -> int:
+        return self.w3.eth.get_transaction_count(self.address, "pending")
+
+    def allocate(self) -> int:
+        """
+        Return the next nonce to use, reusing released ones first.
+        """
+        nonces, row = self.table.nonces, self.row
+        with self.table.lock(row):
+            if nonces[row] < 0:
+                nonces[row] = self._pending_count()
+
+            released = self.table.released.get(row)
+            if released:
+                return heapq.heappop(released)
+
+            nonce = nonces[row]
+            nonces[row] += 1
+            return nonce
+
+    def seed(self, nonce: int):
+        """
+        Initialise the counter from a prefetched pending count, if not yet synced.
+        """
+        with self.table.lock(self.row):
+            if self.table.nonces[self.row] < 0:
+                self.table.nonces[self.row] = nonce
+
+    def release(self, nonce: int):
+        """
+        Return a nonce whose tx never reached the network.
+        """
+        nonces, row = self.table.nonces, self.row
+        with self.table.lock(row):
+            released = self.table.released.setdefault(row, [])
+            if nonce == nonces[row] - 1:
+                nonces[row] -= 1
+                # Collapse released nonces that are now at the tip
+                while released and max(released) == nonces[row] - 1:
+                    released.remove(nonces[row] - 1)
+                    heapq.heapify(released)
+                    nonces[row] -= 1
+            elif nonce not in released:
+                heapq.heappush(released, nonce)
+
+            if not released:
+                del self.table.released[row]
+
+    def resync(self) -> int:
+        """
+        Reset the local counter to the node's pending count.
+        """
+        with self.table.lock(self.row):
+            self.table.nonces[self.row] = self._pending_count()
+            # Everything below the pending count is taken
+            self.table.released.pop(self.row, None)
+            return self.table.nonces[self.row]
@@ -0,0 +1,131 @@
+import itertools
+import queue
+import threading
+from typing import Iterable
+
+import settings
+from models.transfer import Transfer
+from modules.journal import Journal, attach
+from modules.logger import logger
+from modules.utils import pace
+from modules.wallet import Wallet, classify_error
+
+"""
+Pipelined dispense: one sender broadcasts every transfer back-to-back using
+locally allocated nonces, while a separate confirmer thread waits for the
+receipts. Dropped txs are replaced at the same nonce with bumped gas. Nonces
+left unused by failed broadcasts are handed to the next transfer.
+"""
+
+FEE_FIELDS = ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice")
+
+
+def confirm_worker(wallet: Wallet, pending: queue.Queue, results: dict):
+    while True:
+        item = pending.get()
+        if item is None:
+            return
+
+        index, tx, tx_label, tx_hash, entry = item
+        try:
+            results[index] = wallet.confirm_tx(tx_hash, tx_label)
+        except Exception as err:
+            logger.warning(f"{tx_label} | No receipt for {tx_hash.hex()}: {err}")
+            wallet.journal = entry  # own Wallet instance, safe to rebind
+            results[index] = refill_nonce(wallet, tx, tx_label)
+
+        if entry:
+            entry.record("confirmed" if results[index] else "failed")
+
+
+def refill_nonce(wallet: Wallet, tx: dict, tx_label: str) -> bool:
+    """
+    Replace a tx whose receipt never arrived, unless its nonce got mined.
+
+    The replacement keeps the nonce and bumps the fees past the node's 10%
+    replacement rule; it counts as sent only once its own receipt is in.
+    """
+    mined_count = wallet.w3.eth.get_transaction_count(wallet.address, "latest")
+    if mined_count > tx["nonce"]:
+        logger.info(f"{tx_label} | Nonce {tx['nonce']} already mined")
+        return True
+
+    logger.warning(f"{tx_label} | Nonce {tx['nonce']} dropped, replacing")
+    replacement = wallet.get_gas(dict(tx), gwei_multiplier=1.7)
+    for field in FEE_FIELDS:
+        if field in tx:
+            replacement[field] = max(replacement[field], tx[field] * 11 // 10 + 1)
+
+    signed_tx = wallet.sign_tx(replacement)
+    try:
+        tx_hash = wallet.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    except Exception as err:
+        error_class = classify_error(str(err))
+        if error_class == "nonce_too_low":
+            logger.info(f"{tx_label} | Nonce {tx['nonce']} mined meanwhile")
+            return True
+        if error_class != "already_known":
+            logger.error(f"{tx_label} | Replacement failed: {err}")
+            return False
+        tx_hash = signed_tx.hash
+
+    wallet.record("broadcast", hash=tx_hash.hex(), nonce=tx["nonce"])
+    logger.info(f"{tx_label} | {wallet.chain.explorer}/tx/{tx_hash.hex()}")
+    try:
+        return wallet.confirm_tx(tx_hash, tx_label)
+    except Exception as err:
+        logger.error(f"{tx_label} | Replacement not confirmed: {err}")
+        return False
+
+
+def dispense_pipelined(
+    transfer: Transfer, jobs: Iterable[tuple], total: int, journal: Journal = None
+) -> list:
+    """
+    Run a dispense from a single sender without waiting on receipts between sends.
+    """
+    jobs = iter(jobs)
+    first_job = next(jobs, None)
+    if first_job is None:
+        return []
+    jobs = itertools.chain([first_job], jobs)
+
+    wallet = Wallet(first_job[1], chain=transfer.chain)
+    # Separate instance for the confirmer; both share the nonce manager
+    confirming_wallet = Wallet(first_job[1], chain=transfer.chain)
+
+    pending = queue.Queue()
+    results: dict[int, bool] = {}
+    confirmer = threading.Thread(
+        target=confirm_worker,
+        args=(confirming_wallet, pending, results),
+        daemon=True,
+    )
+    confirmer.start()
+
+    try:
+        for index, _, recipient, amount in jobs:
+            wallet.counter = f"[{index}/{total}]"
+
+            if journal:
+                amount = attach(journal, wallet, recipient, amount)
+                if amount is None:
+                    results[index] = True
+                    continue
+
+            prepared = wallet.build_transfer(transfer.token, amount, recipient)
+            tx_hash = wallet.broadcast_tx(*prepared) if prepared else None
+            if tx_hash is None:
+                wallet.record("failed")
+                results[index] = False
+                continue
+
+            pending.put((index, *prepared, tx_hash, wallet.journal))
+
+            if index < total:
+                pace()
+    finally:
+        pending.put(None)
+        confirmer.join()
+
+    return [results[index] for index in sorted(results)]
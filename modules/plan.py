@@ -0,0 +1,219 @@
+import json
+
+import settings
+from data.const import CHAIN_MAPPING, RECIPIENTS_FILE
+from modules.sources import (
+    InputError,
+    check_pair_counts,
+    count,
+    iter_keys,
+    iter_recipients,
+)
+
+"""
+Headless runs driven by a plan file instead of the interactive prompts.
+
+A plan is a JSON object, or a JSONL file whose first line is that object and
+whose remaining lines are per-recipient overrides:
+
+    {"chain": "base", "token": "native", "action": "dispense", "amount": "even"}
+    {"recipient": "0x...", "amount": 0.5}
+
+`chain` may also be a list of chains to run the plan on in parallel.
+`token` is "native" or an ERC20 address; `amount` is "max", "even", a number
+or a [min, max] range. An optional integer `seed` makes the drawn amounts
+reproducible across runs and shards. Overrides may also be given inline as
+an "overrides": {recipient: amount} object. The whole plan is validated,
+input files included, before anything is sent.
+"""
+
+FIELDS = {"chain", "token", "action", "amount", "overrides", "seed"}
+
+AMOUNTS = {
+    "collect": ["max", "exact"],
+    "dispense": ["even", "exact"],
+    "disperse": ["even", "exact"],
+    "one-to-one": ["max", "exact"],
+}
+
+
+class PlanError(InputError):
+    pass
+
+
+def read_plan(path: str) -> dict:
+    try:
+        with open(path) as file:
+            if not path.endswith(".jsonl"):
+                return json.load(file)
+
+            lines = [(n, line) for n, line in enumerate(file, start=1) if line.strip()]
+            if not lines:
+                raise PlanError(f"{path} is empty")
+
+            plan = json.loads(lines[0][1])
+            overrides = plan.setdefault("overrides", {})
+            for line_number, line in lines[1:]:
+                row = json.loads(line)
+                if set(row) != {"recipient", "amount"}:
+                    raise PlanError(
+                        f"{path}:{line_number}: expected recipient and amount"
+                    )
+                overrides[row["recipient"]] = row["amount"]
+            return plan
+    except FileNotFoundError:
+        raise PlanError(f"{path} not found") from None
+    except json.JSONDecodeError as err:
+        raise PlanError(f"{path}: invalid JSON: {err}") from None
+
+
+def parse_amount(value, label: str) -> list[float]:
+    """
+    Normalize an exact amount to the [min, max] range the wallets expect.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = [value, value]
+
+    if (
+        not isinstance(value, list)
+        or len(value) != 2
+        or not all(isinstance(v, (int, float)) for v in value)
+    ):
+        raise PlanError(f"{label}: expected a number or a [min, max] range")
+    if not 0 < value[0] <= value[1]:
+        raise PlanError(f"{label}: amounts must be positive with min <= max")
+
+    return [float(v) for v in value]
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parse an `i/n` shard spec: this worker runs the i-th of n index ranges.
+    """
+    try:
+        index, shards = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise PlanError(f"Invalid shard '{value}', expected i/n") from None
+
+    if not 0 <= index < shards:
+        raise PlanError(f"Invalid shard '{value}', need 0 <= i < n")
+    return index, shards
+
+
+def shard_range(total: int, shard: tuple[int, int]) -> tuple[int, int]:
+    """
+    Return the [start, stop) slice of pair positions owned by a shard.
+    """
+    index, shards = shard
+    return total * index // shards, total * (index + 1) // shards
+
+
+def check_overrides(overrides: dict) -> dict:
+    """
+    Checksum override recipients and make sure each one is in recipients.txt.
+    """
+    from eth_utils import is_address, to_checksum_address
+
+    checked = {}
+    for recipient, amount in overrides.items():
+        if not is_address(recipient):
+            raise PlanError(f"overrides: not a valid address: {recipient}")
+        checked[to_checksum_address(recipient)] = parse_amount(
+            amount, f"overrides[{recipient}]"
+        )
+
+    missing = set(checked)
+    for recipient in iter_recipients():
+        missing.discard(recipient)
+    if missing:
+        raise PlanError(
+            f"overrides: not listed in {RECIPIENTS_FILE}: {', '.join(sorted(missing))}"
+        )
+
+    return checked
+
+
+def load_plan(path: str, shard: str = None) -> dict:
+    """
+    Read and validate a plan, returning the params `process_wallets` takes.
+
+    The plan's chains, token address and seed replace `settings.CHAINS`,
+    `settings.TOKEN_ADDRESS` and `settings.AMOUNT_SEED`, which the wallets and
+    planners read them from.
+    """
+    plan = read_plan(path)
+    if not isinstance(plan, dict):
+        raise PlanError(f"{path}: expected a JSON object")
+
+    unknown = set(plan) - FIELDS
+    missing = FIELDS - {"overrides", "seed"} - set(plan)
+    if unknown or missing:
+        raise PlanError(
+            f"{path}: unknown fields {sorted(unknown)}, missing {sorted(missing)}"
+        )
+
+    # One chain, or a list of chains to run the same plan on in parallel
+    names = plan["chain"] if isinstance(plan["chain"], list) else [plan["chain"]]
+    if not names or not all(name in CHAIN_MAPPING for name in names):
+        raise PlanError(f"chain: expected one or a list of {', '.join(CHAIN_MAPPING)}")
+    chain = CHAIN_MAPPING[names[0]]
+
+    action = plan["action"]
+    if action not in AMOUNTS:
+        raise PlanError(f"action: expected one of {', '.join(AMOUNTS)}")
+
+    token_address = ""
+    if plan["token"] == "native":
+        token = chain.native_token
+    else:
+        from eth_utils import is_address, to_checksum_address
+
+        if not is_address(plan["token"]):
+            raise PlanError("token: expected 'native' or an ERC20 address")
+        token, token_address = "ERC20", to_checksum_address(plan["token"])
+        if len(names) > 1:
+            raise PlanError("token: multi-chain plans can only send the native token")
+
+    amount = plan["amount"]
+    if amount in ("max", "even"):
+        if amount not in AMOUNTS[action]:
+            raise PlanError(f"amount: '{amount}' is not supported for {action}")
+    else:
+        amount = parse_amount(amount, "amount")
+
+    overrides = plan.get("overrides") or {}
+    if overrides and amount == "even":
+        raise PlanError("overrides can't be combined with an even split")
+    if overrides and action == "collect":
+        raise PlanError("overrides: collect has a single recipient")
+
+    # Full passes over both files: validates every line before anything is sent
+    keys_count = count(iter_keys())
+    recipients_count = count(iter_recipients())
+    check_pair_counts(action, keys_count, recipients_count)
+    overrides = check_overrides(overrides)
+
+    if shard is not None:
+        if action in ("dispense", "disperse"):
+            # A single sender can't be split: the shards would race for nonces
+            raise PlanError(f"{action} runs from a single sender and can't be sharded")
+        shard = parse_shard(shard)
+
+    seed = plan.get("seed")
+    if seed is not None and not isinstance(seed, int):
+        raise PlanError("seed: expected an integer")
+
+    settings.CHAIN = chain.name
+    settings.CHAINS = names
+    settings.TOKEN_ADDRESS = token_address
+    if seed is not None:
+        settings.AMOUNT_SEED = seed
+
+    return {
+        "token": token,
+        "action": action,
+        "amount": amount,
+        "chain": chain,
+        "overrides": overrides,
+        "shard": shard,
+    }
@@ -0,0 +1,150 @@
+import time
+
+from web3 import Web3
+
+import settings
+from models.transfer import Transfer
+from modules import cache
+from modules.accounts import address_of
+from modules.batch import batch_request, batched
+from modules.cache import chain_key, token_key
+from modules.gas import get_gas_oracle
+from modules.logger import logger
+from modules.wallet import get_erc20_abi
+
+"""
+Pre-flight stage: fetch balances, nonces, chain id, fees and gas estimates for
+a chunk of transfers with JSON-RPC batch requests, so each Wallet starts with
+the data it would otherwise fetch in ~10 serial round trips. Fee data is
+handed to the chain's gas oracle rather than to individual wallets.
+
+Chunks are fetched right before their first job is sent. With pacing on, a
+chunk of 100 can take most of an hour to work through, so once a chunk's data
+is older than `PREFLIGHT_MAX_AGE` the jobs left in it are fetched again.
+"""
+
+
+def to_int(value) -> int | None:
+    return int(value, 16) if value else None
+
+
+def prefetch_chunk(w3: Web3, transfer: Transfer, chunk: list[tuple]) -> list[dict]:
+    """
+    Fetch pre-flight data for a chunk of (index, sender, recipient, amount) jobs.
+    """
+    token = None
+    if transfer.token == "ERC20":
+        token = w3.eth.contract(
+            address=w3.to_checksum_address(settings.TOKEN_ADDRESS), abi=get_erc20_abi()
+        )
+
+    chain_name = transfer.chain.name
+    chain_id = cache.metadata.get(chain_key(chain_name))
+    metadata = token and cache.metadata.get(token_key(chain_name, token.address))
+
+    calls = [
+        ("eth_chainId", []),
+        ("eth_gasPrice", []),
+        ("eth_maxPriorityFeePerGas", []),
+        ("eth_getBlockByNumber", ["latest", False]),
+    ]
+    if token and not metadata:
+        for fn_name in ("decimals", "symbol"):
+            data = token.encodeABI(fn_name)
+            calls.append(("eth_call", [{"to": token.address, "data": data}, "latest"]))
+
+    # Max sweeps to EOAs use a fixed 21000 gas (see modules/fees)
+    estimate = not token and transfer.amount != "max"
+    shared_calls = len(calls)
+    addresses = [address_of(sender) for _, sender, _, _ in chunk]
+
+    for address, (_, _, recipient, _) in zip(addresses, chunk):
+        calls.append(("eth_getTransactionCount", [address, "pending"]))
+        if token:
+            data = token.encodeABI("balanceOf", [address])
+            calls.append(("eth_call", [{"to": token.address, "data": data}, "latest"]))
+        else:
+            calls.append(("eth_getBalance", [address, "latest"]))
+        if estimate:
+            tx = {
+                "from": address,
+                "to": w3.to_checksum_address(recipient),
+                "value": "0x0",
+            }
+            calls.append(("eth_estimateGas", [tx]))
+
+    results = batch_request(w3, calls)
+    fetched_chain_id, gas_price, priority_fee, block = results[:4]
+
+    if block:
+        get_gas_oracle(transfer.chain).update(
+            block, to_int(gas_price) or 0, to_int(priority_fee) or 0
+        )
+
+    shared = {"chain_id": chain_id or to_int(fetched_chain_id)}
+    if chain_id is None and shared["chain_id"]:
+        cache.metadata.set(chain_key(chain_name), shared["chain_id"])
+
+    if metadata:
+        shared.update(metadata)
+    elif token:
+        decimals, symbol = results[4:shared_calls]
+        if decimals and symbol:
+            shared["decimals"] = w3.codec.decode(
+                ["uint8"], bytes.fromhex(decimals[2:])
+            )[0]
+            shared["symbol"] = w3.codec.decode(["string"], bytes.fromhex(symbol[2:]))[0]
+            cache.metadata.set(
+                token_key(chain_name, token.address),
+                {"decimals": shared["decimals"], "symbol": shared["symbol"]},
+            )
+
+    stride = 3 if estimate else 2
+    per_job = results[shared_calls:]
+    prefetched = []
+    seen = set()
+
+    for i, address in enumerate(addresses):
+        job_results = per_job[i * stride : (i + 1) * stride]
+        data = dict(shared)
+
+        # Balance and nonce only hold for the first transfer of a sender
+        if address not in seen:
+            seen.add(address)
+            data["nonce"] = to_int(job_results[0])
+            if token:
+                data["token_balance"] = to_int(job_results[1])
+            else:
+                data["balance"] = to_int(job_results[1])
+
+        if estimate:
+            data["gas"] = to_int(job_results[2])
+
+        prefetched.append({k: v for k, v in data.items() if v is not None})
+
+    return prefetched
+
+
+def iter_prefetched(w3: Web3, transfer: Transfer, jobs: list[tuple]):
+    """
+    Yield (job, prefetched) pairs, re-fetching a chunk's remaining jobs once stale.
+    """
+    for chunk in batched(jobs, settings.PREFLIGHT_BATCH_SIZE):
+        while chunk:
+            fetched_at = time.monotonic()
+            try:
+                prefetched = prefetch_chunk(w3, transfer, chunk)
+            except Exception as err:
+                logger.warning(
+                    f"Pre-flight batch failed, falling back to live calls: {err}"
+                )
+                prefetched = [{} for _ in chunk]
+
+            for position, pair in enumerate(zip(chunk, prefetched)):
+                age = time.monotonic() - fetched_at
+                if position and age > settings.PREFLIGHT_MAX_AGE:
+                    chunk = chunk[position:]
+                    break
+                yield pair
+            else:
+                chunk = []
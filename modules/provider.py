@@ -0,0 +1,142 @@
+import threading
+
+import requests
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from requests.adapters import HTTPAdapter
+from web3 import AsyncHTTPProvider, AsyncWeb3, HTTPProvider, Web3
+from web3.middleware import async_geth_poa_middleware, geth_poa_middleware
+
+import settings
+from models.network import Network
+from modules.metrics import metrics
+from modules.router import AsyncRouterProvider, RouterProvider
+
+"""
+Per-chain registry of Web3 clients.
+
+Every Wallet on a chain shares one Web3 instance backed by a keep-alive
+`requests.Session`, so a run over thousands of keys reuses the same
+connection pool instead of opening a new HTTP session per wallet.
+"""
+
+_registry: dict[str, Web3] = {}
+_lock = threading.Lock()
+
+
+def build_session(pool_size: int = None) -> requests.Session:
+    """
+    Create a requests session with a keep-alive connection pool.
+    """
+    pool_size = pool_size or settings.RPC_POOL_SIZE
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider that posts through its own pooled session.
+
+    The stock provider keeps one session per thread, which defeats pooling
+    when wallets are processed from worker threads.
+    """
+
+    def __init__(self, endpoint_uri: str, session: requests.Session = None):
+        super().__init__(endpoint_uri, request_kwargs={"timeout": settings.RPC_TIMEOUT})
+        self.session = session or build_session()
+
+    def post(self, data: bytes) -> bytes:
+        response = self.session.post(
+            self.endpoint_uri, data=data, **self.get_request_kwargs()
+        )
+        response.raise_for_status()
+        return response.content
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        return self.decode_rpc_response(self.post(request_data))
+
+
+class PooledAsyncHTTPProvider(AsyncHTTPProvider):
+    """
+    AsyncHTTPProvider with its own aiohttp pool.
+
+    The session is opened lazily so it binds to the running event loop. Pacing
+    is left to the `AsyncRouterProvider` in front of it.
+    """
+
+    def __init__(self, endpoint_uri: str):
+        super().__init__(
+            endpoint_uri,
+            request_kwargs={"timeout": ClientTimeout(total=settings.RPC_TIMEOUT)},
+        )
+        self.session: ClientSession = None
+
+    async def post(self, data: bytes) -> bytes:
+        if self.session is None:
+            connector = TCPConnector(limit=settings.RPC_POOL_SIZE)
+            self.session = ClientSession(connector=connector)
+
+        async with self.session.post(
+            self.endpoint_uri, data=data, **self.get_request_kwargs()
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        with metrics.timer("rpc_request_seconds", method=method):
+            return self.decode_rpc_response(await self.post(request_data))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+def build_async_web3(chain: Network, rate: float = None) -> AsyncWeb3:
+    """
+    Create an AsyncWeb3 instance routed over the chain's endpoints, each capped
+    at `rate` requests per second.
+    """
+    providers = [PooledAsyncHTTPProvider(url) for url in chain.endpoints]
+    w3 = AsyncWeb3(AsyncRouterProvider(providers, rate))
+    w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+    return w3
+
+
+def build_web3(chain: Network) -> Web3:
+    """
+    Create a Web3 instance routed over the chain's endpoints, with PoA middleware.
+    """
+    providers = [PooledHTTPProvider(url) for url in chain.endpoints]
+    w3 = Web3(RouterProvider(providers))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return w3
+
+
+def get_web3(chain: Network) -> Web3:
+    """
+    Return the shared Web3 instance for a chain, creating it on first use.
+    """
+    w3 = _registry.get(chain.name)
+    if w3 is not None:
+        return w3
+
+    with _lock:
+        if chain.name not in _registry:
+            _registry[chain.name] = build_web3(chain)
+        return _registry[chain.name]
+
+
+def close_all():
+    """
+    Close all pooled sessions and clear the registry.
+    """
+    with _lock:
+        for w3 in _registry.values():
+            w3.provider.close()
+        _registry.clear()
@@ -3,11 +3,21 @@ from questionary import Style
 from tabulate import tabulate
 
 import settings
-from data.const import CHAIN_MAPPING, KEYS, RECIPIENTS
+from data.const import RECIPIENTS_FILE
 from models.network import Network
+from modules.accounts import address_of
 from modules.logger import logger
+from modules.multichain import selected_chains
+from modules.sources import (
+    InputError,
+    check_pair_counts,
+    count,
+    first,
+    iter_keys,
+    iter_recipients,
+    keys_file,
+)
 from modules.utils import truncate
-from modules.wallet import Wallet
 
 """
 This module provides an interactive CLI using 
@@ -48,12 +58,19 @@ def get_exact_amount():
 
 
 def build_confirmation_message(
-    action: str, amount: str | list[float], chain: Network, dispensor: str, symbol: str
+    action: str,
+    amount: str | list[float],
+    chains: list[Network],
+    dispensor: str,
+    symbol: str,
+    keys_count: int,
+    recipients_count: int,
+    gas_rows: list[list[str]] = None,
 ):
     """
     Builds a user-friendly table with the transfer data using tabulate.
     """
-    collector = truncate(str(RECIPIENTS[0]))
+    collector = truncate(first(iter_recipients(), RECIPIENTS_FILE))
     dispensor = truncate(dispensor)
 
     # Convert 'amount' into a readable string
@@ -63,18 +80,16 @@ def build_confirmation_message(
         amount_str = amount.upper()
 
     if action == "collect":
-        sender = f"{str(len(KEYS)) + ' accounts'}"
+        sender = f"{keys_count} accounts"
         recipient = collector
-    elif action == "dispense":
+    elif action in ("dispense", "disperse"):
         sender = dispensor
         recipient = (
-            truncate(RECIPIENTS[0])
-            if len(RECIPIENTS) == 1
-            else f"{len(RECIPIENTS)} recipients"
+            collector if recipients_count == 1 else f"{recipients_count} recipients"
         )
     elif action == "one-to-one":
-        sender = f"{str(len(KEYS)) + ' accounts'}"
-        recipient = f"{str(len(RECIPIENTS)) + ' recipients'}"
+        sender = f"{keys_count} accounts"
+        recipient = f"{recipients_count} recipients"
 
     table_data = [
         ["Mode", action],
@@ -82,48 +97,102 @@ def build_confirmation_message(
         ["Token", f"{BRIGHT_GREEN}{symbol}{RESET}"],
         ["From", sender],
         ["To", recipient],
-        ["Chain", f"{BRIGHT_GREEN}{chain.name.upper()}{RESET}"],
+        ["Chain", f"{BRIGHT_GREEN}{', '.join(c.name.upper() for c in chains)}{RESET}"],
     ]
 
+    table_data += gas_rows or []
+
     confirmation_table = tabulate(table_data, tablefmt="double_grid")
     return confirmation_table
 
 
-def get_user_input() -> dict:
-    chain = CHAIN_MAPPING.get(settings.CHAIN)
-    ETH = chain.native_token  # ETH | BNB | POL etc.
-    wallet = Wallet(KEYS[0], chain=chain)
+def get_token_symbol(chain: Network) -> str:
+    # Imported here: web3 is only needed once a token has to be looked up
+    from modules.wallet import Wallet
 
-    if settings.TOKEN_ADDRESS:
-        symbol = wallet.get_token(settings.TOKEN_ADDRESS, as_dict=True)["symbol"]
+    wallet = Wallet(first(iter_keys(), keys_file()), chain=chain)
+    return wallet.get_token_metadata(settings.TOKEN_ADDRESS)["symbol"]
+
+
+def estimate_gas_rows(
+    chains: list[Network],
+    action: str,
+    token: str,
+    keys_count: int,
+    recipients_count: int,
+) -> list[list[str]]:
+    """
+    Projected gas cost of the run per chain and, with a gas ceiling, the savings.
+    """
+    # Imported here: both need web3, which the prompts don't
+    from modules.fees import TOKEN_TRANSFER_GAS, TRANSFER_GAS
+    from modules.scheduler import get_scheduler, gwei
+
+    is_token = token == "ERC20"
+    txs = recipients_count if action in ("dispense", "disperse") else keys_count
+    if action == "disperse":
+        from modules.disperse import BASE_GAS, GAS_PER_RECIPIENT
+
+        gas = BASE_GAS + txs * GAS_PER_RECIPIENT["token" if is_token else "native"]
+    else:
+        gas = txs * (TOKEN_TRANSFER_GAS if is_token else TRANSFER_GAS)
+
+    costs, ceilings, savings = [], [], []
+    for chain in chains:
+        try:
+            projection = get_scheduler(chain).project(gas)
+        except Exception as err:
+            logger.warning(f"Gas estimate on {chain.name} failed: {err}")
+            continue
+
+        costs.append(f"{projection['now'] / 10**18:.6f} {chain.native_token}")
+        if "ceiling" in projection:
+            ceilings.append(
+                f"{gwei(projection['ceiling'])} gwei "
+                f"(now {gwei(projection['base_fee'])})"
+            )
+            saved = projection["now"] - projection["at_ceiling"]
+            savings.append(f"{saved / 10**18:.6f} {chain.native_token}")
+
+    rows = [["Est. gas cost", ", ".join(costs)]] if costs else []
+    if ceilings:
+        rows += [
+            ["Gas ceiling", ", ".join(ceilings)],
+            ["Est. savings", ", ".join(savings)],
+        ]
+    return rows
+
+
+def get_user_input() -> dict:
+    chains = selected_chains()
+    chain = chains[0]
+    # ETH | BNB | POL etc., e.g. ETH/BNB when several chains run at once
+    ETH = "/".join(dict.fromkeys(c.native_token for c in chains))
 
     # Q1: Get action
     action = questionary.select(
         f"Select action:",
-        choices=["collect", "dispense", "one-to-one"],
+        choices=["collect", "dispense", "disperse", "one-to-one"],
         style=style,
     ).ask()
 
-    if action == "collect" and len(RECIPIENTS) > 1:
-        logger.warning("Only one recipient (evm address) allowed for collector mode")
-        exit(0)
-
-    if action == "dispense" and len(KEYS) > 1:
-        logger.warning("Only one sender (private key) allowed for dispensor mode")
+    if not action:
         exit(0)
 
-    if action == "one-to-one" and len(KEYS) != len(RECIPIENTS):
-        logger.warning(
-            "Number of keys & recipients should be the same for one-to-one transfer"
-        )
-        exit(0)
+    # Full passes over both files: validates every line before anything is sent
+    keys_count = count(iter_keys())
+    recipients_count = count(iter_recipients())
 
-    if not action:
+    try:
+        check_pair_counts(action, keys_count, recipients_count)
+    except InputError as err:
+        logger.warning(err)
         exit(0)
 
     # Q2: Get token
     token_list = [ETH]
-    if settings.TOKEN_ADDRESS:
+    if settings.TOKEN_ADDRESS and len(chains) == 1:
+        symbol = get_token_symbol(chain)
         token_list.append(
             questionary.Choice(
                 value="ERC20",
@@ -144,7 +213,7 @@ def get_user_input() -> dict:
     if action == "collect":
         amount = "max"
 
-    if action == "dispense":
+    if action in ("dispense", "disperse"):
         amount = questionary.select(
             f"Select amount to {action}:",
             choices=["even", "exact"],
@@ -167,8 +236,13 @@ def get_user_input() -> dict:
         exit(0)
 
     # Summorize transfer and prompt for final confrimation
-    msg_params = [action, amount, wallet.chain, wallet.address]
+    dispensor = address_of(first(iter_keys(), keys_file()))
+    msg_params = [action, amount, chains, dispensor]
     msg_params.append(ETH) if token == ETH else msg_params.append(symbol)
+    msg_params += [keys_count, recipients_count]
+    msg_params.append(
+        estimate_gas_rows(chains, action, token, keys_count, recipients_count)
+    )
 
     print()  # line break
     print(build_confirmation_message(*msg_params))
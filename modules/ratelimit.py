@@ -0,0 +1,164 @@
+import asyncio
+import random
+import threading
+import time
+
+import settings
+
+"""
+Rate limiting primitives shared by the sending engines.
+
+Token buckets are adaptive: a 429 or rate-limit error halves the bucket's
+rate and every success adds a little back, up to the configured ceiling
+(additive increase, multiplicative decrease). Retries back off exponentially
+with jitter so throttled workers don't retry in lockstep.
+"""
+
+MIN_RATE = 1.0  # requests per second an adaptive bucket never drops below
+RATE_STEP = 0.1  # requests per second regained per successful request
+
+RATE_LIMIT_MARKERS = (
+    "rate limit",
+    "too many requests",
+    "limit exceeded",
+    "exceeded the quota",
+    "-32005",
+)
+RATE_LIMIT_CODES = (429, -32005)
+
+
+def is_rate_limit_error(message: str) -> bool:
+    """
+    True if an error message says the RPC throttled the request.
+    """
+    message = message.lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+def is_rate_limited(response: dict) -> bool:
+    """
+    True if a JSON-RPC response carries a rate-limit error.
+    """
+    error = response.get("error") if isinstance(response, dict) else None
+    if not isinstance(error, dict):
+        return False
+    return error.get("code") in RATE_LIMIT_CODES or is_rate_limit_error(
+        str(error.get("message", ""))
+    )
+
+
+def backoff_delay(attempt: int, base: float, cap: float = None) -> float:
+    """
+    Exponential backoff with jitter: a random delay in [d/2, d], d = base * 2^attempt.
+    """
+    cap = settings.BACKOFF_MAX_DELAY if cap is None else cap
+    delay = min(cap, base * 2**attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class TokenBucket:
+    """
+    Token bucket state shared by the sync and asyncio limiters.
+
+    `rate` is the number of requests per second, `burst` the bucket size.
+    A rate of 0 or None disables limiting.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None):
+        self.ceiling = rate
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate or 1))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _delay(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def _take(self) -> float:
+        """
+        Reserve a token and return how long to wait before using it.
+        """
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def _throttled(self):
+        if self.rate:
+            self.rate = max(MIN_RATE, self.rate / 2)
+
+    def _succeeded(self):
+        if self.rate:
+            self.rate = min(self.ceiling, self.rate + RATE_STEP)
+
+
+class RateLimiter(TokenBucket):
+    """
+    Thread-safe adaptive token bucket, one per RPC endpoint.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None):
+        super().__init__(rate, burst)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """
+        Seconds until a request could go out without waiting.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            return self._delay()
+
+    def acquire(self):
+        if not self.rate:
+            return
+
+        with self._lock:
+            wait = self._take()
+        if wait:
+            time.sleep(wait)
+
+    def throttled(self):
+        with self._lock:
+            self._throttled()
+
+    def succeeded(self):
+        with self._lock:
+            self._succeeded()
+
+
+class AsyncRateLimiter(TokenBucket):
+    """
+    Adaptive token bucket that caps the request rate of an asyncio engine.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None):
+        super().__init__(rate, burst)
+        self._lock = asyncio.Lock()
+
+    def delay(self) -> float:
+        """
+        Seconds until a request could go out without waiting.
+        """
+        return self._delay() if self.rate else 0.0
+
+    async def acquire(self):
+        if not self.rate:
+            return
+
+        async with self._lock:
+            wait = self._take()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def throttled(self):
+        self._throttled()
+
+    def succeeded(self):
+        self._succeeded()
@@ -0,0 +1,209 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted
+
+import settings
+from models.network import Network
+from modules.batch import batch_request
+from modules.logger import logger
+from modules.provider import get_web3
+
+"""
+Per-chain receipt watcher.
+
+Instead of every sender polling its own tx hash, one background thread per
+chain follows new blocks, matches their tx hashes against everything that
+is pending and fetches receipts for the matches in a single batch. Each
+sender gets a Future. Timeouts and dropped txs fail the Future with web3's
+`TimeExhausted`, whose "is not in the chain after" message is already
+handled by the fee-bump retry in `send_tx`.
+"""
+
+# Above this many new blocks per poll, query receipts directly instead of
+# scanning every block body (fast L2s produce several blocks per second)
+MAX_BLOCKS_PER_POLL = 10
+
+
+def to_int(value) -> int:
+    return int(value, 16) if value else 0
+
+
+def format_receipt(raw: dict) -> AttributeDict:
+    return AttributeDict(
+        {
+            **raw,
+            "transactionHash": HexBytes(raw["transactionHash"]),
+            "status": to_int(raw.get("status")),
+            "blockNumber": to_int(raw.get("blockNumber")),
+            "gasUsed": to_int(raw.get("gasUsed")),
+            "effectiveGasPrice": to_int(raw.get("effectiveGasPrice")),
+        }
+    )
+
+
+class PendingTx:
+    def __init__(self, tx_hash: str, timeout: float):
+        self.tx_hash = tx_hash
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.future = Future()
+        self.checked = False  # receipt looked up directly once
+
+
+class ReceiptWatcher:
+    def __init__(self, chain: Network, w3: Web3):
+        self.chain = chain
+        self.w3 = w3
+        self.pending: dict[str, PendingTx] = {}
+        self.last_block: int = None
+        self.thread: threading.Thread = None
+        self._lock = threading.Lock()
+
+    def watch(self, tx_hash, timeout: float = 60) -> Future:
+        """
+        Return a Future resolved with the tx receipt.
+        """
+        tx_hash = HexBytes(tx_hash).hex()
+        with self._lock:
+            if tx_hash not in self.pending:
+                self.pending[tx_hash] = PendingTx(tx_hash, timeout)
+            future = self.pending[tx_hash].future
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+        return future
+
+    def wait(self, tx_hash, timeout: float = 60) -> AttributeDict:
+        # Slack for the poll in flight; never block past it if polling is stuck
+        slack = settings.RECEIPT_POLL_INTERVAL + settings.RPC_TIMEOUT
+        try:
+            return self.watch(tx_hash, timeout).result(timeout + slack)
+        except FutureTimeout:
+            with self._lock:
+                self.pending.pop(HexBytes(tx_hash).hex(), None)
+            raise TimeExhausted(
+                f"Transaction {HexBytes(tx_hash).hex()} is not in the chain after "
+                f"{timeout} seconds (receipt polling failed)"
+            ) from None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+
+            try:
+                self.poll()
+            except Exception as err:
+                logger.debug(f"Receipt watcher on {self.chain.name}: {err}")
+                # Deadlines still apply while the RPC keeps failing
+                self.expire()
+
+            time.sleep(settings.RECEIPT_POLL_INTERVAL)
+
+    def poll(self):
+        block_number = self.w3.eth.block_number
+        if self.last_block is None:
+            self.last_block = block_number - 1
+
+        with self._lock:
+            hashes = list(self.pending)
+            fresh = [p.tx_hash for p in self.pending.values() if not p.checked]
+            for tx_hash in fresh:
+                self.pending[tx_hash].checked = True
+
+        mined = []
+        if block_number > self.last_block:
+            new_blocks = range(self.last_block + 1, block_number + 1)
+            mined = self.find_mined(hashes, new_blocks)
+            self.last_block = block_number
+
+        # A tx mined before it was watched sits in a block already scanned
+        self.resolve(list(dict.fromkeys(mined + fresh)))
+
+        self.expire()
+
+    def find_mined(self, hashes: list[str], blocks: range) -> list[str]:
+        """
+        Return the pending hashes included in the given blocks.
+        """
+        if len(blocks) > MAX_BLOCKS_PER_POLL:
+            return hashes
+
+        calls = [("eth_getBlockByNumber", [hex(n), False]) for n in blocks]
+        included = set()
+        for block in batch_request(self.w3, calls):
+            if block:
+                included.update(tx.lower() for tx in block["transactions"])
+
+        return [tx_hash for tx_hash in hashes if tx_hash.lower() in included]
+
+    def resolve(self, hashes: list[str]):
+        if not hashes:
+            return
+
+        calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+        for tx_hash, receipt in zip(hashes, batch_request(self.w3, calls)):
+            if receipt is None:
+                continue
+            with self._lock:
+                pending = self.pending.pop(tx_hash, None)
+            if pending:
+                pending.future.set_result(format_receipt(receipt))
+
+    def expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [p for p in self.pending.values() if p.deadline <= now]
+        if not expired:
+            return
+
+        # Last chance receipt lookup, then tell timeouts and drops apart
+        try:
+            self.resolve([p.tx_hash for p in expired])
+        except Exception as err:
+            logger.debug(f"Receipt watcher on {self.chain.name}: {err}")
+        with self._lock:
+            expired = [p for p in expired if p.tx_hash in self.pending]
+        if not expired:
+            return
+
+        calls = [("eth_getTransactionByHash", [p.tx_hash]) for p in expired]
+        try:
+            txs = batch_request(self.w3, calls)
+        except Exception:
+            txs = [True] * len(expired)  # unknown, so don't call them dropped
+        for pending, tx in zip(expired, txs):
+            with self._lock:
+                self.pending.pop(pending.tx_hash, None)
+
+            reason = "" if tx else " (dropped from mempool)"
+            pending.future.set_exception(
+                TimeExhausted(
+                    f"Transaction {pending.tx_hash} is not in the chain after "
+                    f"{pending.timeout} seconds{reason}"
+                )
+            )
+
+
+_watchers: dict[str, ReceiptWatcher] = {}
+_lock = threading.Lock()
+
+
+def get_receipt_watcher(chain: Network) -> ReceiptWatcher:
+    """
+    Return the shared receipt watcher for a chain.
+    """
+    with _lock:
+        if chain.name not in _watchers:
+            _watchers[chain.name] = ReceiptWatcher(chain, get_web3(chain))
+        return _watchers[chain.name]
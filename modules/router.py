@@ -0,0 +1,242 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import ClientResponseError
+from requests.exceptions import HTTPError
+from web3.providers import JSONBaseProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+import settings
+from modules.logger import logger
+from modules.metrics import metrics
+from modules.ratelimit import (
+    AsyncRateLimiter,
+    RateLimiter,
+    backoff_delay,
+    is_rate_limited,
+)
+
+"""
+Multi-endpoint RPC routing with latency-based selection and failover.
+
+Each endpoint tracks an EWMA of its latency and error rate, paces requests
+with an adaptive token bucket capped at `RPC_RATE_LIMIT`, backs off
+exponentially after 429s and rate-limit errors and has a circuit breaker
+that opens after
+`CIRCUIT_BREAKER_FAILURES` consecutive failures. Reads go to the fastest
+healthy endpoint and fail over to the next one; endpoints with an open circuit
+or backing off are skipped until every endpoint is. Raw tx broadcasts can be
+fanned out to several endpoints at once. `AsyncRouterProvider` gives the async
+engine the same selection and failover, pacing its endpoints with async
+limiters; broadcasts are not fanned out.
+"""
+
+EWMA_ALPHA = 0.3
+
+
+class Endpoint:
+    def __init__(self, provider, limiter: RateLimiter | AsyncRateLimiter = None):
+        self.url = provider.endpoint_uri
+        self.provider = provider
+        self.latency: float = None
+        self.error_rate = 0.0
+        self.failures = 0  # consecutive
+        self.throttles = 0  # consecutive
+        self.limiter = limiter or RateLimiter(settings.RPC_RATE_LIMIT)
+        self.throttled_until = 0.0
+        self.open_until = 0.0
+
+    def __str__(self):
+        return self.url
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until and now >= self.throttled_until
+
+    def score(self) -> float:
+        # Unmeasured endpoints get tried early so they gather samples
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + 4 * self.error_rate)
+
+    def succeeded(self, elapsed: float):
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += EWMA_ALPHA * (elapsed - self.latency)
+        self.error_rate *= 1 - EWMA_ALPHA
+        self.failures = 0
+        self.throttles = 0
+        self.limiter.succeeded()
+
+    def failed(self, throttled: bool = False):
+        now = time.monotonic()
+        self.error_rate += EWMA_ALPHA * (1 - self.error_rate)
+        self.failures += 1
+
+        if throttled:
+            self.throttled_until = now + backoff_delay(
+                self.throttles, settings.RATE_LIMIT_BACKOFF
+            )
+            self.throttles += 1
+            self.limiter.throttled()
+
+        if self.failures >= settings.CIRCUIT_BREAKER_FAILURES:
+            self.open_until = now + settings.CIRCUIT_BREAKER_COOLDOWN
+            logger.debug(
+                f"RPC {self.url} circuit open for {settings.CIRCUIT_BREAKER_COOLDOWN}s"
+            )
+
+
+class RouterProvider(JSONBaseProvider):
+    def __init__(self, providers: list):
+        super().__init__()
+        self.endpoints = [Endpoint(provider) for provider in providers]
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"RPC router {', '.join(map(str, self.endpoints))}"
+
+    def ranked(self) -> list[Endpoint]:
+        """
+        Available endpoints ordered by spare rate and latency. If none is
+        available, all of them, the first to recover first.
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [e for e in self.endpoints if e.available(now)]
+            if not available:
+                return sorted(
+                    self.endpoints, key=lambda e: max(e.open_until, e.throttled_until)
+                )
+            return sorted(available, key=lambda e: (e.limiter.delay() > 0, e.score()))
+
+    def call(self, endpoint: Endpoint, request):
+        endpoint.limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = request(endpoint)
+        except Exception as err:
+            throttled = (
+                isinstance(err, HTTPError)
+                and err.response is not None
+                and err.response.status_code == 429
+            )
+            with self._lock:
+                endpoint.failed(throttled)
+            raise
+
+        with self._lock:
+            if is_rate_limited(response):
+                endpoint.failed(throttled=True)
+            else:
+                endpoint.succeeded(time.monotonic() - start)
+        return response
+
+    def route(self, request):
+        """
+        Run `request` against the best endpoint, failing over on errors and 429s.
+        """
+        last_error = None
+        for endpoint in self.ranked():
+            try:
+                response = self.call(endpoint, request)
+            except Exception as err:
+                logger.debug(f"RPC {endpoint} failed, trying next: {err}")
+                last_error = err
+                continue
+
+            if is_rate_limited(response):
+                last_error = ValueError(response["error"])
+                continue
+            return response
+
+        raise last_error
+
+    def fan_out(self, method, params) -> dict:
+        """
+        Send to the best `BROADCAST_FANOUT` endpoints, returning the first success.
+        """
+        targets = self.ranked()[: settings.BROADCAST_FANOUT]
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = [
+                executor.submit(
+                    self.call,
+                    endpoint,
+                    lambda e: e.provider.make_request(method, params),
+                )
+                for endpoint in targets
+            ]
+            responses = []
+            for future in futures:
+                try:
+                    responses.append(future.result())
+                except Exception as err:
+                    logger.debug(f"Broadcast fan-out error: {err}")
+
+        for response in responses:
+            if "result" in response:
+                return response
+        if responses:
+            return responses[0]
+        return self.route(lambda e: e.provider.make_request(method, params))
+
+    def make_request(self, method, params):
+        with metrics.timer("rpc_request_seconds", method=method):
+            if method == "eth_sendRawTransaction" and settings.BROADCAST_FANOUT > 1:
+                return self.fan_out(method, params)
+            return self.route(lambda e: e.provider.make_request(method, params))
+
+    def post(self, data: bytes) -> bytes:
+        # Raw posts are JSON-RPC batches (multicall prefetch, receipt polling)
+        with metrics.timer("rpc_request_seconds", method="batch"):
+            return self.route(lambda e: e.provider.post(data))
+
+    def close(self):
+        for endpoint in self.endpoints:
+            endpoint.provider.session.close()
+
+
+class AsyncRouterProvider(AsyncJSONBaseProvider):
+    def __init__(self, providers: list, rate: float = None):
+        super().__init__()
+        self.endpoints = [
+            Endpoint(provider, AsyncRateLimiter(rate)) for provider in providers
+        ]
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"Async RPC router {', '.join(map(str, self.endpoints))}"
+
+    ranked = RouterProvider.ranked
+
+    async def make_request(self, method, params):
+        """
+        Send to the best endpoint, failing over on errors and 429s.
+        """
+        last_error = None
+        for endpoint in self.ranked():
+            await endpoint.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = await endpoint.provider.make_request(method, params)
+            except Exception as err:
+                throttled = isinstance(err, ClientResponseError) and err.status == 429
+                with self._lock:
+                    endpoint.failed(throttled)
+                logger.debug(f"RPC {endpoint} failed, trying next: {err}")
+                last_error = err
+                continue
+
+            with self._lock:
+                if is_rate_limited(response):
+                    endpoint.failed(throttled=True)
+                    last_error = ValueError(response["error"])
+                    continue
+                endpoint.succeeded(time.monotonic() - start)
+            return response
+
+        raise last_error
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.provider.close()
@@ -0,0 +1,141 @@
+import os
+from typing import Iterable
+
+from tabulate import tabulate
+
+import settings
+from models.network import Network
+from models.transfer import Transfer
+from modules.accounts import derive_addresses
+from modules.batch import batched
+from modules.fees import TOKEN_TRANSFER_GAS, TRANSFER_GAS, get_fee_estimator
+from modules.gas import get_gas_oracle
+from modules.logger import logger
+from modules.multicall import Multicall
+from modules.provider import get_web3
+from modules.sources import iter_keys
+
+"""
+Balance scanning over Multicall3.
+
+`filter_funded` skips empty wallets before a collect run. `scan` is the
+standalone pre-run report: native and ERC20 balances of every key, what a
+sweep would cost in gas, and a key file holding only the funded wallets.
+"""
+
+
+SCAN_CHUNK_SIZE = 10_000  # Jobs read from the input stream per scan round
+
+
+def filter_funded(transfer: Transfer, jobs: Iterable[tuple]):
+    """
+    Yield the (index, sender, recipient, amount) jobs whose sender holds some
+    of the transferred token.
+
+    Jobs are scanned in chunks as they are consumed, so only one chunk is ever
+    held in memory and the first transfer starts after the first chunk.
+    """
+    multicall = Multicall(get_web3(transfer.chain), workers=settings.SCAN_CONCURRENCY)
+
+    funded = scanned = 0
+    for chunk in batched(jobs, SCAN_CHUNK_SIZE):
+        addresses = derive_addresses([sender for _, sender, _, _ in chunk])
+
+        if transfer.token == "ERC20":
+            balances = multicall.get_token_balances(settings.TOKEN_ADDRESS, addresses)
+        else:
+            balances = multicall.get_native_balances(addresses)
+
+        scanned += len(chunk)
+        for job, address in zip(chunk, addresses):
+            if balances[address]:
+                funded += 1
+                yield job
+
+    logger.info(f"Balance scan: {funded}/{scanned} wallets hold funds")
+
+
+def scan_chain(chain: Network, path: str) -> list:
+    """
+    Scan every key on one chain, write the funded ones to `path` and return
+    the chain's row of the report.
+    """
+    multicall = Multicall(get_web3(chain), workers=settings.SCAN_CONCURRENCY)
+    token = settings.TOKEN_ADDRESS
+    info = multicall.get_token_info(token) if token else None
+
+    # What sweeping one wallet costs at the current max fee
+    fees = get_gas_oracle(chain).fees()
+    max_fee = fees.get("maxFeePerGas", fees.get("gasPrice"))
+    l1_fee = get_fee_estimator(chain).l1_transfer_fee()
+    native_cost = TRANSFER_GAS * max_fee + l1_fee
+    token_cost = TOKEN_TRANSFER_GAS * max_fee + l1_fee
+
+    keys = native_holders = sweepable = token_holders = stranded = 0
+    native_total = token_total = gas = 0
+
+    with open(path, "w") as file:
+        for chunk in batched(iter_keys(), SCAN_CHUNK_SIZE):
+            addresses = derive_addresses(chunk)
+            native = multicall.get_native_balances(addresses)
+            tokens = multicall.get_token_balances(token, addresses) if token else {}
+
+            for key, address in zip(chunk, addresses):
+                balance, token_balance = native[address], tokens.get(address, 0)
+                native_holders += balance > 0
+                native_total += balance
+                token_holders += token_balance > 0
+                token_total += token_balance
+
+                # Tokens go first, the native sweep takes what their gas leaves
+                token_sweep = token_balance > 0 and balance >= token_cost
+                if token_sweep:
+                    gas += token_cost
+                    balance -= token_cost
+                elif token_balance:
+                    stranded += 1  # holds tokens but can't pay for their transfer
+
+                native_sweep = balance > native_cost
+                if native_sweep:
+                    sweepable += 1
+                    gas += native_cost
+
+                if token_sweep or native_sweep:
+                    file.write(key + "\n")
+
+            keys += len(chunk)
+
+    logger.info(f"{chain.name}: {keys} keys scanned, funded keys written to {path}")
+    row = [
+        chain.name,
+        keys,
+        native_holders,
+        f"{native_total / 10**18:.6f} {chain.native_token}",
+        sweepable,
+        f"{gas / 10**18:.6f} {chain.native_token}",
+    ]
+    if info:
+        row += [
+            token_holders,
+            f"{token_total / 10**info['decimals']:.6f} {info['symbol']}",
+            stranded,
+        ]
+    return row
+
+
+def scan(chains: list[Network]) -> str:
+    """
+    Scan all keys on each chain and return the report table.
+    """
+    rows = []
+    for chain in chains:
+        path = settings.FUNDED_KEYS_FILE
+        if len(chains) > 1:
+            stem, ext = os.path.splitext(path)
+            path = f"{stem}_{chain.name}{ext}"
+        rows.append(scan_chain(chain, path))
+
+    headers = ["Chain", "Keys", "Holders", "Total", "Sweepable", "Sweep gas"]
+    if settings.TOKEN_ADDRESS:
+        headers += ["Token holders", "Token total", "No gas for token"]
+    return tabulate(rows, headers=headers, tablefmt="simple")
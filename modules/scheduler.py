@@ -0,0 +1,148 @@
+import threading
+import time
+
+import settings
+from models.network import Network
+from modules.batch import batch_request
+from modules.gas import get_gas_oracle, to_int
+from modules.logger import logger
+from modules.metrics import metrics
+
+"""
+Gas-aware scheduling: hold sends while the base fee is above a ceiling.
+
+The ceiling is `GAS_CEILING_GWEI`, or the `GAS_CEILING_PERCENTILE` of base
+fees over the last `GAS_CEILING_WINDOW` blocks, whichever is lower. Every
+wallet on a chain waits on the same gas oracle snapshot, so a hold costs one
+block number poll per `FEE_CACHE_TTL` no matter how many senders wait.
+"""
+
+PERCENTILE_TTL = 300  # Seconds before the percentile ceiling is re-read
+
+
+def gwei(value: int) -> str:
+    return f"{value / 10**9:.2f}"
+
+
+class GasScheduler:
+    def __init__(self, chain: Network):
+        self.chain = chain
+        self.oracle = get_gas_oracle(chain)
+        self.percentile_fee: int = None
+        self.percentile_read = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            settings.GAS_CEILING_GWEI is not None
+            or settings.GAS_CEILING_PERCENTILE is not None
+        )
+
+    def base_fee(self) -> int:
+        """
+        Base fee the next block will charge; the gas price on legacy chains.
+        """
+        self.oracle.refresh()
+        if self.chain.eip_1559:
+            return self.oracle.next_base_fee
+        return self.oracle.gas_price
+
+    def price(self) -> int:
+        """
+        Price per gas a tx sent now is expected to pay.
+        """
+        base_fee = self.base_fee()
+        if self.chain.eip_1559:
+            return base_fee + self.oracle.priority_fee()
+        return base_fee
+
+    def read_percentile(self) -> int:
+        history = batch_request(
+            self.oracle.w3,
+            [("eth_feeHistory", [hex(settings.GAS_CEILING_WINDOW), "latest", []])],
+        )[0]
+        fees = sorted(to_int(fee) for fee in history["baseFeePerGas"])
+        return fees[
+            min(len(fees) - 1, len(fees) * settings.GAS_CEILING_PERCENTILE // 100)
+        ]
+
+    def ceiling(self) -> int | None:
+        """
+        Highest base fee sends go out at, or None if holding is off.
+        """
+        ceilings = []
+        if settings.GAS_CEILING_GWEI is not None:
+            ceilings.append(int(settings.GAS_CEILING_GWEI * 10**9))
+
+        if settings.GAS_CEILING_PERCENTILE is not None and self.chain.eip_1559:
+            if time.monotonic() - self.percentile_read > PERCENTILE_TTL:
+                try:
+                    self.percentile_fee = self.read_percentile()
+                except Exception as err:
+                    logger.warning(f"Base fee history lookup failed: {err}")
+                self.percentile_read = time.monotonic()
+            if self.percentile_fee is not None:
+                ceilings.append(self.percentile_fee)
+
+        return min(ceilings) if ceilings else None
+
+    def hold(self):
+        """
+        Block until the base fee is at or below the ceiling.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            ceiling = self.ceiling()
+            if ceiling is None or self.base_fee() <= ceiling:
+                return
+
+            logger.info(
+                f"{self.chain.name}: base fee {gwei(self.base_fee())} gwei is above "
+                f"the {gwei(ceiling)} gwei ceiling, holding sends"
+            )
+            start = time.monotonic()
+            with metrics.phase("gas_hold"):
+                while self.base_fee() > ceiling:
+                    timeout = settings.GAS_HOLD_TIMEOUT
+                    if timeout is not None and time.monotonic() - start > timeout:
+                        logger.warning(
+                            f"{self.chain.name}: held sends for {timeout}s, sending anyway"
+                        )
+                        return
+                    time.sleep(settings.FEE_CACHE_TTL)
+                    ceiling = self.ceiling()
+
+            logger.info(
+                f"{self.chain.name}: base fee down to {gwei(self.base_fee())} gwei "
+                f"after {time.monotonic() - start:.0f}s, resuming"
+            )
+
+    def project(self, gas: int) -> dict:
+        """
+        Expected cost of `gas` units now and, if holding is on, at the ceiling.
+        """
+        price = self.price()
+        projection = {"now": gas * price, "base_fee": self.base_fee()}
+
+        ceiling = self.ceiling()
+        if ceiling is not None:
+            at_ceiling = min(price, ceiling + price - projection["base_fee"])
+            projection.update(ceiling=ceiling, at_ceiling=gas * at_ceiling)
+        return projection
+
+
+_schedulers: dict[str, GasScheduler] = {}
+_lock = threading.Lock()
+
+
+def get_scheduler(chain: Network) -> GasScheduler:
+    """
+    Return the shared gas scheduler for a chain.
+    """
+    with _lock:
+        if chain.name not in _schedulers:
+            _schedulers[chain.name] = GasScheduler(chain)
+        return _schedulers[chain.name]
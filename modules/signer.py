@@ -0,0 +1,233 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime
+from typing import Iterable
+
+from eth_account import Account
+from web3.exceptions import TimeExhausted
+
+import settings
+from models.transfer import Transfer
+from modules.accounts import derive_addresses
+from modules.batch import batched
+from modules.journal import Journal, attach
+from modules.logger import logger
+from modules.metrics import metrics
+from modules.preflight import iter_prefetched
+from modules.provider import get_web3
+from modules.receipts import get_receipt_watcher
+from modules.scheduler import get_scheduler
+from modules.utils import pace, stopping
+from modules.wallet import Wallet, classify_error
+
+"""
+Offline bulk signing for large one-to-one and dispense runs.
+
+The run is split into three stages:
+1. prepare: derive sender addresses across cores, then build and price each
+   tx from pre-flight data, with nonces from the local nonce manager;
+2. sign: sign the prepared txs in a process pool and append them to a JSONL
+   file of raw signed txs;
+3. broadcast: stream the file to the RPC and confirm receipts through the
+   shared receipt watcher.
+
+The first two stages run over `SIGN_CHUNK_SIZE` jobs at a time, so only one
+chunk of built txs is held in memory; broadcasting starts once all are signed.
+
+Signed txs carry the fees of the prepare stage. If fees rise past them before
+the broadcast, the tx fails and has to be re-run, as it cannot be re-signed
+without the key. A sender whose tx fails to broadcast, or goes unmined for
+`RECEIPT_TIMEOUT` seconds, sends nothing more in that run: its later nonces
+would sit behind the gap and never be mined. An unmined tx stays journaled
+as broadcast, so a resumed run rechecks it and replaces it at its nonce.
+"""
+
+SIGN_CHUNK_SIZE = 10_000  # Jobs prepared and signed at a time
+
+
+def sign_one(job: tuple[str, dict]) -> dict:
+    private_key, tx = job
+    signed = Account.sign_transaction(tx, private_key)
+    return {"hash": signed.hash.hex(), "raw": signed.rawTransaction.hex()}
+
+
+def sign_all(jobs: list[tuple[str, dict]], workers: int = None) -> list[dict]:
+    """
+    Sign (private_key, tx) jobs in parallel, preserving order.
+    """
+    workers = workers or settings.SIGNING_WORKERS or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(executor.map(sign_one, jobs, chunksize=chunksize))
+
+
+def prepare(transfer: Transfer, jobs: list[tuple], total: int, journal: Journal):
+    """
+    Build and price a chunk of transfers; returns (index, private_key, tx,
+    label, journal entry) items.
+    """
+    derive_addresses([sender for _, sender, _, _ in jobs])
+
+    prepared = []
+    w3 = get_web3(transfer.chain)
+    for (index, sender, recipient, amount), prefetched in iter_prefetched(
+        w3, transfer, jobs
+    ):
+        wallet = Wallet(sender, f"[{index}/{total}]", transfer.chain, index)
+        wallet.use_prefetched(prefetched)
+
+        if journal:
+            amount = attach(journal, wallet, recipient, amount)
+            if amount is None:
+                continue
+
+        built = wallet.build_transfer(transfer.token, amount, recipient)
+        if not built:
+            wallet.record("failed")
+            continue
+
+        tx, tx_label = built
+        tx["nonce"] = wallet.from_prefetch("replace_nonce", wallet.nonces.allocate)
+        prepared.append((index, sender, tx, tx_label, wallet.journal))
+
+    return prepared
+
+
+def write_signed(path: str, prepared: list, signed: list[dict]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as file:
+        for (index, _, tx, tx_label, entry), result in zip(prepared, signed):
+            record = {
+                "index": index,
+                "label": tx_label,
+                "from": tx["from"],
+                "nonce": tx["nonce"],
+                **result,
+            }
+            file.write(json.dumps(record) + "\n")
+            if entry:
+                entry.record("signed", raw=result["raw"], nonce=tx["nonce"])
+
+
+def iter_signed(path: str):
+    with open(path) as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def broadcast_signed(transfer: Transfer, path: str, entries: dict = None) -> list:
+    """
+    Stream raw signed txs from `path` to the network and confirm their receipts.
+    """
+    entries = entries or {}
+    w3 = get_web3(transfer.chain)
+    watcher = get_receipt_watcher(transfer.chain)
+
+    with open(path) as file:
+        total = sum(1 for _ in file)
+
+    pending = []
+    stuck = set()  # Senders with a nonce that never reached the network
+    latest = {}  # Sender -> receipt future of its last broadcast
+    for position, record in enumerate(iter_signed(path), start=1):
+        if stopping.is_set():
+            break
+
+        label, entry = record["label"], entries.get(record["index"])
+        future = latest.get(record["from"])
+        if future and future.done() and isinstance(future.exception(), TimeExhausted):
+            stuck.add(record["from"])  # went unmined, or was dropped
+        if record["from"] in stuck:
+            # Its later nonces could never be mined; leave them to a resumed run
+            logger.error(f"{label} | Skipped, an earlier tx of this sender failed")
+            if entry:
+                entry.record("planned")
+            continue
+
+        # Fees are fixed at signing, but the base fee paid is the block's
+        get_scheduler(transfer.chain).hold()
+        try:
+            tx_hash = w3.eth.send_raw_transaction(record["raw"])
+        except Exception as err:
+            if "already known" not in str(err):
+                logger.error(f"{label} | Broadcast failed: {err}")
+                if classify_error(str(err)) != "nonce_too_low":
+                    stuck.add(record["from"])
+                if entry:
+                    entry.record("failed")
+                continue
+            tx_hash = record["hash"]
+
+        logger.info(f"{label} | {transfer.chain.explorer}/tx/{record['hash']}")
+        if entry:
+            entry.record("broadcast", hash=record["hash"], nonce=record["nonce"])
+        future = watcher.watch(tx_hash, timeout=settings.RECEIPT_TIMEOUT)
+        latest[record["from"]] = future
+        pending.append((record, future, time.monotonic() + settings.RECEIPT_TIMEOUT))
+
+        if position < total:
+            pace()
+
+    # Slack for the poll in flight, so a stuck watcher can't hang the run
+    slack = settings.RECEIPT_POLL_INTERVAL + settings.RPC_TIMEOUT
+    results = []
+    for record, future, deadline in pending:
+        label, entry = record["label"], entries.get(record["index"])
+        if record["from"] in stuck and not future.done():
+            # Behind a nonce that never got mined; a resumed run rechecks it
+            logger.error(f"{label} | Not mined, an earlier tx of this sender was not")
+            results.append(False)
+            continue
+
+        try:
+            timeout = max(0.0, deadline + slack - time.monotonic())
+            receipt = future.result(timeout=timeout)
+            metrics.gas_paid(transfer.chain.name, receipt)
+            status = receipt.status == 1
+        except (FutureTimeout, TimeExhausted) as err:
+            reason = str(err) or f"No receipt after {settings.RECEIPT_TIMEOUT}s"
+            logger.error(f"{label} | {reason}, treated as dropped")
+            stuck.add(record["from"])
+            results.append(False)
+            continue
+        except Exception as err:
+            logger.error(f"{label} | {err}")
+            status = False
+
+        if status:
+            logger.success(f"{label} | Tx confirmed")
+        if entry:
+            entry.record("confirmed" if status else "failed")
+        results.append(status)
+
+    return results
+
+
+def presign_and_broadcast(
+    transfer: Transfer, jobs: Iterable[tuple], total: int, journal: Journal = None
+) -> list:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(
+        settings.SIGNED_TX_DIR, f"{transfer.chain.name}_{transfer.action}_{stamp}.jsonl"
+    )
+
+    written, entries = 0, {}
+    for chunk in batched(jobs, SIGN_CHUNK_SIZE):
+        prepared = prepare(transfer, chunk, total, journal)
+        if not prepared:
+            continue
+
+        logger.info(f"Signing {len(prepared)} txs")
+        signed = sign_all([(key, tx) for _, key, tx, _, _ in prepared])
+        write_signed(path, prepared, signed)
+        written += len(signed)
+        entries.update((index, entry) for index, _, _, _, entry in prepared if entry)
+
+    if not written:
+        return []
+
+    logger.info(f"Wrote {written} signed txs to {path}")
+    return broadcast_signed(transfer, path, entries)
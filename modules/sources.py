@@ -0,0 +1,123 @@
+import re
+from itertools import repeat
+from typing import Iterator
+
+import settings
+from data.const import KEYS_FILE, MNEMONICS_FILE, RECIPIENTS_FILE
+
+"""
+Streaming loaders for keys.txt and recipients.txt.
+
+Files are read line by line and validated as they go, so lists with hundreds
+of thousands of wallets never sit in memory. Blank lines and lines starting
+with `#` are skipped; bad lines raise `InputError` with their line number.
+With `KEY_SOURCE = "mnemonic"` sender keys are derived from mnemonics.txt
+instead (see modules/hd.py).
+"""
+
+PRIVATE_KEY = re.compile(r"(0x)?[0-9a-fA-F]{64}")
+
+
+class InputError(ValueError):
+    pass
+
+
+def iter_lines(path: str) -> Iterator[tuple[int, str]]:
+    """
+    Yield (line number, value) for every non-blank, non-comment line.
+    """
+    try:
+        with open(path) as file:
+            for line_number, line in enumerate(file, start=1):
+                value = line.strip()
+                if value and not value.startswith("#"):
+                    yield line_number, value
+    except FileNotFoundError:
+        raise InputError(f"{path} not found") from None
+
+
+def keys_file() -> str:
+    """
+    File the sender keys come from.
+    """
+    return MNEMONICS_FILE if settings.KEY_SOURCE == "mnemonic" else KEYS_FILE
+
+
+def iter_keys(path: str = None) -> Iterator[str]:
+    if path is None and settings.KEY_SOURCE == "mnemonic":
+        from modules.hd import iter_hd_keys
+
+        yield from iter_hd_keys()
+        return
+
+    path = path or KEYS_FILE
+    for line_number, value in iter_lines(path):
+        if not PRIVATE_KEY.fullmatch(value):
+            # Never echo the line itself, it may be a mistyped key
+            raise InputError(f"{path}:{line_number}: not a valid private key")
+        yield value
+
+
+def iter_recipients(path: str = RECIPIENTS_FILE) -> Iterator[str]:
+    from eth_utils import is_address, is_checksum_address, to_checksum_address
+
+    for line_number, value in iter_lines(path):
+        if not is_address(value):
+            raise InputError(f"{path}:{line_number}: not a valid address: {value}")
+        # Mixed case means the address carries an EIP-55 checksum, so verify it
+        body = value.removeprefix("0x")
+        if body != body.lower() and body != body.upper():
+            if not is_checksum_address(value):
+                raise InputError(f"{path}:{line_number}: bad checksum: {value}")
+        yield to_checksum_address(value)
+
+
+def count(items: Iterator) -> int:
+    """
+    Count (and so fully validate) a stream without keeping it in memory.
+    """
+    return sum(1 for _ in items)
+
+
+def first(items: Iterator, path: str):
+    for item in items:
+        return item
+    raise InputError(f"{path} is empty")
+
+
+def iter_pairs(action: str) -> Iterator[tuple[str, str]]:
+    """
+    Lazily pair senders with recipients for the given action.
+    """
+    if action == "collect":
+        # Multiple senders -> one recipient
+        recipient = first(iter_recipients(), RECIPIENTS_FILE)
+        return zip(iter_keys(), repeat(recipient))
+    if action in ("dispense", "disperse"):
+        # One sender -> multiple recipients
+        sender = first(iter_keys(), keys_file())
+        return zip(repeat(sender), iter_recipients())
+    # one-to-one: equal number of senders & recipients
+    return zip(iter_keys(), iter_recipients())
+
+
+def count_pairs(action: str) -> int:
+    if action in ("dispense", "disperse"):
+        return count(iter_recipients())
+    return count(iter_keys())
+
+
+def check_pair_counts(action: str, keys_count: int, recipients_count: int):
+    """
+    Raise InputError if the input files don't fit the selected action.
+    """
+    if action == "collect" and recipients_count > 1:
+        raise InputError("Only one recipient (evm address) allowed for collector mode")
+
+    if action in ("dispense", "disperse") and keys_count > 1:
+        raise InputError("Only one sender (private key) allowed for dispensor mode")
+
+    if action == "one-to-one" and keys_count != recipients_count:
+        raise InputError(
+            "Number of keys & recipients should be the same for one-to-one transfer"
+        )
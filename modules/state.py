@@ -0,0 +1,129 @@
+import threading
+from array import array
+
+from models.network import Network
+
+"""
+Per-chain table of wallet state, one row per sender address.
+
+Runs over 100k wallets used to leave a nonce manager object (dict, lock, heap)
+behind for every sender. The table keeps the same state in flat columns
+instead: the nonce and key reference live in `array`s, the last journal
+state in a `bytearray`, and released nonces only exist for the few rows that
+have any. Private keys stay with the wallet handles and are never stored here;
+a row only refers to its key by the number of the first pair it was read for.
+`Wallet` and `NonceManager` are throwaway handles pointing at a row, and the
+RPC clients every wallet needs are resolved once per chain in `clients`.
+"""
+
+STATUSES = ("new", "planned", "signed", "broadcast", "confirmed", "failed")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+LOCK_STRIPES = 64  # Row locks are shared by rows with the same row % LOCK_STRIPES
+
+
+class Clients:
+    """
+    The shared per-chain clients a Wallet sends through.
+    """
+
+    __slots__ = ("w3", "gas_oracle", "fee_estimator", "receipts")
+
+    def __init__(self, chain: Network):
+        from modules.fees import get_fee_estimator
+        from modules.gas import get_gas_oracle
+        from modules.provider import get_web3
+        from modules.receipts import get_receipt_watcher
+
+        self.w3 = get_web3(chain)
+        self.gas_oracle = get_gas_oracle(chain)
+        self.fee_estimator = get_fee_estimator(chain)
+        self.receipts = get_receipt_watcher(chain)
+
+
+class WalletTable:
+    __slots__ = (
+        "chain",
+        "rows",
+        "addresses",
+        "key_refs",
+        "nonces",
+        "balances",
+        "statuses",
+        "released",
+        "locks",
+        "_clients",
+        "_lock",
+    )
+
+    def __init__(self, chain: Network):
+        self.chain = chain
+        self.rows: dict[str, int] = {}
+        self.addresses: list[str] = []
+        self.key_refs = array("q")  # first pair the key was read for, -1 unknown
+        self.nonces = array("q")  # next nonce to hand out, -1 until synced
+        self.balances: list[int | None] = []  # last native balance read
+        self.statuses = bytearray()  # index into STATUSES
+        self.released: dict[int, list[int]] = {}  # row -> min-heap of nonces
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._clients: Clients = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    @property
+    def clients(self) -> Clients:
+        if self._clients is None:
+            with self._lock:
+                if self._clients is None:
+                    self._clients = Clients(self.chain)
+        return self._clients
+
+    def row(self, address: str, key_ref: int = -1) -> int:
+        """
+        Row of an address, added on first sight.
+        """
+        row = self.rows.get(address)
+        if row is not None:
+            if self.key_refs[row] < 0:
+                self.key_refs[row] = key_ref
+            return row
+
+        with self._lock:
+            if address not in self.rows:
+                self.rows[address] = len(self.addresses)
+                self.addresses.append(address)
+                self.key_refs.append(key_ref)
+                self.nonces.append(-1)
+                self.balances.append(None)
+                self.statuses.append(0)
+            return self.rows[address]
+
+    def lock(self, row: int) -> threading.Lock:
+        return self.locks[row % LOCK_STRIPES]
+
+    def set_status(self, row: int, status: str):
+        code = STATUS_CODES.get(status)
+        if code is not None:
+            self.statuses[row] = code
+
+    def count(self, status: str) -> int:
+        return self.statuses.count(STATUS_CODES[status])
+
+
+_tables: dict[str, WalletTable] = {}
+_lock = threading.Lock()
+
+
+def get_wallet_table(chain: Network) -> WalletTable:
+    """
+    Return the shared wallet table for a chain.
+    """
+    table = _tables.get(chain.name)
+    if table is not None:
+        return table
+
+    with _lock:
+        if chain.name not in _tables:
+            _tables[chain.name] = WalletTable(chain)
+        return _tables[chain.name]
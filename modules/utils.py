@@ -1,10 +1,14 @@
 import random
+import threading
 import time
 from datetime import datetime
 
-from tqdm import tqdm
-
 import settings
+from modules.amounts import plan_even
+from modules.metrics import metrics
+
+# Set on Ctrl+C in a multi-chain run; chain threads stop before their next job
+stopping = threading.Event()
 
 
 def truncate(address: str) -> str:
@@ -23,6 +27,8 @@ def random_sleep(max_time, min_time=1):
 
 
 def sleep(sleep_time, to_sleep=None, label="Sleep until next account"):
+    from tqdm import tqdm
+
     if to_sleep is not None:
         x = random.randint(sleep_time, to_sleep)
     else:
@@ -33,33 +39,23 @@ def sleep(sleep_time, to_sleep=None, label="Sleep until next account"):
     for _ in tqdm(
         range(x), desc=desc, bar_format=f"{{desc}} | {label} {{n_fmt}}/{{total_fmt}}"
     ):
-        time.sleep(1)
+        if stopping.wait(1):
+            break
 
     print()
 
 
-def divide_amounts_evenly(total_amount, N, variance=settings.VARIANCE):
-    # Calculate the average amount per part
-    average_amount = total_amount / N
-
-    # Determine lower and upper boundaries based on the allowed variance
-    lower_boundary = average_amount * (1 - variance)
-    upper_boundary = average_amount * (1 + variance)
-
-    # Generate num_parts random amounts within the specified boundaries
-    random_values = [random.uniform(lower_boundary, upper_boundary) for _ in range(N)]
-
-    # Calculate a scale factor to adjust the random values so their sum equals total_amount
-    scale_factor = total_amount / sum(random_values)
-
-    # Apply the scale factor and convert the amounts to integers
-    amounts = [int(value * scale_factor) for value in random_values]
+def pace(label="Sleep until next account"):
+    """
+    Randomized SLEEP_BETWEEN_ACTIONS pause between wallets, if SPACE_WALLETS is on.
+    """
+    if settings.SPACE_WALLETS:
+        with metrics.phase("sleep"):
+            sleep(*settings.SLEEP_BETWEEN_ACTIONS, label=label)
 
-    # Adjust the amounts to ensure the total sum exactly equals total_amount
-    difference = total_amount - sum(amounts)
-    for i in range(abs(difference)):
-        index = i % N
-        # If the difference is positive, increment the amount; if negative, decrement
-        amounts[index] += 1 if difference > 0 else -1
 
-    return amounts
+def divide_amounts_evenly(total_amount, N, variance=settings.VARIANCE, reserve=0):
+    """
+    Split `total_amount - reserve` into N exact integer amounts (see modules/amounts).
+    """
+    return plan_even(total_amount, N, variance, reserve)
@@ -1,39 +1,153 @@
 import json
-import random
+import os
 import time
+from functools import lru_cache
 
 from eth_account import Account
 from eth_account.messages import encode_defunct
 from eth_account.signers.local import LocalAccount
-from web3 import HTTPProvider, Web3
 from web3.contract import Contract
-from web3.middleware import geth_poa_middleware
 
 import settings
-from data.const import ethereum
+from data.const import ABI_DIR, ethereum
 from models.network import Network
+from modules import cache
+from modules.amounts import draw
+from modules.accounts import address_of
+from modules.cache import chain_key, token_key
+from modules.fees import TRANSFER_GAS
+from modules.journal import JournalEntry
 from modules.logger import logger
+from modules.metrics import metrics
+from modules.multicall import Multicall
+from modules.nonce import NonceManager
+from modules.ratelimit import backoff_delay, is_rate_limit_error
+from modules.scheduler import get_scheduler
+from modules.state import get_wallet_table
 from modules.utils import truncate
 
-with open("data/abi/erc20.json") as file:
-    ERC20_ABI = json.load(file)
+
+@lru_cache(maxsize=None)
+def get_erc20_abi() -> list[dict]:
+    """
+    Load the ERC20 ABI on first use rather than at import time.
+    """
+    with open(os.path.join(ABI_DIR, "erc20.json")) as file:
+        return json.load(file)
+
+
+FEE_ERRORS = [
+    "replacement transaction underpriced",
+    "is not in the chain after",
+    "max fee per gas less than block base fee",
+    "fee cap less than block base fee",
+]
+
+
+def classify_error(error_str: str) -> str:
+    """
+    Map an RPC error message to the category send_tx reacts to.
+    """
+    if "already known" in error_str:
+        return "already_known"
+    if "nonce too low" in error_str:
+        return "nonce_too_low"
+    if "could not replace existing tx" in error_str:
+        return "replace"
+    if any(error in error_str for error in FEE_ERRORS):
+        return "underpriced"
+    if "insufficient funds" in error_str:
+        return "insufficient_funds"
+    if is_rate_limit_error(error_str):
+        return "rate_limited"
+    return "unknown"
 
 
 class Wallet:
+    """
+    Handle for one sender's row in the chain's wallet table.
+
+    Slotted and cheap to build: the clients come from the table, the address
+    from the address cache and the label is only formatted when logged.
+    """
+
+    __slots__ = (
+        "private_key",
+        "address",
+        "counter",
+        "chain",
+        "table",
+        "row",
+        "w3",
+        "nonces",
+        "gas_oracle",
+        "fee_estimator",
+        "receipts",
+        "prefetched",
+        "journal",
+        "sweep_balance",
+    )
+
     def __init__(
-        self, private_key: str, counter: str = None, chain: Network = ethereum
+        self,
+        private_key: str,
+        counter: str = None,
+        chain: Network = ethereum,
+        key_ref: int = -1,
     ):
-        self.account: LocalAccount = Account.from_key(private_key)
-        self.address = self.account.address
-        self.label = f"{counter} {self.address} |"
+        self.private_key = private_key
+        self.address = address_of(private_key)
+        self.counter = counter
 
         self.chain = chain
-        self.w3 = Web3(HTTPProvider(chain.rpc_url))
-        self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        self.table = get_wallet_table(chain)
+        self.row = self.table.row(self.address, key_ref)
+
+        clients = self.table.clients
+        self.w3 = clients.w3
+        self.nonces = NonceManager(self.w3, self.address, self.table)
+        self.gas_oracle = clients.gas_oracle
+        self.fee_estimator = clients.fee_estimator
+        self.receipts = clients.receipts
+        self.prefetched: dict = {}
+        self.journal: JournalEntry = None
+        self.sweep_balance: int = None  # set while sending a max native sweep
 
     def __str__(self):
         return f"Wallet(address={self.address})"
 
+    @property
+    def label(self) -> str:
+        return f"{self.counter} {self.address} |"
+
+    @property
+    def account(self) -> LocalAccount:
+        return Account.from_key(self.private_key)
+
+    def use_prefetched(self, data: dict):
+        """
+        Attach values fetched by the pre-flight batch.
+        """
+        self.prefetched = dict(data)
+        if "nonce" in self.prefetched:
+            self.nonces.seed(self.prefetched.pop("nonce"))
+
+    def from_prefetch(self, key: str, fetch):
+        """
+        Use a prefetched value once, falling back to a live RPC call.
+        """
+        if key in self.prefetched:
+            return self.prefetched.pop(key)
+        return fetch()
+
+    def record(self, state: str, **fields):
+        """
+        Record a state transition in the wallet table and the run journal.
+        """
+        self.table.set_status(self.row, state)
+        if self.journal:
+            self.journal.record(state, **fields)
+
     def sign_message(self, message: str) -> str:
         message_encoded = encode_defunct(text=message)
         signed_message = self.account.sign_message(message_encoded)
@@ -42,7 +156,7 @@ class Wallet:
     def get_contract(self, address: str, abi: list[dict] = None) -> Contract:
         contract_address = self.w3.to_checksum_address(address)
         if not abi:
-            abi = ERC20_ABI
+            abi = get_erc20_abi()
 
         return self.w3.eth.contract(address=contract_address, abi=abi)
 
@@ -51,10 +165,16 @@ class Wallet:
         Return the balance of ETH or a given token.
         """
         if token_addr is None:
-            return self.w3.eth.get_balance(self.address)
+            balance = self.from_prefetch(
+                "balance", lambda: self.w3.eth.get_balance(self.address)
+            )
+            self.table.balances[self.row] = balance
+            return balance
         else:
             token = self.get_contract(token_addr)
-            return token.functions.balanceOf(self.address).call()
+            return self.from_prefetch(
+                "token_balance", token.functions.balanceOf(self.address).call
+            )
 
     def get_token(self, token_addr: str, as_dict: bool = False):
         """
@@ -62,9 +182,13 @@ class Wallet:
         """
         token = self.get_contract(token_addr)
 
-        balance = token.functions.balanceOf(self.address).call()
-        decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        keys = ("token_balance", "decimals", "symbol")
+        if all(key in self.prefetched for key in keys):
+            balance, decimals, symbol = (self.prefetched.pop(key) for key in keys)
+        else:
+            balance = token.functions.balanceOf(self.address).call()
+            metadata = self.get_token_metadata(token.address)
+            decimals, symbol = metadata["decimals"], metadata["symbol"]
 
         if as_dict:
             return {
@@ -75,49 +199,62 @@ class Wallet:
 
         return balance, decimals, symbol
 
+    def get_token_metadata(self, token_addr: str) -> dict:
+        """
+        Return token decimals & symbol, fetched once per chain and cached on disk.
+        """
+        token_addr = self.w3.to_checksum_address(token_addr)
+        return cache.metadata.get_or_fetch(
+            token_key(self.chain.name, token_addr),
+            lambda: Multicall(self.w3).get_token_info(token_addr),
+        )
+
+    def get_chain_id(self) -> int:
+        return cache.metadata.get_or_fetch(
+            chain_key(self.chain.name), lambda: self.w3.eth.chain_id
+        )
+
     def get_tx_data(self, value: int = 0, **kwargs):
         """
-        Build a transaction dict.
+        Build a transaction dict. The nonce is assigned by the nonce manager on send.
+
+        Fee fields come from the gas oracle, so `build_transaction` doesn't look
+        up its own; send_tx reprices them right before signing.
         """
         return {
-            "chainId": self.w3.eth.chain_id,
+            "chainId": self.from_prefetch("chain_id", self.get_chain_id),
             "from": self.address,
-            "nonce": self.w3.eth.get_transaction_count(self.address),
             "value": value,
+            **self.gas_oracle.fees(),
             **kwargs,
         }
 
     def get_gas(self, tx: dict, gwei_multiplier: float = 1.2) -> dict:
         """
-        Populate tx with either EIP-1559 or legacy gas parameters and estimate gas.
+        Populate tx with either EIP-1559 or legacy gas parameters from the chain's
+        gas oracle and estimate gas.
         """
-        gas_price_legacy = self.w3.eth.gas_price
+        with metrics.phase("gas"):
+            tx.update(self.gas_oracle.fees(gwei_multiplier))
 
-        max_priority_fee = self.w3.eth.max_priority_fee
-        latest_block = self.w3.eth.get_block("latest")
-        base_fee = int(
-            max(gas_price_legacy, latest_block["baseFeePerGas"]) * gwei_multiplier
-        )
-
-        max_fee_per_gas = max_priority_fee + base_fee
-
-        if self.chain.eip_1559:
-            tx["maxFeePerGas"] = max_fee_per_gas
-            tx["maxPriorityFeePerGas"] = max_priority_fee
-
-        else:
-            if self.chain.name == "bsc":
-                tx["gasPrice"] = self.w3.to_wei(1, "gwei")
-            else:
-                tx["gasPrice"] = int(gas_price_legacy * gwei_multiplier)
-
-        if not tx.get("gas"):
-            tx["gas"] = self.w3.eth.estimate_gas(tx)
+            if not tx.get("gas"):
+                tx["gas"] = self.from_prefetch(
+                    "gas", lambda: self.w3.eth.estimate_gas(tx)
+                )
 
         return tx
 
     def sign_tx(self, tx: dict):
-        return self.w3.eth.account.sign_transaction(tx, private_key=self.account.key)
+        with metrics.phase("sign"):
+            return self.w3.eth.account.sign_transaction(
+                tx, private_key=self.private_key
+            )
+
+    def wait_receipt(self, tx_hash, timeout: float = 60):
+        with metrics.phase("confirm"):
+            tx_receipt = self.receipts.wait(tx_hash, timeout=timeout)
+        metrics.gas_paid(self.chain.name, tx_receipt)
+        return tx_receipt
 
     def send_tx(
         self,
@@ -127,22 +264,36 @@ class Wallet:
         gwei_increment: float = 0.5,
         retry_count: int = 0,
         max_retry: int = 5,
-        delay: float = 3,  # delay in seconds between retries
+        delay: float = 3,  # base retry delay in seconds, doubled per retry
     ):
+        # A pair resumed from the journal replaces its unconfirmed tx, which
+        # already went out with that nonce
+        broadcast = "nonce" not in tx and "replace_nonce" in self.prefetched
+        if "nonce" not in tx:
+            tx["nonce"] = self.from_prefetch("replace_nonce", self.nonces.allocate)
+
         while retry_count < max_retry:
             try:
-                if not tx.get("gasPrice") or tx.get("maxFeePerGas"):
-                    tx = self.get_gas(tx)
+                # Wait out a base fee above the ceiling, then price the attempt
+                get_scheduler(self.chain).hold()
+                tx = self.get_gas(tx, gwei_multiplier)
+                if self.sweep_balance is not None:
+                    # A max sweep sends whatever the repriced gas leaves over
+                    tx["value"] = self.sweep_balance - self.fee_estimator.cost(tx)
 
                 # logger.debug(f"{tx_label} | Attempt {retry_count+1}: Using gas settings: {tx}")
 
                 signed_tx = self.sign_tx(tx)
-                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+                self.record(
+                    "signed", raw=signed_tx.rawTransaction.hex(), nonce=tx["nonce"]
+                )
+                with metrics.phase("broadcast"):
+                    tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+                broadcast = True
+                self.record("broadcast", hash=tx_hash.hex(), nonce=tx["nonce"])
                 logger.info(f"{tx_label} | {self.chain.explorer}/tx/{tx_hash.hex()}")
 
-                tx_receipt = self.w3.eth.wait_for_transaction_receipt(
-                    tx_hash, timeout=60
-                )
+                tx_receipt = self.wait_receipt(tx_hash, timeout=60)
 
                 if tx_receipt.status == 1:
                     logger.success(f"{tx_label} | Tx confirmed \n")
@@ -154,52 +305,143 @@ class Wallet:
                 # Terminate loop
                 if retry_count >= max_retry - 1:
                     logger.error(f"{tx_label} | Reached max number of retries \n")
+                    if not broadcast:
+                        self.nonces.release(tx["nonce"])
                     return False
 
                 # Handle different type of errors
-                error_str = str(err)
+                error_class = classify_error(str(err))
+                metrics.inc("send_retries_total", error=error_class)
 
-                if "already known" in error_str:
+                if error_class == "already_known":
                     logger.info(f"{tx_label} | Tx is likely confirmed \n")
                     return True
 
-                elif "nonce too low" in error_str:
-                    logger.info(
-                        f"{tx_label} | Tx likely in process, current nonce {self.w3.eth.get_transaction_count(self.address, 'pending')}"
+                elif error_class == "nonce_too_low":
+                    if broadcast:
+                        logger.info(
+                            f"{tx_label} | Tx likely in process, current nonce {self.nonces.resync()}"
+                        )
+                        return True
+
+                    # Nothing of ours holds the nonce, it was taken outside this run
+                    self.nonces.resync()
+                    tx["nonce"] = self.nonces.allocate()
+                    logger.warning(
+                        f"{tx_label} | Nonce too low, resynced to {tx['nonce']}"
                     )
-                    return True
+                    retry_count += 1
+                    continue
 
-                elif "could not replace existing tx" in error_str:
+                elif error_class == "replace":
                     logger.warning(
                         f"{tx_label} | Detected replace error, waiting before retrying"
                     )
 
-                elif any(
-                    error in error_str
-                    for error in [
-                        "replacement transaction underpriced",
-                        "is not in the chain after",
-                        "max fee per gas less than block base fee",
-                        "fee cap less than block base fee",
-                    ]
-                ):
+                elif error_class == "underpriced":
                     logger.warning(
                         f"{tx_label} | Underpriced or fee error, increasing gwei and retrying"
                     )
 
-                elif "insufficient funds" in error_str:
+                elif error_class == "insufficient_funds":
                     logger.error(f"{tx_label} | Insufficient funds for transaction")
+                    if not broadcast:
+                        self.nonces.release(tx["nonce"])
                     return False
 
-                # Wait before retrying
-                time.sleep(delay)
-                gwei_multiplier += gwei_increment
+                elif error_class == "rate_limited":
+                    logger.warning(f"{tx_label} | Rate limited by the RPC, backing off")
+
+                # Wait before retrying; throttling is not a fee problem
+                time.sleep(backoff_delay(retry_count, delay))
+                if error_class != "rate_limited":
+                    gwei_multiplier += gwei_increment
                 retry_count += 1
 
         logger.error(f"{tx_label} | All retry attempts failed.")
+        if not broadcast:
+            self.nonces.release(tx["nonce"])
         return False
 
-    def transfer_eth(self, value: str | int | list[float], to: str):
+    def broadcast_tx(
+        self,
+        tx: dict,
+        tx_label: str = "",
+        gwei_multiplier: float = 1.2,
+        gwei_increment: float = 0.5,
+        max_retry: int = 5,
+        delay: float = 3,
+    ):
+        """
+        Sign and broadcast a tx without waiting for its receipt.
+
+        Returns the tx hash, or None if the tx could not be broadcast. Used by
+        the pipelined dispense where receipts are confirmed separately.
+        """
+        if "nonce" not in tx:
+            tx["nonce"] = self.from_prefetch("replace_nonce", self.nonces.allocate)
+
+        for attempt in range(max_retry):
+            try:
+                get_scheduler(self.chain).hold()
+                tx = self.get_gas(tx, gwei_multiplier)
+
+                signed_tx = self.sign_tx(tx)
+                self.record(
+                    "signed", raw=signed_tx.rawTransaction.hex(), nonce=tx["nonce"]
+                )
+                with metrics.phase("broadcast"):
+                    tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+                self.record("broadcast", hash=tx_hash.hex(), nonce=tx["nonce"])
+                logger.info(f"{tx_label} | {self.chain.explorer}/tx/{tx_hash.hex()}")
+                return tx_hash
+
+            except Exception as err:
+                logger.debug(f"{tx_label} | Error on attempt {attempt+1}: {err}")
+                error_class = classify_error(str(err))
+                metrics.inc("send_retries_total", error=error_class)
+
+                if error_class == "already_known":
+                    return signed_tx.hash
+
+                elif error_class == "nonce_too_low":
+                    # Nonce was taken outside this run, move past it
+                    self.nonces.resync()
+                    tx["nonce"] = self.nonces.allocate()
+                    logger.warning(
+                        f"{tx_label} | Nonce too low, resynced to {tx['nonce']}"
+                    )
+                    continue
+
+                elif error_class == "insufficient_funds":
+                    logger.error(f"{tx_label} | Insufficient funds for transaction")
+                    break
+
+                time.sleep(backoff_delay(attempt, delay))
+                if error_class != "rate_limited":
+                    gwei_multiplier += gwei_increment
+
+        logger.error(f"{tx_label} | Failed to broadcast tx")
+        self.nonces.release(tx["nonce"])
+        return None
+
+    def confirm_tx(self, tx_hash, tx_label: str = "", timeout: float = 60) -> bool:
+        """
+        Wait for the receipt of a broadcast tx.
+        """
+        tx_receipt = self.wait_receipt(tx_hash, timeout=timeout)
+
+        if tx_receipt.status == 1:
+            logger.success(f"{tx_label} | Tx confirmed \n")
+            return True
+
+        logger.error(f"{tx_label} | Tx reverted \n")
+        return False
+
+    def build_eth_transfer(self, value: str | int | list[float], to: str):
+        """
+        Prepare a native transfer, returning (tx, tx_label) or None to skip.
+        """
         balance = self.get_balance()
 
         if not balance:
@@ -207,15 +449,23 @@ class Wallet:
             return
 
         tx = self.get_tx_data(to=to)
-        tx = self.get_gas(tx)
+        self.sweep_balance = None
+
+        if value == "max" and self.fee_estimator.is_eoa(to):
+            # Gas to an EOA is fixed, so keep back exactly what the tx can cost
+            tx["gas"] = TRANSFER_GAS
+            tx = self.get_gas(tx)
+            self.sweep_balance = balance
+            transfer_value = balance - self.fee_estimator.cost(tx)
+        else:
+            tx = self.get_gas(tx)
 
         # Return transfer value in wei
         if isinstance(value, int):
             transfer_value = value
         elif isinstance(value, list):
-            value_range_wei = [int(value * 10**18) for value in value]
-            transfer_value = random.randint(*value_range_wei)
-        elif value == "max":
+            transfer_value = draw(value, 18)
+        elif value == "max" and self.sweep_balance is None:
             if self.chain.eip_1559:
                 tx_cost = tx["maxFeePerGas"] * tx["gas"]
             else:
@@ -224,6 +474,10 @@ class Wallet:
             transfer_value = balance - int(tx_cost * 1.5)
             # transfer_value = int(balance * 0.99)
 
+        if transfer_value <= 0:
+            logger.warning(f"{self.label} Balance doesn't cover the gas")
+            return
+
         if transfer_value > balance:
             logger.warning(f"{self.label} Not enough balance")
             return
@@ -233,9 +487,12 @@ class Wallet:
         amount_str = f"{self.w3.from_wei(transfer_value, 'ether'):.6f}"
         tx_label = f"{self.label} Send {amount_str} {self.chain.native_token} to {truncate(to)}"
 
-        return self.send_tx(tx, tx_label=tx_label)
+        return tx, tx_label
 
-    def transfer_token(self, amount: str | int | list[float], to: str):
+    def build_token_transfer(self, amount: str | int | list[float], to: str):
+        """
+        Prepare an ERC20 transfer, returning (tx, tx_label) or None to skip.
+        """
         token = self.get_contract(settings.TOKEN_ADDRESS)
         balance, decimals, symbol = self.get_token(token.address)
 
@@ -247,8 +504,7 @@ class Wallet:
         if isinstance(amount, int):
             transfer_amount = amount
         elif isinstance(amount, list):
-            amount_range_wei = [int(value * 10**decimals) for value in amount]
-            transfer_amount = random.randint(*amount_range_wei)
+            transfer_amount = draw(amount, decimals)
         elif amount == "max":
             transfer_amount = balance
 
@@ -262,12 +518,30 @@ class Wallet:
         amount_str = f"{transfer_amount / (10**decimals):.6f}"
         tx_label = f"{self.label} Transfer {amount_str} {symbol} to {truncate(to)}"
 
-        return self.send_tx(tx, tx_label=tx_label)
+        return tx, tx_label
 
-    def transfer(self, token: str, amount: str | int | list[float], recipient: str):
+    def transfer_eth(self, value: str | int | list[float], to: str):
+        prepared = self.build_eth_transfer(value, to)
+        if prepared:
+            return self.send_tx(*prepared)
+
+    def transfer_token(self, amount: str | int | list[float], to: str):
+        prepared = self.build_token_transfer(amount, to)
+        if prepared:
+            return self.send_tx(*prepared)
+
+    def build_transfer(
+        self, token: str, amount: str | int | list[float], recipient: str
+    ):
         recipient = self.w3.to_checksum_address(recipient)
 
-        if token == self.chain.native_token:
-            return self.transfer_eth(value=amount, to=recipient)
-        elif token == "ERC20":
-            return self.transfer_token(amount=amount, to=recipient)
+        with metrics.phase("build"):
+            if token == self.chain.native_token:
+                return self.build_eth_transfer(value=amount, to=recipient)
+            elif token == "ERC20":
+                return self.build_token_transfer(amount=amount, to=recipient)
+
+    def transfer(self, token: str, amount: str | int | list[float], recipient: str):
+        prepared = self.build_transfer(token, amount, recipient)
+        if prepared:
+            return self.send_tx(*prepared)
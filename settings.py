@@ -1,6 +1,61 @@
 SHUFFLE_WALLETS = False
 SLEEP_BETWEEN_ACTIONS = [20, 40]
+SPACE_WALLETS = True  # Random pause between wallets, False sends as fast as RPCs allow
 
 TOKEN_ADDRESS = ""
 CHAIN = "ethereum"  # ethereum | base | arbitrum | optimism | linea | bsc | opbnb
+CHAINS = []  # Run on several chains in parallel, e.g. ["base", "arbitrum"]; overrides CHAIN
 VARIANCE = 0.05  # Sets amount variance when sending even amounts
+AMOUNT_SEED = None  # Seed for random amounts, set it to make a run reproducible
+
+RPC_POOL_SIZE = 20  # Max keep-alive connections per chain
+RPC_TIMEOUT = 30  # RPC request timeout in seconds
+BROADCAST_FANOUT = 1  # Endpoints each signed tx is sent to (see Network.rpc_urls)
+RATE_LIMIT_BACKOFF = (
+    10  # Seconds an endpoint is skipped after a 429, doubled per repeat
+)
+BACKOFF_MAX_DELAY = 60  # Cap in seconds for exponential retry backoff
+CIRCUIT_BREAKER_FAILURES = 5  # Consecutive failures before an endpoint is skipped
+CIRCUIT_BREAKER_COOLDOWN = 30  # Seconds before a failed endpoint is retried
+
+ENGINE = "sync"  # sync | async | presign
+CONCURRENCY = 10  # Max transfers in flight at once (async engine)
+RPC_RATE_LIMIT = 20  # Max RPC requests per second per endpoint, 0 to disable
+PIPELINE = False  # Dispense: send back-to-back with local nonces, confirm separately
+SIGNING_WORKERS = 0  # Processes for the presign engine, 0 for one per core
+SIGNED_TX_DIR = "signed"  # Where the presign engine writes raw signed txs
+
+DISPERSE_BLOCK_GAS_SHARE = 0.25  # Disperse: max share of the block gas limit per tx
+
+PREFLIGHT_BATCH_SIZE = 100  # Transfers per JSON-RPC pre-flight batch
+PREFLIGHT_MAX_AGE = 60  # Seconds pre-flight data is trusted before a re-fetch
+
+KEY_SOURCE = "keys"  # keys (keys.txt) | mnemonic (mnemonics.txt)
+HD_PATH = "m/44'/60'/0'/0"  # Mnemonic keys are its children /0, /1, ...
+HD_PASSPHRASE = ""  # Optional BIP39 passphrase
+HD_INDEX_DIR = "cache/hd"  # On-disk index of derived addresses (no keys)
+
+SCAN_BALANCES = True  # Collect: skip zero-balance wallets using a Multicall3 scan
+SCAN_CONCURRENCY = 4  # Multicall3 eth_calls in flight at once while scanning
+FUNDED_KEYS_FILE = "funded_keys.txt"  # Written by `python main.py scan`
+MULTICALL_MAX_CALLDATA = 100_000  # Max calldata bytes per Multicall3 eth_call
+
+CACHE_PATH = "cache/metadata.json"  # On-disk cache for chain ids & token metadata
+FEE_CACHE_TTL = 3  # Seconds between block number polls of the gas oracle
+
+GAS_PRIORITY_PERCENTILE = None  # None (node suggestion) | 10 | 25 | 50 | 75 | 90
+FEE_HISTORY_BLOCKS = 10  # Blocks sampled by eth_feeHistory
+GAS_CEILING_GWEI = None  # Hold sends while the base fee is above this, e.g. 15
+GAS_CEILING_PERCENTILE = None  # Or above this percentile of recent base fees, e.g. 30
+GAS_CEILING_WINDOW = 300  # Blocks of base fee history for GAS_CEILING_PERCENTILE
+GAS_HOLD_TIMEOUT = None  # Max seconds to hold sends, None waits for the ceiling
+RECEIPT_POLL_INTERVAL = 2  # Seconds between new-block checks of the receipt watcher
+RECEIPT_TIMEOUT = 120  # Seconds a presigned tx may go unmined before it counts as dropped
+
+JOURNAL = True  # Record every pair in a JSONL journal and resume interrupted runs
+JOURNAL_DIR = "journal"
+JOURNAL_FSYNC_EVERY = 20  # Journal lines written per fsync
+
+METRICS = True  # Write RPC/phase timings to METRICS_DIR and print a summary
+METRICS_DIR = "metrics"
+METRICS_FORMAT = "jsonl"  # jsonl | prom (Prometheus text format)
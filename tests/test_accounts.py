@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+from eth_account import Account
+
+from models.network import Network
+from modules import accounts
+from modules.accounts import address_of, cache_addresses
+from modules.wallet import Wallet
+
+"""
+The address cache keeps only the most recently used keys, so it stays flat
+over a long run, and the wallet table refers to keys by pair number instead
+of holding them.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+
+
+def test_address_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(accounts, "ADDRESS_CACHE_SIZE", 3)
+    monkeypatch.setattr(accounts, "_addresses", OrderedDict())
+    keys = [f"0x{i:064x}" for i in range(1, 6)]
+    cache_addresses(keys, [f"0x{i:040x}" for i in range(1, 6)])
+    address_of(keys[2])  # a repeated sender stays cached
+
+    cache_addresses([f"0x{6:064x}"], [f"0x{6:040x}"])
+    assert keys[2] in accounts._addresses and keys[0] not in accounts._addresses
+    assert len(accounts._addresses) == 3
+
+    # An evicted key is derived again
+    assert address_of(keys[0]) == Account.from_key(keys[0]).address
+
+
+def test_table_refers_to_the_key_by_pair_number():
+    chain = Network(
+        name="key-ref-check",
+        rpc_url="http://127.0.0.1:1",
+        explorer="",
+        eip_1559=True,
+        native_token="ETH",
+    )
+    wallet = Wallet(KEY, "[7/9]", chain, 7)
+    Wallet(KEY, "[8/9]", chain, 8)
+
+    assert wallet.table.key_refs[wallet.row] == 7
+    assert KEY not in wallet.table.addresses
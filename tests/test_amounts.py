@@ -0,0 +1,54 @@
+import pytest
+
+import main
+import settings
+from benchmarks.evm_sim import EVMSimulator
+from models.network import Network
+from models.transfer import Transfer
+from modules.amounts import gas_reserve
+from modules.sources import InputError
+from modules.wallet import Wallet
+
+"""
+Even splits leave one share with the sender, after the gas reserve on native
+transfers, and a balance too small to split is reported as bad input.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+PAIRS = 10
+
+
+def even_transfer(sim: EVMSimulator, name: str) -> Transfer:
+    chain = Network(
+        name=name,
+        rpc_url=sim.url,
+        explorer="",
+        eip_1559=True,
+        native_token="ETH",
+    )
+    return Transfer(action="dispense", token="ETH", amount="even", chain=chain)
+
+
+def test_even_split_keeps_a_share(monkeypatch):
+    monkeypatch.setattr(main, "first", lambda *_: KEY)
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        transfer = even_transfer(sim, "even-split-check")
+        balance = 10**18
+        sim.fund(Wallet(KEY, "[0/1]", transfer.chain).address, balance)
+
+        amounts = main.plan_amounts(transfer, PAIRS)
+        budget = balance - gas_reserve(transfer.chain, PAIRS)
+
+    assert len(amounts) == PAIRS and min(amounts) > 0
+    kept = budget - sum(amounts)
+    assert kept >= budget // (PAIRS + 1) * (1 - settings.VARIANCE)
+
+
+def test_even_split_of_empty_balance_is_input_error(monkeypatch):
+    monkeypatch.setattr(main, "first", lambda *_: KEY)
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        transfer = even_transfer(sim, "even-empty-check")
+        with pytest.raises(InputError):
+            main.plan_amounts(transfer, PAIRS)
@@ -0,0 +1,43 @@
+import asyncio
+
+from benchmarks.evm_sim import EVMSimulator
+from models.network import Network
+from modules.async_wallet import AsyncWallet
+from modules.provider import build_async_web3
+
+"""
+A transfer the async engine drops while building (not enough balance) takes
+no nonce, so the sender's next transfer is not stuck behind a gap.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+RECIPIENT = "0x" + "55" * 20
+
+
+def test_underfunded_transfer_holds_no_nonce():
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        chain = Network(
+            name="async-nonce-check",
+            rpc_url=sim.url,
+            explorer="",
+            eip_1559=True,
+            native_token="ETH",
+        )
+
+        async def run():
+            w3 = build_async_web3(chain)
+            try:
+                wallet = AsyncWallet(KEY, "[1/2]", chain, w3)
+                sim.fund(wallet.address, 10**16)
+
+                assert await wallet.transfer("ETH", 10**18, RECIPIENT) is None
+                assert wallet.nonces.next_nonce is None
+
+                wallet = AsyncWallet(KEY, "[2/2]", chain, w3)
+                return await wallet.transfer("ETH", 1000, RECIPIENT)
+            finally:
+                await w3.provider.close()
+
+        assert asyncio.run(run())
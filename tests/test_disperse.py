@@ -0,0 +1,155 @@
+from eth_abi import encode
+from eth_account import Account
+from eth_utils import to_checksum_address
+
+import settings
+from benchmarks.evm_sim import DISPERSE_ETHER, TOKEN_ADDRESS, EVMSimulator
+from benchmarks.evm_sim import decode_raw_tx
+from data.const import DISPERSE_ADDRESS
+from models.network import Network
+from models.transfer import Transfer
+from modules import disperse as disperse_module
+from modules.disperse import disperse
+from modules.journal import Journal, pair_id
+
+"""
+Disperse against the local EVM: native and ERC20 payouts, and resuming a run
+whose chunk tx never confirmed. A chunk is only replayed at its nonce when it
+holds the same pairs; otherwise a mined chunk counts and a pending one is
+cancelled before its pairs are paid again.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+SENDER = Account.from_key(KEY).address
+# Recipients come checksummed from recipients.txt
+R1, R2, R3, R4 = (to_checksum_address(f"0x{n:040x}") for n in (0xA1, 0xA2, 0xA3, 0xA4))
+
+
+def network(sim: EVMSimulator, name: str) -> Network:
+    return Network(
+        name=name,
+        rpc_url=sim.url,
+        explorer="",
+        eip_1559=True,
+        native_token="ETH",
+    )
+
+
+def jobs(amounts: dict) -> list[tuple]:
+    return [(i, KEY, r, v) for i, (r, v) in enumerate(amounts.items(), start=1)]
+
+
+def pending_chunk(sim: EVMSimulator, amounts: dict, max_fee: int) -> str:
+    """
+    Put an interrupted run's disperseEther chunk at nonce 0 into the mempool.
+    """
+    data = DISPERSE_ETHER + encode(
+        ["address[]", "uint256[]"], [list(amounts), list(amounts.values())]
+    )
+    tx = {
+        "type": 2,
+        "chainId": 1337,
+        "nonce": 0,
+        "to": DISPERSE_ADDRESS,
+        "value": sum(amounts.values()),
+        "data": data,
+        "gas": 500_000,
+        "maxFeePerGas": max_fee,
+        "maxPriorityFeePerGas": max_fee,
+    }
+    tx = decode_raw_tx(bytes(Account.sign_transaction(tx, KEY).rawTransaction))
+    with sim._chain_lock:
+        sim.add_pending(tx)
+    return tx["hash"]
+
+
+def interrupted_journal(tmp_path, tx_hash: str, amounts: dict) -> Journal:
+    path = str(tmp_path / "disperse.jsonl")
+    journal = Journal(path)
+    for recipient, value in amounts.items():
+        pair = pair_id(SENDER, recipient)
+        journal.record(pair, "planned", amount=value)
+        journal.record(pair, "broadcast", hash=tx_hash, nonce=0)
+    journal.close()
+    return Journal(path)
+
+
+def test_disperse_ether_pays_every_recipient():
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        chain = network(sim, "disperse-ether-check")
+        sim.fund(SENDER, 10**18)
+        amounts = {R1: 1000, R2: 2000, R3: 3000}
+
+        transfer = Transfer("disperse", "ETH", 0, chain)
+        assert disperse(transfer, jobs(amounts), len(amounts)) == [True] * 3
+        assert [sim.balances[r.lower()] for r in amounts] == list(amounts.values())
+
+
+def test_disperse_token_approves_then_pays(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_ADDRESS", TOKEN_ADDRESS)
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        chain = network(sim, "disperse-token-check")
+        sim.fund(SENDER, 10**18)
+        sim.fund_token(SENDER, 10**6)
+        amounts = {R1: 100, R2: 200}
+
+        transfer = Transfer("disperse", "ERC20", 0, chain)
+        assert disperse(transfer, jobs(amounts), len(amounts)) == [True] * 2
+        assert [sim.token_balances[r.lower()] for r in amounts] == [100, 200]
+        assert sim.token_balances[SENDER.lower()] == 10**6 - 300
+
+
+def test_resume_counts_a_chunk_mined_meanwhile(monkeypatch, tmp_path):
+    # The recheck gave up on the old chunk just before it got mined
+    monkeypatch.setattr(disperse_module, "recover", lambda *_: False)
+    with EVMSimulator(block_time=0, congestion=0.0) as sim:
+        chain = network(sim, "disperse-mined-check")
+        sim.fund(SENDER, 10**18)
+        old = {R1: 1000, R2: 2000}
+        tx_hash = pending_chunk(sim, old, 10 * sim.next_base_fee())
+        sim.mine()
+
+        journal = interrupted_journal(tmp_path, tx_hash, old)
+        transfer = Transfer("disperse", "ETH", 0, chain)
+        disperse(transfer, jobs({R1: 5, R2: 5, R3: 3000}), 3, journal)
+        journal.close()
+
+        assert [sim.balances.get(r.lower()) for r in (R1, R2, R3)] == [1000, 2000, 3000]
+
+
+def test_resume_cancels_a_chunk_it_cannot_replay(monkeypatch, tmp_path):
+    monkeypatch.setattr(disperse_module, "recover", lambda *_: False)
+    with EVMSimulator(block_time=0, congestion=0.0) as sim:
+        chain = network(sim, "disperse-cancel-check")
+        sim.fund(SENDER, 10**18)
+        # Pays R4 too, who is no longer in the run; below the base fee it stays
+        old = {R1: 1000, R2: 2000, R4: 4000}
+        tx_hash = pending_chunk(sim, old, 1)
+
+        journal = interrupted_journal(tmp_path, tx_hash, old)
+        transfer = Transfer("disperse", "ETH", 0, chain)
+        disperse(transfer, jobs({R1: 10, R2: 20}), 2, journal)
+        journal.close()
+
+        assert tx_hash not in sim.receipts
+        # Nothing was paid at the old amounts, so the new ones are sent
+        assert [sim.balances.get(r.lower()) for r in (R1, R2, R4)] == [10, 20, None]
+
+
+def test_resume_replays_the_same_chunk_at_its_nonce(monkeypatch, tmp_path):
+    monkeypatch.setattr(disperse_module, "recover", lambda *_: False)
+    with EVMSimulator(block_time=0, congestion=0.0) as sim:
+        chain = network(sim, "disperse-replay-check")
+        sim.fund(SENDER, 10**18)
+        old = {R1: 1000, R2: 2000}
+        tx_hash = pending_chunk(sim, old, 1)
+
+        journal = interrupted_journal(tmp_path, tx_hash, old)
+        transfer = Transfer("disperse", "ETH", 0, chain)
+        assert disperse(transfer, jobs({R1: 10, R2: 20}), 2, journal) == [True] * 2
+        journal.close()
+
+        assert sim.nonces[SENDER.lower()] == 1
+        assert [sim.balances.get(r.lower()) for r in (R1, R2)] == [1000, 2000]
@@ -0,0 +1,48 @@
+from benchmarks.mock_rpc import GAS_PRICE, MockRPC
+from models.network import Network
+from modules.gas import GasOracle
+from modules.provider import build_web3
+
+"""
+A lagging or pruned RPC may answer the latest-block read with null: the gas
+oracle asks again on its own and otherwise keeps its previous fees.
+
+    python -m pytest tests
+"""
+
+
+class NullBlocks(MockRPC):
+    # Answers the first `nulls` latest-block reads with null
+    def __init__(self, nulls: int):
+        super().__init__()
+        self.nulls = nulls
+
+    def handle_call(self, method: str, params: list):
+        if method == "eth_getBlockByNumber" and self.nulls:
+            self.nulls -= 1
+            return None
+        return super().handle_call(method, params)
+
+
+def oracle(server: MockRPC, name: str) -> GasOracle:
+    chain = Network(name, server.url, "", True, "ETH")
+    return GasOracle(chain, build_web3(chain))
+
+
+def test_null_block_is_read_again_on_its_own():
+    with NullBlocks(nulls=1) as server:
+        gas = oracle(server, "null-block-retry-check")
+        gas.refresh()
+
+        assert gas.block_number == 1
+        assert gas.base_fee == gas.gas_price == GAS_PRICE
+
+
+def test_null_block_keeps_the_previous_fees():
+    with NullBlocks(nulls=2) as server:
+        gas = oracle(server, "null-block-keep-check")
+        gas.update({"number": "0x0", "baseFeePerGas": hex(7)}, 9, 3)
+        gas.refresh()
+
+        assert (gas.block_number, gas.base_fee, gas.gas_price) == (0, 7, 9)
+        assert gas.max_priority_fee == 3
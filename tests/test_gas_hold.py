@@ -0,0 +1,43 @@
+import settings
+from benchmarks.evm_sim import EVMSimulator
+from models.network import Network
+from modules.fees import TOKEN_TRANSFER_GAS
+from modules.wallet import Wallet
+
+"""
+Sends are held while the base fee is above the gas ceiling, including token
+transfers whose fee fields were already filled in by `build_transaction`.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+TOKEN = "0x" + "22" * 20
+# transfer(address,uint256) calldata, as build_token_transfer would encode it
+CALLDATA = "0xa9059cbb" + "33" * 12 + "44" * 20 + f"{10**18:064x}"
+
+
+def test_token_transfer_waits_for_gas_ceiling(monkeypatch):
+    # No block usage: the base fee falls 12.5% per block
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        chain = Network(
+            name="gas-hold-check",
+            rpc_url=sim.url,
+            explorer="",
+            eip_1559=True,
+            native_token="ETH",
+        )
+        wallet = Wallet(KEY, "[1/1]", chain)
+        sim.fund(wallet.address, 10**18)
+
+        ceiling = sim.next_base_fee() // 2
+        monkeypatch.setattr(settings, "GAS_CEILING_GWEI", ceiling / 10**9)
+        monkeypatch.setattr(settings, "FEE_CACHE_TTL", 0.05)
+
+        tx = wallet.get_tx_data(to=TOKEN, data=CALLDATA, gas=TOKEN_TRANSFER_GAS)
+        assert tx.get("maxFeePerGas"), "fee fields are set before send_tx"
+        assert wallet.send_tx(tx, "token transfer")
+
+        receipt = next(iter(sim.receipts.values()))
+        mined_in = sim.blocks[int(receipt["blockNumber"], 16)]
+        assert mined_in["baseFee"] <= ceiling
@@ -0,0 +1,56 @@
+import eth_account.hdaccount
+import pytest
+from eth_account import Account
+
+import settings
+from modules.hd import child_key, parent_key
+from modules.sources import InputError
+
+"""
+HD keys derived with one HMAC per index match eth_account's own derivation
+of the full path, and the mnemonic is stretched once per run.
+
+    python -m pytest tests
+"""
+
+WORDS = "test test test test test test test test test test test junk"
+
+Account.enable_unaudited_hdwallet_features()
+
+
+@pytest.mark.parametrize(
+    "path, passphrase",
+    [("m/44'/60'/0'/0", ""), ("m/44'/60'/0'/0", "secret"), ("m/44'/60'/3'/1", "")],
+)
+def test_keys_match_account_from_mnemonic(monkeypatch, path, passphrase):
+    monkeypatch.setattr(settings, "HD_PATH", path)
+    monkeypatch.setattr(settings, "HD_PASSPHRASE", passphrase)
+    parent = parent_key(WORDS, "mnemonics.txt:1")
+
+    for index in (0, 1, 7):
+        expected = Account.from_mnemonic(
+            WORDS, passphrase=passphrase, account_path=f"{path}/{index}"
+        )
+        assert int(child_key(parent, index), 16) == int.from_bytes(expected.key, "big")
+
+
+def test_mnemonic_is_stretched_once(monkeypatch):
+    calls = []
+    seed_from_mnemonic = eth_account.hdaccount.seed_from_mnemonic
+
+    def counted(*args):
+        calls.append(args)
+        return seed_from_mnemonic(*args)
+
+    monkeypatch.setattr(eth_account.hdaccount, "seed_from_mnemonic", counted)
+    monkeypatch.setattr(settings, "HD_PASSPHRASE", "stretch-check")
+    for path in ("m/44'/60'/0'/0", "m/44'/60'/1'/0"):
+        monkeypatch.setattr(settings, "HD_PATH", path)
+        parent_key(WORDS, "mnemonics.txt:1")
+
+    assert len(calls) == 1
+
+
+def test_invalid_mnemonic_is_input_error():
+    with pytest.raises(InputError, match="mnemonics.txt:2"):
+        parent_key("test " * 12, "mnemonics.txt:2")
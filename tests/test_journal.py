@@ -0,0 +1,71 @@
+import settings
+from models.network import Network
+from models.transfer import Transfer
+from modules.journal import Journal, attach, open_journal
+
+"""
+Journals belong to one run: another payout on the same chain and token gets
+its own file, pairs that ended failed do not hold a journal open, and only an
+amount that was actually sent overrides the newly planned one.
+
+    python -m pytest tests
+"""
+
+CHAIN = Network(
+    name="journal-check",
+    rpc_url="http://127.0.0.1:1",
+    explorer="",
+    eip_1559=True,
+    native_token="ETH",
+)
+SENDER = "0x" + "aa" * 20
+RECIPIENT = "0x" + "bb" * 20
+
+
+class StubWallet:
+    # attach only needs the address, labels and somewhere to record to
+    def __init__(self):
+        self.address = SENDER
+        self.chain = CHAIN
+        self.label = "[1/1]"
+        self.prefetched = {}
+        self.journal = None
+
+    def record(self, state: str, **fields):
+        self.journal.record(state, **fields)
+
+
+def test_other_payout_gets_its_own_journal(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "JOURNAL_DIR", str(tmp_path))
+    first = open_journal(Transfer("dispense", "ETH", 5, CHAIN))
+    second = open_journal(Transfer("dispense", "ETH", 0.002, CHAIN))
+    again = open_journal(Transfer("dispense", "ETH", 5, CHAIN))
+    for journal in (first, second, again):
+        journal.close()
+
+    assert first.path != second.path
+    assert first.path == again.path
+
+
+def test_failed_pairs_are_terminal(tmp_path):
+    journal = Journal(str(tmp_path / "run.jsonl"))
+    journal.record("a", "confirmed")
+    journal.record("b", "failed")
+    assert journal.complete()
+
+    journal.record("c", "broadcast", hash="0x01", nonce=3)
+    assert not journal.complete()
+    journal.close()
+
+
+def test_unsent_pair_takes_the_new_amount(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    journal = Journal(path)
+    journal.record(f"{SENDER}:{RECIPIENT}", "planned", amount=5 * 10**18)
+    journal.close()
+
+    journal = Journal(path)
+    wallet = StubWallet()
+    assert attach(journal, wallet, RECIPIENT, 2 * 10**15) == 2 * 10**15
+    assert "replace_nonce" not in wallet.prefetched
+    journal.close()
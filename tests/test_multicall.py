@@ -0,0 +1,56 @@
+from eth_utils import to_checksum_address
+
+from benchmarks.evm_sim import TOKEN_ADDRESS, EVMSimulator
+from models.network import Network
+from modules.multicall import Multicall
+from modules.provider import build_web3
+
+"""
+Multicall3 reads against the local EVM: native and ERC20 balances split over
+several `aggregate3` calls, token metadata, and a failing call read as empty.
+
+    python -m pytest tests
+"""
+
+ADDRESSES = [to_checksum_address(f"0x{n:040x}") for n in range(0xB1, 0xB9)]
+
+
+def network(sim: EVMSimulator) -> Network:
+    return Network(
+        name="multicall-check",
+        rpc_url=sim.url,
+        explorer="",
+        eip_1559=True,
+        native_token="ETH",
+    )
+
+
+def test_balances_over_chunks():
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        for i, address in enumerate(ADDRESSES):
+            sim.fund(address, i * 10**15)
+            sim.fund_token(address, i * 7)
+
+        # Room for two calls per aggregate3, so the reads take several calls
+        multicall = Multicall(build_web3(network(sim)), max_calldata=600, workers=2)
+        native = multicall.get_native_balances(ADDRESSES)
+        tokens = multicall.get_token_balances(TOKEN_ADDRESS, ADDRESSES)
+
+        assert list(native.values()) == [i * 10**15 for i in range(len(ADDRESSES))]
+        assert list(tokens.values()) == [i * 7 for i in range(len(ADDRESSES))]
+        assert sim.methods["eth_call"] >= 6
+
+
+def test_token_info_and_failed_calls():
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        sim.fund_token(ADDRESSES[0], 123)
+        multicall = Multicall(build_web3(network(sim)))
+
+        info = multicall.get_token_info(TOKEN_ADDRESS, ADDRESSES[0])
+        assert info == {"decimals": 18, "symbol": "SIM", "balance": 123}
+
+        # Not a token: every balanceOf fails and reads as zero
+        assert multicall.get_token_balances(ADDRESSES[1], ADDRESSES[:2]) == {
+            ADDRESSES[0]: 0,
+            ADDRESSES[1]: 0,
+        }
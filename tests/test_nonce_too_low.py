@@ -0,0 +1,31 @@
+from benchmarks.evm_sim import EVMSimulator
+from models.network import Network
+from modules.wallet import Wallet
+
+"""
+"Nonce too low" only counts as success when this send already broadcast a tx
+at that nonce; otherwise the nonce is resynced and the send retried.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+RECIPIENT = "0x" + "55" * 20
+
+
+def test_nonce_too_low_before_any_broadcast_is_not_success():
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        chain = Network(
+            name="nonce-too-low-check",
+            rpc_url=sim.url,
+            explorer="",
+            eip_1559=True,
+            native_token="ETH",
+        )
+        wallet = Wallet(KEY, "[1/1]", chain)
+        sim.fund(wallet.address, 10**18)
+        sim.faults = {"nonce_too_low": 1.0}
+
+        tx = wallet.get_tx_data(to=RECIPIENT, value=1000, gas=21_000)
+        assert wallet.send_tx(tx, "nonce too low", max_retry=2) is False
+        assert sim.mined == 0
@@ -0,0 +1,102 @@
+import json
+import time
+from concurrent.futures import Future
+
+from eth_account import Account
+
+import settings
+from benchmarks.evm_sim import EVMSimulator
+from models.network import Network
+from models.transfer import Transfer
+from modules import signer
+from modules.journal import Journal
+from modules.signer import broadcast_signed, sign_one
+
+"""
+A presigned tx that goes unmined for `RECEIPT_TIMEOUT` counts as dropped: the
+broadcast neither hangs on its receipt nor sends its sender's later nonces,
+and its journal entry stays broadcast for a resumed run to recheck.
+
+    python -m pytest tests
+"""
+
+KEY = "0x" + "11" * 32
+SENDER = Account.from_key(KEY).address
+RECIPIENT = "0x" + "55" * 20
+
+
+def network(sim: EVMSimulator, name: str) -> Network:
+    return Network(
+        name=name,
+        rpc_url=sim.url,
+        explorer="",
+        eip_1559=True,
+        native_token="ETH",
+    )
+
+
+def signed_file(tmp_path, nonces: list[int]) -> str:
+    path = tmp_path / "signed.jsonl"
+    with open(path, "w") as file:
+        for position, nonce in enumerate(nonces, start=1):
+            tx = {
+                "type": 2,
+                "chainId": 1337,
+                "nonce": nonce,
+                "to": RECIPIENT,
+                "value": 1000,
+                "gas": 21_000,
+                "maxFeePerGas": 10**11,
+                "maxPriorityFeePerGas": 10**9,
+            }
+            record = {
+                "index": position,
+                "label": f"[{position}/{len(nonces)}]",
+                "from": SENDER,
+                "nonce": nonce,
+                **sign_one((KEY, tx)),
+            }
+            file.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+class StalledWatcher:
+    # Receipt polling that never gets an answer
+    def watch(self, tx_hash, timeout: float = 60) -> Future:
+        return Future()
+
+
+def test_stalled_receipts_do_not_hang_the_broadcast(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "RECEIPT_TIMEOUT", 0.3)
+    monkeypatch.setattr(settings, "RECEIPT_POLL_INTERVAL", 0.1)
+    monkeypatch.setattr(settings, "RPC_TIMEOUT", 1)
+    monkeypatch.setattr(settings, "SPACE_WALLETS", False)
+    monkeypatch.setattr(signer, "get_receipt_watcher", lambda _: StalledWatcher())
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        sim.fund(SENDER, 10**18)
+        path = signed_file(tmp_path, [0, 1])
+        journal = Journal(str(tmp_path / "run.jsonl"))
+        entries = {1: journal.entry("a"), 2: journal.entry("b")}
+
+        start = time.monotonic()
+        transfer = Transfer("dispense", "ETH", 0, network(sim, "presign-stall-check"))
+        assert broadcast_signed(transfer, path, entries) == [False, False]
+        assert time.monotonic() - start < 5
+
+        assert journal.get("a")["state"] == journal.get("b")["state"] == "broadcast"
+        journal.close()
+
+
+def test_unmined_tx_stops_its_senders_queue(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "RECEIPT_TIMEOUT", 0.3)
+    monkeypatch.setattr(settings, "RECEIPT_POLL_INTERVAL", 0.1)
+    monkeypatch.setattr(settings, "SPACE_WALLETS", True)
+    monkeypatch.setattr(settings, "SLEEP_BETWEEN_ACTIONS", [1, 1])
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        sim.fund(SENDER, 10**18)
+        # Nonce 0 was never sent, so the first tx never gets mined
+        path = signed_file(tmp_path, [1, 2])
+
+        transfer = Transfer("dispense", "ETH", 0, network(sim, "presign-drop-check"))
+        assert broadcast_signed(transfer, path) == [False]
+        assert sim.mined == 0
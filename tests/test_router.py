@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from requests.exceptions import HTTPError
+
+import settings
+from benchmarks.mock_rpc import MockRPC
+from models.network import Network
+from modules.provider import build_async_web3, build_web3
+from modules.ratelimit import AsyncRateLimiter
+
+"""
+Routing over mock RPC endpoints: reads fail over to a healthy endpoint, an
+endpoint whose circuit is open gets no more requests until every endpoint is
+down, and the async router does the same while pacing with async limiters.
+
+    python -m pytest tests
+"""
+
+
+def network(name: str, *servers: MockRPC) -> Network:
+    urls = [server.url for server in servers]
+    return Network(name, urls[0], "", True, "ETH", rpc_urls=urls[1:])
+
+
+def breaker(monkeypatch, failures: int = 2):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_FAILURES", failures)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_COOLDOWN", 60)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKOFF", 60)
+
+
+def test_open_circuit_is_skipped(monkeypatch):
+    breaker(monkeypatch)
+    with MockRPC(error_rate=1.0) as down, MockRPC() as up:
+        w3 = build_web3(network("router-skip-check", down, up))
+
+        for _ in range(10):
+            assert w3.eth.block_number == 1
+        assert down.faulted == 2  # tried until its circuit opened
+        assert up.requests == 10
+
+        # A failure of the healthy one does not fall through to the open circuit
+        up.error_rate = 1.0
+        with pytest.raises(HTTPError):
+            w3.eth.block_number
+        assert down.faulted == 2
+
+
+def test_all_open_still_tries_the_first_to_recover(monkeypatch):
+    breaker(monkeypatch, failures=1)
+    with MockRPC(error_rate=1.0) as first, MockRPC(throttle_rate=1.0) as second:
+        w3 = build_web3(network("router-all-open-check", first, second))
+        with pytest.raises(HTTPError):
+            w3.eth.block_number
+        assert (first.faulted, second.faulted) == (1, 1)
+
+        # Both are unavailable now; the call still goes out instead of failing
+        first.error_rate = 0.0
+        assert w3.eth.block_number == 1
+        assert first.requests == 1
+
+
+def test_async_router_skips_open_circuit(monkeypatch):
+    breaker(monkeypatch)
+    with MockRPC(error_rate=1.0) as down, MockRPC() as up:
+
+        async def run():
+            w3 = build_async_web3(network("router-async-check", down, up), rate=100)
+            try:
+                limiters = [e.limiter for e in w3.provider.endpoints]
+                assert all(isinstance(l, AsyncRateLimiter) for l in limiters)
+                return [await w3.eth.block_number for _ in range(10)]
+            finally:
+                await w3.provider.close()
+
+        assert asyncio.run(run()) == [1] * 10
+        assert down.faulted == 2
+        assert up.requests == 10
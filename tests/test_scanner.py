@@ -0,0 +1,44 @@
+from eth_account import Account
+
+from benchmarks.evm_sim import EVMSimulator
+from models.network import Network
+from models.transfer import Transfer
+from modules import scanner
+from modules.scanner import filter_funded
+
+"""
+The collect balance scan streams: it reads one chunk of jobs at a time, yields
+the funded ones with their original numbering and never holds the full input.
+
+    python -m pytest tests
+"""
+
+KEYS = ["0x" + f"{n:02x}" * 32 for n in range(0x11, 0x17)]
+RECIPIENT = "0x" + "55" * 20
+
+
+def test_scan_yields_funded_jobs_chunk_by_chunk(monkeypatch):
+    monkeypatch.setattr(scanner, "SCAN_CHUNK_SIZE", 2)
+    with EVMSimulator(block_time=0.05, congestion=0.0) as sim:
+        chain = Network(
+            name="scan-stream-check",
+            rpc_url=sim.url,
+            explorer="",
+            eip_1559=True,
+            native_token="ETH",
+        )
+        # Every other wallet holds funds
+        for key in KEYS[::2]:
+            sim.fund(Account.from_key(key).address, 10**18)
+
+        consumed = []
+
+        def jobs():
+            for index, key in enumerate(KEYS, start=1):
+                consumed.append(index)
+                yield index, key, RECIPIENT, "all"
+
+        funded = filter_funded(Transfer("collect", "ETH", "all", chain), jobs())
+        assert next(funded)[0] == 1
+        assert consumed == [1, 2]  # only the first chunk was read
+        assert [job[0] for job in funded] == [3, 5]